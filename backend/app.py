@@ -1,20 +1,43 @@
 from flask import Flask, session
 
 from .config import Config
-from .models.db import init_db
+from .models.assessment_model import configure_assessment_writes
+from .models.migrations import SchemaOutOfDateError, check_schema, init_db
 from .routes import admin_bp, api_bp, auth_bp, public_bp
+from .services.model_inference import configure_shadow
 
 
 def create_app() -> Flask:
     app = Flask(__name__)
     app.config.from_object(Config)
 
-    init_db()
+    try:
+        check_schema()
+    except SchemaOutOfDateError:
+        if not app.config["AUTO_MIGRATE"]:
+            raise
+        init_db()
+    configure_assessment_writes(
+        app.config["ASSESSMENT_DURABILITY"],
+        max_queue=app.config["ASSESSMENT_QUEUE_SIZE"],
+        batch_size=app.config["ASSESSMENT_BATCH_SIZE"],
+    )
+    configure_shadow(
+        app.config["SHADOW_MODEL_DIR"],
+        sample_rate=app.config["SHADOW_SAMPLE_RATE"],
+        max_queue=app.config["SHADOW_QUEUE_SIZE"],
+    )
     app.register_blueprint(public_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(api_bp)
 
+    @app.template_filter("ordinal")
+    def ordinal(value):
+        n = int(round(value))
+        suffix = "th" if 11 <= n % 100 <= 13 else {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+        return f"{n}{suffix}"
+
     @app.context_processor
     def inject_user_context():
         return {
@@ -5,5 +5,16 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "change-me-in-production")
     ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
     ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123")
+    # Development convenience: apply pending schema migrations at startup instead of failing.
+    AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "0").strip().lower() in ("1", "true", "yes")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    # "sync" commits each assessment in the request; "async" queues rows for batched write-behind commits.
+    ASSESSMENT_DURABILITY = os.getenv("ASSESSMENT_DURABILITY", "sync")
+    ASSESSMENT_QUEUE_SIZE = int(os.getenv("ASSESSMENT_QUEUE_SIZE", "10000"))
+    ASSESSMENT_BATCH_SIZE = int(os.getenv("ASSESSMENT_BATCH_SIZE", "200"))
+    ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+    # Candidate artifacts (a directory laid out like ml/artifacts) scored in the background for comparison.
+    SHADOW_MODEL_DIR = os.getenv("SHADOW_MODEL_DIR", "")
+    SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "0.1"))
+    SHADOW_QUEUE_SIZE = int(os.getenv("SHADOW_QUEUE_SIZE", "1000"))
@@ -0,0 +1,115 @@
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator
+
+from . import db
+from .db import get_connection
+from .score_index import invalidate_score_index
+
+ARCHIVE_PREFIX = "assessments_"
+_MONTH_RE = re.compile(r"^\d{4}-\d{2}$")
+
+
+def archive_dir() -> Path:
+    return db.DB_PATH.parent / "archive"
+
+
+def archive_files() -> list[Path]:
+    """Per-month archive files, newest first."""
+    folder = archive_dir()
+    if not folder.exists():
+        return []
+    return sorted(folder.glob(f"{ARCHIVE_PREFIX}*.db"), reverse=True)
+
+
+def _month_path(month: str) -> Path:
+    return archive_dir() / f"{ARCHIVE_PREFIX}{month.replace('-', '_')}.db"
+
+
+def _table_columns(conn, schema: str) -> list[tuple[str, str]]:
+    return [(r["name"], r["type"]) for r in conn.execute(f"PRAGMA {schema}.table_info(assessments)").fetchall()]
+
+
+def _prepare_archive_table(conn) -> list[str]:
+    main_columns = _table_columns(conn, "main")
+    conn.execute("CREATE TABLE IF NOT EXISTS arch.assessments AS SELECT * FROM main.assessments WHERE 0")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS arch.idx_assessments_id ON assessments(id)")
+    existing = {name for name, _ in _table_columns(conn, "arch")}
+    for name, kind in main_columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE arch.assessments ADD COLUMN {name} {kind}")
+    return [name for name, _ in main_columns]
+
+
+def _vacuum(conn) -> str:
+    mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    if mode == 2:
+        conn.execute("PRAGMA incremental_vacuum")
+        return "incremental"
+    # One-time switch: later runs only release free pages instead of rewriting the whole file.
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+    return "full"
+
+
+def archive_assessments(older_than_days: int, vacuum: bool = True) -> dict:
+    """Move assessments older than the cutoff into per-month SQLite files under data/archive/."""
+    cutoff = (datetime.utcnow() - timedelta(days=int(older_than_days))).isoformat(timespec="seconds") + "Z"
+    archive_dir().mkdir(parents=True, exist_ok=True)
+
+    conn = get_connection()
+    conn.isolation_level = None
+    months = [
+        r[0]
+        for r in conn.execute(
+            "SELECT DISTINCT substr(created_at, 1, 7) FROM assessments WHERE created_at < ? ORDER BY 1",
+            (cutoff,),
+        ).fetchall()
+        if r[0] and _MONTH_RE.match(r[0])
+    ]
+
+    moved: dict[str, int] = {}
+    for month in months:
+        conn.execute("ATTACH DATABASE ? AS arch", (str(_month_path(month)),))
+        try:
+            columns = ", ".join(_prepare_archive_table(conn))
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = conn.execute(
+                    f"""
+                    INSERT OR IGNORE INTO arch.assessments ({columns})
+                    SELECT {columns} FROM main.assessments
+                    WHERE created_at < ? AND substr(created_at, 1, 7) = ?
+                    """,
+                    (cutoff, month),
+                )
+                conn.execute(
+                    "DELETE FROM main.assessments WHERE created_at < ? AND substr(created_at, 1, 7) = ?",
+                    (cutoff, month),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            moved[month] = cur.rowcount
+        finally:
+            conn.execute("DETACH DATABASE arch")
+
+    if moved:
+        invalidate_score_index()
+    vacuum_mode = _vacuum(conn) if vacuum and moved else "skipped"
+    conn.close()
+    return {"cutoff": cutoff, "moved": moved, "rows_moved": sum(moved.values()), "vacuum": vacuum_mode}
+
+
+def iter_archive_rows(conn, select_sql: str, params: tuple = ()) -> Iterator[dict]:
+    """Run select_sql against each archive file in turn; use {table} for the archived assessments table."""
+    for path in archive_files():
+        conn.execute("ATTACH DATABASE ? AS arch", (str(path),))
+        try:
+            rows = conn.execute(select_sql.format(table="arch.assessments"), params).fetchall()
+        finally:
+            conn.execute("DETACH DATABASE arch")
+        for row in rows:
+            yield dict(row)
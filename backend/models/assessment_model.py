@@ -1,10 +1,27 @@
-import json
+import re
 from datetime import datetime
 
+from .archive_model import iter_archive_rows
+from .assessment_writer import get_writer, replay_dead_letters, start_writer, stop_writer
 from .db import get_connection
+from .result_codec import decode_profile, decode_result, encode_assessment, load_templates
+from .score_index import refresh_score_index
 
+INSERT_ASSESSMENT_SQL = """
+    INSERT INTO assessments (
+        created_at, user_id, patient_name, age, gender, bmi, symptoms,
+        thyroid_risk, diabetes_risk, pcos_risk, adrenal_risk, metabolic_risk,
+        risk_score, key_triggers, template_id, profile_blob, result_blob
+    )
+    VALUES (
+        :created_at, :user_id, :patient_name, :age, :gender, :bmi, :symptoms,
+        :thyroid_risk, :diabetes_risk, :pcos_risk, :adrenal_risk, :metabolic_risk,
+        :risk_score, :key_triggers, :template_id, :profile_blob, :result_blob
+    )
+"""
 
-def save_assessment(profile: dict, result: dict, patient_name: str, user_id: int | None = None) -> None:
+
+def build_assessment_row(profile: dict, result: dict, patient_name: str, user_id: int | None = None) -> dict:
     risk_scores = result.get("risk_scores", {})
     symptoms = profile.get("Symptoms", [])
     if isinstance(symptoms, list):
@@ -19,35 +36,75 @@ def save_assessment(profile: dict, result: dict, patient_name: str, user_id: int
     except Exception:
         avg_score = 0.0
 
+    return {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "user_id": user_id,
+        "patient_name": patient_name,
+        "age": profile.get("Age"),
+        "gender": profile.get("Gender"),
+        "bmi": profile.get("BMI"),
+        "symptoms": symptoms_text,
+        "thyroid_risk": risk_scores.get("thyroid"),
+        "diabetes_risk": risk_scores.get("diabetes"),
+        "pcos_risk": risk_scores.get("pcos"),
+        "adrenal_risk": risk_scores.get("adrenal"),
+        "metabolic_risk": risk_scores.get("metabolic"),
+        "risk_score": avg_score,
+        "key_triggers": ", ".join(str(x) for x in result.get("key_triggers", []) or []),
+        **encode_assessment(profile, result),
+    }
+
+
+def insert_assessment_rows(conn, rows) -> None:
+    templates = {r["template_id"]: r["template_body"] for r in rows if r.get("template_id")}
+    if templates:
+        conn.executemany("INSERT OR IGNORE INTO result_templates (id, body) VALUES (?, ?)", templates.items())
+    conn.executemany(INSERT_ASSESSMENT_SQL, rows)
+
+
+def rehydrate_assessment(item: dict, conn=None, include_static: bool = True) -> dict:
+    """Replace stored blobs on an assessment dict with decoded profile_json / result_json objects."""
+    item["profile_json"] = decode_profile(item)
+    item["result_json"] = decode_result(item, conn=conn, include_static=include_static)
+    for key in ("template_id", "profile_blob", "result_blob"):
+        item.pop(key, None)
+    return item
+
+
+def configure_assessment_writes(durability: str, max_queue: int = 10000, batch_size: int = 200) -> None:
+    """Select synchronous per-request commits ("sync") or write-behind batching ("async")."""
+    if (durability or "sync").strip().lower() == "async":
+        start_writer(insert_assessment_rows, max_queue=max_queue, batch_size=batch_size)
+    else:
+        stop_writer()
+        replay_dead_letters(insert_assessment_rows)
+
+
+def flush_assessment_writes() -> None:
+    writer = get_writer()
+    if writer is not None:
+        writer.flush()
+
+
+def get_assessment_write_stats() -> dict:
+    writer = get_writer()
+    if writer is None:
+        return {"durability": "sync"}
+    return {"durability": "async", **writer.stats()}
+
+
+def save_assessment(profile: dict, result: dict, patient_name: str, user_id: int | None = None) -> None:
+    row = build_assessment_row(profile, result, patient_name, user_id=user_id)
+
+    writer = get_writer()
+    if writer is not None:
+        writer.submit(row)
+        return
+
     conn = get_connection()
-    conn.execute(
-        """
-        INSERT INTO assessments (
-            created_at, user_id, patient_name, age, gender, bmi, symptoms,
-            thyroid_risk, diabetes_risk, pcos_risk, adrenal_risk, metabolic_risk,
-            risk_score, profile_json, result_json
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            datetime.utcnow().isoformat(timespec="seconds") + "Z",
-            user_id,
-            patient_name,
-            profile.get("Age"),
-            profile.get("Gender"),
-            profile.get("BMI"),
-            symptoms_text,
-            risk_scores.get("thyroid"),
-            risk_scores.get("diabetes"),
-            risk_scores.get("pcos"),
-            risk_scores.get("adrenal"),
-            risk_scores.get("metabolic"),
-            avg_score,
-            json.dumps(profile),
-            json.dumps(result),
-        ),
-    )
+    insert_assessment_rows(conn, [row])
     conn.commit()
+    refresh_score_index(conn)
     conn.close()
 
 
@@ -56,7 +113,7 @@ def get_dashboard_assessments(limit: int | None = None):
     query = (
         "SELECT id, created_at, user_id, patient_name, age, gender, bmi, symptoms, "
         "thyroid_risk, diabetes_risk, pcos_risk, adrenal_risk, metabolic_risk, "
-        "risk_score, result_json FROM assessments ORDER BY id DESC"
+        "risk_score, result_json, result_blob FROM assessments ORDER BY id DESC"
     )
     if limit is not None:
         query += f" LIMIT {int(limit)}"
@@ -65,33 +122,113 @@ def get_dashboard_assessments(limit: int | None = None):
     return rows
 
 
-def get_all_assessments_json():
+def get_all_assessments_json(include_archive: bool = False):
     conn = get_connection()
-    rows = conn.execute("SELECT * FROM assessments ORDER BY id DESC").fetchall()
+    rows = [dict(r) for r in conn.execute("SELECT * FROM assessments ORDER BY id DESC").fetchall()]
+    if include_archive:
+        rows.extend(iter_archive_rows(conn, "SELECT * FROM {table} ORDER BY id DESC"))
+    load_templates(conn, {row.get("template_id") for row in rows})
+    out = [rehydrate_assessment(row, conn=conn) for row in rows]
     conn.close()
-
-    out = []
-    for row in rows:
-        item = dict(row)
-        for key in ["profile_json", "result_json"]:
-            if item.get(key):
-                item[key] = json.loads(item[key])
-        out.append(item)
     return out
 
 
-def get_all_assessment_rows():
+EXPORT_COLUMNS_SQL = """
+    SELECT id, created_at, user_id, patient_name, age, gender, bmi, symptoms,
+           thyroid_risk, diabetes_risk, pcos_risk, adrenal_risk, metabolic_risk, risk_score
+    FROM {table}
+    ORDER BY id DESC
+"""
+
+
+def get_all_assessment_rows(include_archive: bool = False):
     conn = get_connection()
-    rows = conn.execute(
-        """
-        SELECT id, created_at, user_id, patient_name, age, gender, bmi, symptoms,
-               thyroid_risk, diabetes_risk, pcos_risk, adrenal_risk, metabolic_risk, risk_score
-        FROM assessments
-        ORDER BY id DESC
-        """
-    ).fetchall()
+    rows = [dict(r) for r in conn.execute(EXPORT_COLUMNS_SQL.format(table="assessments")).fetchall()]
+    if include_archive:
+        rows.extend(iter_archive_rows(conn, EXPORT_COLUMNS_SQL))
     conn.close()
-    return [dict(r) for r in rows]
+    return rows
+
+
+RISK_DOMAINS = ("thyroid", "diabetes", "pcos", "adrenal", "metabolic")
+
+
+def _fts_query(text: str) -> str:
+    # Quote each token so user input can never be parsed as FTS5 syntax; trailing * allows prefix matches.
+    tokens = re.findall(r"\w+", text or "")
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_assessments(
+    query: str,
+    domain: str | None = None,
+    min_risk: int | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    page: int = 1,
+    per_page: int = 25,
+    sort: str = "relevance",
+) -> dict:
+    """Full-text search over patient name, symptoms and key triggers.
+
+    sort="relevance" orders by bm25, which scores every match; sort="recent" streams matches
+    newest-first from the index and stays fast even for terms that match most rows.
+    """
+    if sort not in ("relevance", "recent"):
+        raise ValueError("sort must be relevance or recent")
+    if domain and domain not in RISK_DOMAINS:
+        raise ValueError(f"domain must be one of: {', '.join(RISK_DOMAINS)}")
+    if min_risk is not None and not domain:
+        raise ValueError("min_risk requires domain")
+
+    page = max(1, int(page))
+    per_page = max(1, min(100, int(per_page)))
+    match = _fts_query(query)
+
+    where: list[str] = []
+    params: list = []
+    if match:
+        source = "assessments_fts JOIN assessments a ON a.id = assessments_fts.rowid"
+        select_extra = (
+            "bm25(assessments_fts) AS rank, "
+            "snippet(assessments_fts, -1, '[', ']', '...', 8) AS snippet"
+        )
+        where.append("assessments_fts MATCH ?")
+        params.append(match)
+        order = "rank, a.id DESC" if sort == "relevance" else "assessments_fts.rowid DESC"
+    else:
+        source = "assessments a"
+        select_extra = "NULL AS rank, NULL AS snippet"
+        order = "a.id DESC"
+
+    if domain and min_risk is not None:
+        where.append(f"CAST(replace(a.{domain}_risk, '%', '') AS INTEGER) >= ?")
+        params.append(int(min_risk))
+    if date_from:
+        where.append("a.created_at >= ?")
+        params.append(date_from)
+    if date_to:
+        where.append("a.created_at < ?")
+        params.append(date_to)
+
+    sql = (
+        "SELECT a.id, a.created_at, a.user_id, a.patient_name, a.age, a.gender, a.bmi, a.symptoms, a.key_triggers, "
+        "a.thyroid_risk, a.diabetes_risk, a.pcos_risk, a.adrenal_risk, a.metabolic_risk, a.risk_score, "
+        f"{select_extra} FROM {source}"
+        + (" WHERE " + " AND ".join(where) if where else "")
+        + f" ORDER BY {order} LIMIT ? OFFSET ?"
+    )
+    params.extend([per_page + 1, (page - 1) * per_page])
+
+    conn = get_connection()
+    rows = [dict(r) for r in conn.execute(sql, params).fetchall()]
+    conn.close()
+    return {
+        "results": rows[:per_page],
+        "page": page,
+        "per_page": per_page,
+        "has_more": len(rows) > per_page,
+    }
 
 
 def get_user_assessments(user_id: int, limit: int = 50) -> list[dict]:
@@ -0,0 +1,242 @@
+import atexit
+import base64
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Sequence
+
+from . import db
+from .db import get_connection
+
+logger = logging.getLogger(__name__)
+
+InsertRows = Callable[[object, Sequence[dict]], None]
+
+
+def dead_letter_dir() -> Path:
+    return db.DB_PATH.parent / "dead_letter"
+
+
+def _encode(value):
+    return {"$b64": base64.b64encode(value).decode("ascii")} if isinstance(value, (bytes, bytearray)) else value
+
+
+def _decode(value):
+    return base64.b64decode(value["$b64"]) if isinstance(value, dict) and "$b64" in value else value
+
+
+class AssessmentWriter:
+    """Write-behind queue that group-commits assessment rows from a background thread."""
+
+    def __init__(
+        self,
+        insert_rows: InsertRows,
+        max_queue: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 0.05,
+        put_timeout: float = 0.5,
+    ) -> None:
+        self._insert_rows = insert_rows
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._batch_size = max(1, int(batch_size))
+        self._flush_interval = flush_interval
+        self._put_timeout = put_timeout
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "batches_committed": 0,
+            "rows_committed": 0,
+            "rows_written_inline": 0,
+            "failed_batches": 0,
+            "rows_spilled": 0,
+            "rows_replayed": 0,
+            "rows_lost": 0,
+            "last_batch_size": 0,
+            "last_commit_ms": 0.0,
+            "max_commit_ms": 0.0,
+            "total_commit_ms": 0.0,
+            "max_queue_depth": 0,
+        }
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        replayed = replay_dead_letters(self._insert_rows)
+        with self._lock:
+            self._stats["rows_replayed"] += replayed
+        self._thread = threading.Thread(target=self._run, name="assessment-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, row: dict) -> None:
+        try:
+            self._queue.put(row, timeout=self._put_timeout)
+        except queue.Full:
+            # Apply backpressure by writing inline rather than dropping the row.
+            self._commit([row])
+            with self._lock:
+                self._stats["rows_written_inline"] += 1
+            return
+        depth = self._queue.qsize()
+        with self._lock:
+            if depth > self._stats["max_queue_depth"]:
+                self._stats["max_queue_depth"] = depth
+
+    def flush(self) -> None:
+        if not self._thread or not self._thread.is_alive():
+            self._drain()
+            return
+        self._queue.join()
+
+    def close(self) -> None:
+        self.flush()
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
+        self._drain()
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+        batches = out["batches_committed"]
+        out["avg_commit_ms"] = round(out.pop("total_commit_ms") / batches, 3) if batches else 0.0
+        out["queue_depth"] = self._queue.qsize()
+        out["queue_capacity"] = self._queue.maxsize
+        out["batch_size"] = self._batch_size
+        out["running"] = bool(self._thread and self._thread.is_alive())
+        return out
+
+    def _next_batch(self, block: bool) -> list[dict]:
+        batch: list[dict] = []
+        try:
+            batch.append(self._queue.get(timeout=self._flush_interval) if block else self._queue.get_nowait())
+        except queue.Empty:
+            return batch
+        while len(batch) < self._batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._next_batch(block=True)
+            if batch:
+                self._commit_and_ack(batch)
+
+    def _drain(self) -> None:
+        while True:
+            batch = self._next_batch(block=False)
+            if not batch:
+                return
+            self._commit_and_ack(batch)
+
+    def _commit_and_ack(self, batch: list[dict]) -> None:
+        try:
+            self._commit(batch)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _commit(self, batch: list[dict]) -> None:
+        for attempt in range(3):
+            started = time.perf_counter()
+            try:
+                conn = get_connection()
+                try:
+                    self._insert_rows(conn, batch)
+                    conn.commit()
+                finally:
+                    conn.close()
+            except Exception:
+                logger.exception("Assessment batch commit failed (attempt %d)", attempt + 1)
+                with self._lock:
+                    self._stats["failed_batches"] += 1
+                time.sleep(0.05 * (attempt + 1))
+                continue
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._stats["batches_committed"] += 1
+                self._stats["rows_committed"] += len(batch)
+                self._stats["last_batch_size"] = len(batch)
+                self._stats["last_commit_ms"] = round(elapsed_ms, 3)
+                self._stats["max_commit_ms"] = round(max(self._stats["max_commit_ms"], elapsed_ms), 3)
+                self._stats["total_commit_ms"] += elapsed_ms
+            return
+
+        self._spill(batch)
+
+    def _spill(self, batch: list[dict]) -> None:
+        """Keep a batch that could not be committed in a dead-letter file, replayed on the next start."""
+        folder = dead_letter_dir()
+        path = folder / f"assessments-{datetime.utcnow():%Y%m%dT%H%M%S%f}.jsonl"
+        try:
+            folder.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                for row in batch:
+                    f.write(json.dumps({k: _encode(v) for k, v in row.items()}) + "\n")
+            tmp.replace(path)
+        except OSError:
+            logger.critical("Could not spill %d assessment rows to %s", len(batch), folder, exc_info=True)
+            with self._lock:
+                self._stats["rows_lost"] += len(batch)
+            return
+        with self._lock:
+            self._stats["rows_spilled"] += len(batch)
+        logger.error("Spilled %d assessment rows to %s after repeated commit failures", len(batch), path)
+
+
+def replay_dead_letters(insert_rows: InsertRows) -> int:
+    """Insert rows from dead-letter files; each file is removed once its rows are committed."""
+    folder = dead_letter_dir()
+    replayed = 0
+    for path in sorted(folder.glob("assessments-*.jsonl")) if folder.exists() else []:
+        with open(path, "r", encoding="utf-8") as f:
+            rows = [{k: _decode(v) for k, v in json.loads(line).items()} for line in f if line.strip()]
+        try:
+            conn = get_connection()
+            try:
+                insert_rows(conn, rows)
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception:
+            logger.exception("Replaying %s failed; it is kept for the next attempt", path)
+            break
+        path.unlink()
+        replayed += len(rows)
+    if replayed:
+        logger.info("Replayed %d dead-letter assessment rows", replayed)
+    return replayed
+
+
+_writer: AssessmentWriter | None = None
+
+
+def get_writer() -> AssessmentWriter | None:
+    return _writer
+
+
+def start_writer(insert_rows: InsertRows, max_queue: int, batch_size: int) -> AssessmentWriter:
+    global _writer
+    if _writer is None:
+        _writer = AssessmentWriter(insert_rows, max_queue=max_queue, batch_size=batch_size)
+        atexit.register(stop_writer)
+    _writer.start()
+    return _writer
+
+
+def stop_writer() -> None:
+    global _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
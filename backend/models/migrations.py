@@ -0,0 +1,506 @@
+"""Versioned schema migrations.
+
+Apply pending migrations explicitly:
+
+    python scripts/migrate.py           # migrate + ensure default admin
+    python scripts/migrate.py --status  # show current/latest version
+
+App startup only runs check_schema(), a single version lookup.
+"""
+import os
+import sqlite3
+from datetime import datetime
+from typing import Callable
+
+from werkzeug.security import generate_password_hash
+
+from . import db
+from .archive_model import archive_files
+from .db import get_connection
+from .result_codec import decode_result
+
+
+class SchemaOutOfDateError(RuntimeError):
+    pass
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    return {row["name"] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+
+
+def _add_columns(conn: sqlite3.Connection, table: str, columns: list[tuple[str, str]]) -> None:
+    existing = _columns(conn, table)
+    for name, kind in columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {kind}")
+
+
+def _0001_baseline(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS assessments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at TEXT NOT NULL,
+            user_id INTEGER,
+            patient_name TEXT,
+            age INTEGER,
+            gender TEXT,
+            bmi REAL,
+            symptoms TEXT,
+            thyroid_risk TEXT,
+            diabetes_risk TEXT,
+            pcos_risk TEXT,
+            adrenal_risk TEXT,
+            metabolic_risk TEXT,
+            risk_score REAL,
+            profile_json TEXT,
+            result_json TEXT
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL UNIQUE,
+            password_hash TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS admin_users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password_hash TEXT NOT NULL
+        )
+        """
+    )
+    # Local DB files created before these columns existed.
+    _add_columns(conn, "assessments", [("user_id", "INTEGER"), ("symptoms", "TEXT"), ("risk_score", "REAL")])
+
+
+def _0002_compact_payloads(conn: sqlite3.Connection) -> None:
+    _add_columns(conn, "assessments", [("template_id", "TEXT"), ("profile_blob", "BLOB"), ("result_blob", "BLOB")])
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS result_templates (
+            id TEXT PRIMARY KEY,
+            body TEXT NOT NULL
+        )
+        """
+    )
+
+
+def _0003_created_at_index(conn: sqlite3.Connection) -> None:
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_assessments_created_at ON assessments(created_at)")
+
+
+def _0004_search_index(conn: sqlite3.Connection) -> None:
+    """External-content FTS5 index over assessments, kept in sync by triggers."""
+    _add_columns(conn, "assessments", [("key_triggers", "TEXT")])
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='assessments_fts'"
+    ).fetchone()
+    statements = [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS assessments_fts USING fts5(
+            patient_name, symptoms, key_triggers,
+            content='assessments', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS assessments_fts_ai AFTER INSERT ON assessments BEGIN
+            INSERT INTO assessments_fts(rowid, patient_name, symptoms, key_triggers)
+            VALUES (new.id, new.patient_name, new.symptoms, new.key_triggers);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS assessments_fts_ad AFTER DELETE ON assessments BEGIN
+            INSERT INTO assessments_fts(assessments_fts, rowid, patient_name, symptoms, key_triggers)
+            VALUES ('delete', old.id, old.patient_name, old.symptoms, old.key_triggers);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS assessments_fts_au AFTER UPDATE OF patient_name, symptoms, key_triggers
+        ON assessments BEGIN
+            INSERT INTO assessments_fts(assessments_fts, rowid, patient_name, symptoms, key_triggers)
+            VALUES ('delete', old.id, old.patient_name, old.symptoms, old.key_triggers);
+            INSERT INTO assessments_fts(rowid, patient_name, symptoms, key_triggers)
+            VALUES (new.id, new.patient_name, new.symptoms, new.key_triggers);
+        END
+        """,
+    ]
+    for statement in statements:
+        conn.execute(statement)
+    if not exists:
+        conn.execute("INSERT INTO assessments_fts(assessments_fts) VALUES ('rebuild')")
+
+
+def _0005_user_history_index(conn: sqlite3.Connection) -> None:
+    """Per-user history reads (dashboard, sequence model) in id order without a sort."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_assessments_user ON assessments(user_id, id)")
+
+
+ROLLUP_DOMAINS = ["thyroid", "diabetes", "pcos", "adrenal", "metabolic"]
+HIGH_RISK_SCORE = 65
+# Assessment columns the rollups and score histograms read besides created_at.
+ROLLUP_SOURCE_COLUMNS = (
+    [("age", "INTEGER"), ("gender", "TEXT"), ("bmi", "REAL")]
+    + [(f"{d}_risk", "TEXT") for d in ROLLUP_DOMAINS]
+    + [("risk_score", "REAL")]
+)
+# Period each rollup granularity files a day under; weeks start on Monday.
+ROLLUP_PERIODS = {
+    "day": "{day}",
+    "week": "date({day}, '-' || ((CAST(strftime('%w', {day}) AS INTEGER) + 6) % 7) || ' days')",
+    "month": "substr({day}, 1, 7)",
+    "year": "substr({day}, 1, 4)",
+}
+
+
+def rollup_keys(row: str) -> list[str]:
+    """SQL for (day, gender, age band, BMI band) of an assessments row referenced as `row`."""
+    return [
+        f"substr({row}.created_at, 1, 10)",
+        f"COALESCE(NULLIF(TRIM({row}.gender), ''), 'Unknown')",
+        f"""CASE WHEN {row}.age IS NULL THEN 'Unknown' WHEN {row}.age < 18 THEN '<18'
+            WHEN {row}.age < 30 THEN '18-29' WHEN {row}.age < 40 THEN '30-39'
+            WHEN {row}.age < 50 THEN '40-49' WHEN {row}.age < 60 THEN '50-59' ELSE '60+' END""",
+        f"""CASE WHEN {row}.bmi IS NULL THEN 'Unknown' WHEN {row}.bmi < 18.5 THEN 'Underweight'
+            WHEN {row}.bmi < 25 THEN 'Normal' WHEN {row}.bmi < 30 THEN 'Overweight' ELSE 'Obese' END""",
+    ]
+
+
+def rollup_score(row: str, domain: str) -> str:
+    """A stored "72%" score as an integer; missing or unparseable scores count as 0, as on the dashboard."""
+    return f"CAST(REPLACE(COALESCE({row}.{domain}_risk, ''), '%', '') AS INTEGER)"
+
+
+ROLLUP_KEYS = ["granularity", "period", "gender", "age_band", "bmi_band"]
+ROLLUP_TOTALS = (
+    ["assessments"]
+    + [f"{d}_sum" for d in ROLLUP_DOMAINS]
+    + [f"{d}_high" for d in ROLLUP_DOMAINS]
+    + ["risk_score_sum"]
+)
+ROLLUP_UPSERT_SQL = f"""
+    INSERT INTO assessment_rollups ({", ".join(ROLLUP_KEYS + ROLLUP_TOTALS)})
+    VALUES ({", ".join("?" for _ in ROLLUP_KEYS + ROLLUP_TOTALS)})
+    ON CONFLICT (granularity, period, gender, age_band, bmi_band)
+    DO UPDATE SET {", ".join(f"{c} = {c} + excluded.{c}" for c in ROLLUP_TOTALS)}
+"""
+
+
+def archived_rows(select: Callable[[str], str]) -> list[tuple]:
+    """Rows of select(table) run against the assessments table of every archive file.
+
+    Each file is opened read-only on its own connection, since migrations run inside a transaction,
+    where ATTACH is not allowed. Archive files are never altered here, so a migration that fails
+    halfway leaves them as they were and can simply be rerun. Columns a file was archived without
+    read as NULL; archive_assessments adds them when it next writes to the file.
+    """
+    rows: list[tuple] = []
+    for path in archive_files():
+        conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        try:
+            existing = _columns(conn, "assessments")
+            missing = [f"NULL AS {name}" for name, _ in ROLLUP_SOURCE_COLUMNS if name not in existing]
+            table = f"(SELECT *, {', '.join(missing)} FROM assessments)" if missing else "assessments"
+            rows.extend(tuple(r) for r in conn.execute(select(table)))
+        finally:
+            conn.close()
+    return rows
+
+
+def rollup_day_select(table: str) -> str:
+    """Day-level rollup rows (in ROLLUP_KEYS + ROLLUP_TOTALS order) aggregated from an assessments table."""
+    return f"""
+        SELECT 'day', {", ".join(rollup_keys("a"))}, COUNT(*),
+            {", ".join(f"SUM({rollup_score('a', d)})" for d in ROLLUP_DOMAINS)},
+            {", ".join(f"SUM({rollup_score('a', d)} >= {HIGH_RISK_SCORE})" for d in ROLLUP_DOMAINS)},
+            COALESCE(SUM(a.risk_score), 0)
+        FROM {table} AS a
+        GROUP BY 2, 3, 4, 5
+    """
+
+
+def derive_coarse_rollups(conn: sqlite3.Connection) -> None:
+    """Recompute the week, month and year rollups from the day rollups."""
+    conn.execute("DELETE FROM assessment_rollups WHERE granularity <> 'day'")
+    for granularity, period in ROLLUP_PERIODS.items():
+        if granularity == "day":
+            continue
+        conn.execute(
+            f"""
+            INSERT INTO assessment_rollups ({", ".join(ROLLUP_KEYS + ROLLUP_TOTALS)})
+            SELECT '{granularity}', {period.format(day="period")} AS p, gender, age_band, bmi_band,
+                {", ".join(f"SUM({c})" for c in ROLLUP_TOTALS)}
+            FROM assessment_rollups WHERE granularity = 'day'
+            GROUP BY p, gender, age_band, bmi_band
+            """
+        )
+
+
+def _0006_assessment_rollups(conn: sqlite3.Connection) -> None:
+    """Cohort totals per day, week, month and year, upserted by an insert trigger.
+
+    The backfill covers assessments and the archive files. Rows archived later keep their
+    contribution, so the rollups cover the full history.
+    """
+    # Local DB files created before the columns the rollups read existed.
+    _add_columns(conn, "assessments", ROLLUP_SOURCE_COLUMNS)
+    totals = ",\n".join(f"{c} {'REAL' if c == 'risk_score_sum' else 'INTEGER'} NOT NULL DEFAULT 0" for c in ROLLUP_TOTALS)
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS assessment_rollups (
+            granularity TEXT NOT NULL,
+            period TEXT NOT NULL,
+            gender TEXT NOT NULL,
+            age_band TEXT NOT NULL,
+            bmi_band TEXT NOT NULL,
+            {totals},
+            PRIMARY KEY (granularity, period, gender, age_band, bmi_band)
+        ) WITHOUT ROWID
+        """
+    )
+    columns = ", ".join(ROLLUP_KEYS + ROLLUP_TOTALS)
+    conn.execute("DELETE FROM assessment_rollups")
+    conn.execute(f"INSERT INTO assessment_rollups ({columns}) {rollup_day_select('assessments')}")
+    conn.executemany(ROLLUP_UPSERT_SQL, archived_rows(rollup_day_select))
+    derive_coarse_rollups(conn)
+
+    day, *cohort = rollup_keys("new")
+    values = ", ".join(
+        cohort
+        + ["1"]
+        + [rollup_score("new", d) for d in ROLLUP_DOMAINS]
+        + [f"{rollup_score('new', d)} >= {HIGH_RISK_SCORE}" for d in ROLLUP_DOMAINS]
+        + ["COALESCE(new.risk_score, 0)"]
+    )
+    updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in ROLLUP_TOTALS)
+    upserts = "".join(
+        f"""
+            INSERT INTO assessment_rollups ({columns})
+            VALUES ('{granularity}', {period.format(day=day)}, {values})
+            ON CONFLICT (granularity, period, gender, age_band, bmi_band) DO UPDATE SET {updates};"""
+        for granularity, period in ROLLUP_PERIODS.items()
+    )
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS assessment_rollups_ai AFTER INSERT ON assessments BEGIN{upserts}\n        END")
+
+
+# Score histograms are kept per day and per month; a range reads whole months plus edge days.
+HISTOGRAM_PERIODS = {"day": ROLLUP_PERIODS["day"], "month": ROLLUP_PERIODS["month"]}
+
+
+def score_bin(row: str, domain: str) -> str:
+    """A stored "72%" score rounded and clamped to a whole percent, 0-100."""
+    return f"MIN(MAX(CAST(ROUND(CAST(REPLACE({row}.{domain}_risk, '%', '') AS REAL)) AS INTEGER), 0), 100)"
+
+
+def score_present(row: str, domain: str) -> str:
+    return f"TRIM(REPLACE(COALESCE({row}.{domain}_risk, ''), '%', '')) <> ''"
+
+
+def score_histogram_day_select(table: str) -> str:
+    """Day-level (granularity, period, domain, score, count) rows aggregated from an assessments table."""
+    return " UNION ALL ".join(
+        f"""
+        SELECT 'day', substr(a.created_at, 1, 10), '{d}', {score_bin("a", d)}, COUNT(*)
+        FROM {table} AS a WHERE {score_present("a", d)}
+        GROUP BY 2, 4
+        """
+        for d in ROLLUP_DOMAINS
+    )
+
+
+SCORE_HISTOGRAM_UPSERT_SQL = """
+    INSERT INTO score_histograms (granularity, period, domain, score, count) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (granularity, period, domain, score) DO UPDATE SET count = count + excluded.count
+"""
+
+
+def derive_monthly_score_histograms(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM score_histograms WHERE granularity = 'month'")
+    conn.execute(
+        f"""
+        INSERT INTO score_histograms (granularity, period, domain, score, count)
+        SELECT 'month', {HISTOGRAM_PERIODS["month"].format(day="period")} AS p, domain, score, SUM(count)
+        FROM score_histograms WHERE granularity = 'day'
+        GROUP BY p, domain, score
+        """
+    )
+
+
+def _0007_score_histograms(conn: sqlite3.Connection) -> None:
+    """Counts per whole-percent score for each domain, per day and per month, kept by an insert trigger.
+
+    Like the rollups, the backfill covers assessments and the archive files.
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS score_histograms (
+            granularity TEXT NOT NULL,
+            period TEXT NOT NULL,
+            domain TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (granularity, period, domain, score)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute("DELETE FROM score_histograms")
+    conn.execute(
+        "INSERT INTO score_histograms (granularity, period, domain, score, count) "
+        + score_histogram_day_select("assessments")
+    )
+    conn.executemany(SCORE_HISTOGRAM_UPSERT_SQL, archived_rows(score_histogram_day_select))
+    derive_monthly_score_histograms(conn)
+
+    day = rollup_keys("new")[0]
+    upserts = "".join(
+        f"""
+            INSERT INTO score_histograms (granularity, period, domain, score, count)
+            SELECT '{granularity}', {period.format(day=day)}, '{d}', {score_bin("new", d)}, 1
+            WHERE {score_present("new", d)}
+            ON CONFLICT (granularity, period, domain, score) DO UPDATE SET count = count + 1;"""
+        for granularity, period in HISTOGRAM_PERIODS.items()
+        for d in ROLLUP_DOMAINS
+    )
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS score_histograms_ai AFTER INSERT ON assessments BEGIN{upserts}\n        END")
+
+
+def _0008_backfill_key_triggers(conn: sqlite3.Connection) -> None:
+    """Fill key_triggers (added by 0004) for rows saved before it, so search finds them by trigger."""
+    _add_columns(conn, "assessments", [("result_json", "TEXT"), ("template_id", "TEXT"), ("result_blob", "BLOB")])
+    after, updated = 0, 0
+    while True:
+        rows = conn.execute(
+            """
+            SELECT id, result_json, template_id, result_blob FROM assessments
+            WHERE id > ? AND key_triggers IS NULL ORDER BY id LIMIT 1000
+            """,
+            (after,),
+        ).fetchall()
+        if not rows:
+            break
+        values = []
+        for row in rows:
+            try:
+                result = decode_result(dict(row), include_static=False)
+            except Exception:  # unreadable legacy payload: stays unsearchable by trigger
+                result = {}
+            triggers = result.get("key_triggers") if isinstance(result, dict) else None
+            if isinstance(triggers, str):
+                triggers = [triggers]
+            triggers = triggers or []
+            values.append((", ".join(str(t) for t in triggers), row["id"]))
+        conn.executemany("UPDATE assessments SET key_triggers = ? WHERE id = ?", values)
+        updated += len(values)
+        after = rows[-1]["id"]
+    if updated:
+        conn.execute("INSERT INTO assessments_fts(assessments_fts) VALUES ('rebuild')")
+
+
+# Ordered and append-only: never renumber or edit a migration that has shipped.
+MIGRATIONS: list[tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "baseline tables", _0001_baseline),
+    (2, "compact assessment payloads", _0002_compact_payloads),
+    (3, "created_at index", _0003_created_at_index),
+    (4, "full-text search index", _0004_search_index),
+    (5, "user history index", _0005_user_history_index),
+    (6, "assessment rollups", _0006_assessment_rollups),
+    (7, "score histograms", _0007_score_histograms),
+    (8, "backfill search triggers", _0008_backfill_key_triggers),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return int(row[0] or 0)
+
+
+def migrate(target: int | None = None) -> list[int]:
+    """Apply pending migrations up to target (default: latest). Returns the versions applied."""
+    db.DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    target = LATEST_VERSION if target is None else int(target)
+    conn = get_connection()
+    conn.isolation_level = None
+    applied: list[int] = []
+    try:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TEXT NOT NULL
+            )
+            """
+        )
+        done = current_version(conn)
+        for version, name, step in MIGRATIONS:
+            if version <= done or version > target:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                step(conn)
+                conn.execute(
+                    "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                    (version, name, datetime.utcnow().isoformat(timespec="seconds") + "Z"),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            applied.append(version)
+    finally:
+        conn.close()
+    return applied
+
+
+def ensure_default_admin(username: str | None = None, password: str | None = None) -> bool:
+    """Create the configured admin account if it does not exist yet. Returns True when created."""
+    username = (username or os.getenv("ADMIN_USERNAME", "admin")).strip()
+    password = (password or os.getenv("ADMIN_PASSWORD", "admin123")).strip()
+    conn = get_connection()
+    row = conn.execute("SELECT id FROM admin_users WHERE lower(username)=lower(?)", (username,)).fetchone()
+    if not row:
+        conn.execute(
+            "INSERT INTO admin_users (username, password_hash) VALUES (?, ?)",
+            (username, generate_password_hash(password)),
+        )
+        conn.commit()
+    conn.close()
+    return not row
+
+
+def init_db() -> None:
+    migrate()
+    ensure_default_admin()
+
+
+def check_schema() -> int:
+    """Single version lookup used at app startup; raises if migrations are pending."""
+    if not db.DB_PATH.exists():
+        raise SchemaOutOfDateError(
+            f"Database {db.DB_PATH} does not exist. Run: python scripts/migrate.py"
+        )
+    conn = get_connection()
+    try:
+        version = current_version(conn)
+    finally:
+        conn.close()
+    if version < LATEST_VERSION:
+        raise SchemaOutOfDateError(
+            f"Database schema is at version {version}, expected {LATEST_VERSION}. "
+            "Run: python scripts/migrate.py"
+        )
+    return version
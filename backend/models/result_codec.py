@@ -0,0 +1,124 @@
+import hashlib
+import json
+import zlib
+from typing import Any, Dict, Tuple
+
+# Keys of calculate_risk output that are boilerplate shared by many assessments.
+STATIC_RESULT_KEYS = ("explanation", "recommended_actions", "suggested_tests")
+
+# Profile keys already persisted in typed assessment columns; omitted from the blob when they round-trip.
+COLUMN_BACKED_PROFILE_KEYS = {"Age": ("age", int), "Gender": ("gender", str), "BMI": ("bmi", float)}
+
+FORMAT_ZLIB_V1 = 1
+
+# Preset dictionary for FORMAT_ZLIB_V1. It is part of the on-disk format: never edit it in place,
+# add a new format byte and dictionary instead.
+ZDICT_V1 = (
+    b'{"Sleep quality": "Poor", "Stress level": "High", "Exercise frequency": "Low", '
+    b'"Diet type": "High sugar", "Family history": "Diabetes", "Symptoms": ["Fatigue", "Weight gain", '
+    b'"Irregular cycles", "Acne", "Hair loss", "Sugar cravings"], "Lab results (optional)": {"TSH": '
+    b'"T3": "T4": "HbA1c": "Insulin": "Cortisol": "Cholesterol": "Fasting glucose": null}, '
+    b'"Average", "Good", "Moderate", "Regular", "Daily", "Balanced", "Processed", "High protein", '
+    b'"Thyroid", "PCOS", "Female", "Male", '
+    b'"key_triggers": ["High BMI", "Overweight BMI", "Poor sleep", "High stress", "Low physical activity", '
+    b'"Unhealthy diet pattern", "Family history of diabetes", "Family history of thyroid disorder", '
+    b'"Family history of PCOS", "PCOS symptom pattern", "Abnormal TSH", "Diabetic-range HbA1c", '
+    b'"Prediabetic HbA1c", "High fasting glucose", "Elevated insulin", "Abnormal cortisol", '
+    b'"High cholesterol", "Poor sleep + high stress correlation", "High BMI + family history correlation", '
+    b'"Irregular cycles + insulin issue correlation"], '
+    b'"prediction_source": "ml_model", "prediction_source": "rule_engine", "ai_enabled": false, '
+    b'"risk_level": {"thyroid": "Low", "diabetes": "Moderate", "pcos": "High", "adrenal": "Low", '
+    b'"metabolic": "Moderate"}, "risk_scores": {"thyroid": "20%", "diabetes": "45%", "pcos": "0%", '
+    b'"adrenal": "38%", "metabolic": "65%"}'
+)
+
+_template_cache: Dict[str, Dict[str, Any]] = {}
+
+
+def _canonical(obj: Any) -> str:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"))
+
+
+def encode_payload(obj: Any) -> bytes:
+    comp = zlib.compressobj(level=9, zdict=ZDICT_V1)
+    raw = json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    return bytes([FORMAT_ZLIB_V1]) + comp.compress(raw) + comp.flush()
+
+
+def decode_payload(blob: bytes) -> Any:
+    if not blob:
+        return {}
+    fmt = blob[0]
+    if fmt != FORMAT_ZLIB_V1:
+        raise ValueError(f"Unknown payload format: {fmt}")
+    decomp = zlib.decompressobj(zdict=ZDICT_V1)
+    raw = decomp.decompress(blob[1:]) + decomp.flush()
+    return json.loads(raw.decode("utf-8"))
+
+
+def split_result(result: Dict[str, Any]) -> Tuple[str | None, str | None, Dict[str, Any]]:
+    """Return (template_id, template_body, dynamic_part) for an assessment result."""
+    static = {k: result[k] for k in STATIC_RESULT_KEYS if k in result}
+    dynamic = {k: v for k, v in result.items() if k not in static}
+    if not static:
+        return None, None, dynamic
+    body = _canonical(static)
+    template_id = hashlib.sha1(body.encode("utf-8")).hexdigest()[:16]
+    _template_cache.setdefault(template_id, static)
+    return template_id, body, dynamic
+
+
+def strip_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(profile)
+    for key, (_, kind) in COLUMN_BACKED_PROFILE_KEYS.items():
+        value = out.get(key)
+        if type(value) is kind:
+            out.pop(key)
+    return out
+
+
+def encode_assessment(profile: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    template_id, template_body, dynamic = split_result(result)
+    return {
+        "template_id": template_id,
+        "template_body": template_body,
+        "profile_blob": encode_payload(strip_profile(profile)),
+        "result_blob": encode_payload(dynamic),
+    }
+
+
+def load_templates(conn, template_ids) -> Dict[str, Dict[str, Any]]:
+    missing = sorted({t for t in template_ids if t and t not in _template_cache})
+    for start in range(0, len(missing), 500):
+        chunk = missing[start : start + 500]
+        placeholders = ", ".join("?" for _ in chunk)
+        rows = conn.execute(
+            f"SELECT id, body FROM result_templates WHERE id IN ({placeholders})", chunk
+        ).fetchall()
+        for row in rows:
+            _template_cache[row["id"]] = json.loads(row["body"])
+    return _template_cache
+
+
+def decode_profile(row: Dict[str, Any]) -> Dict[str, Any]:
+    if row.get("profile_blob") is None:
+        return json.loads(row["profile_json"]) if row.get("profile_json") else {}
+    rest = decode_payload(row["profile_blob"])
+    restored = {}
+    for key, (column, _) in COLUMN_BACKED_PROFILE_KEYS.items():
+        if key not in rest and row.get(column) is not None:
+            restored[key] = row[column]
+    return {**restored, **rest}
+
+
+def decode_result(row: Dict[str, Any], conn=None, include_static: bool = True) -> Dict[str, Any]:
+    """Rehydrate an assessment result; static template text is only loaded when include_static is set."""
+    if row.get("result_blob") is None:
+        return json.loads(row["result_json"]) if row.get("result_json") else {}
+    dynamic = decode_payload(row["result_blob"])
+    template_id = row.get("template_id")
+    if not include_static or not template_id:
+        return dynamic
+    if template_id not in _template_cache and conn is not None:
+        load_templates(conn, [template_id])
+    return {**dynamic, **_template_cache.get(template_id, {})}
@@ -0,0 +1,216 @@
+"""Time-bucketed cohort analytics over assessment_rollups (see migration 0006).
+
+The insert trigger keeps one row per (granularity, period, gender, age band, BMI band) for days,
+weeks, months and years. A range query reads the rows of the requested granularity for the
+periods it fully covers. A period cut by the range edges is filled from the next finer
+granularity, down to days. So a query reads a few hundred rows however many years it spans.
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Dict
+
+from .db import get_connection
+from .migrations import (
+    ROLLUP_DOMAINS,
+    ROLLUP_KEYS,
+    ROLLUP_PERIODS,
+    ROLLUP_TOTALS,
+    ROLLUP_UPSERT_SQL,
+    archived_rows,
+    derive_coarse_rollups,
+    rollup_day_select,
+)
+
+GRANULARITIES = list(ROLLUP_PERIODS)
+DIMENSIONS = ["gender", "age_band", "bmi_band"]
+FINER = {"year": "month", "month": "day", "week": "day"}
+
+
+def parse_day(value: str | None, name: str) -> date | None:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"{name} must be a date (YYYY-MM-DD)") from None
+
+
+def period_of(granularity: str, day: date) -> str:
+    if granularity == "week":
+        return (day - timedelta(days=day.weekday())).isoformat()
+    return {"day": day.isoformat(), "month": day.strftime("%Y-%m"), "year": day.strftime("%Y")}[granularity]
+
+
+def _period_start(granularity: str, day: date) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    if granularity == "year":
+        return day.replace(month=1, day=1)
+    return day
+
+
+def _period_end(granularity: str, day: date) -> date:
+    if granularity == "week":
+        return _period_start("week", day) + timedelta(days=6)
+    if granularity == "month":
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    if granularity == "year":
+        return day.replace(month=12, day=31)
+    return day
+
+
+def _first_day(period: str) -> date:
+    """First day of a stored period string ("2024", "2024-03" or "2024-03-04")."""
+    return date.fromisoformat((period + "-01-01")[:10])
+
+
+def range_segments(granularity: str, start: date | None, end: date | None) -> list[tuple[str, date | None, date | None]]:
+    """Cover [start, end] (open-ended when None) with whole `granularity` periods plus finer edges.
+
+    Returns (granularity, first day, last day) segments; each segment is whole periods of its
+    granularity, so it can be read as a range of stored period rows.
+    """
+    if granularity == "day":
+        return [("day", start, end)]
+    full_start = start if start is None or start == _period_start(granularity, start) else (
+        _period_end(granularity, start) + timedelta(days=1)
+    )
+    full_end = end if end is None or end == _period_end(granularity, end) else (
+        _period_start(granularity, end) - timedelta(days=1)
+    )
+    if full_start is not None and full_end is not None and full_start > full_end:
+        return range_segments(FINER[granularity], start, end)
+    segments = [(granularity, full_start, full_end)]
+    if start is not None and start < full_start:
+        segments += range_segments(FINER[granularity], start, full_start - timedelta(days=1))
+    if end is not None and end > full_end:
+        segments += range_segments(FINER[granularity], full_end + timedelta(days=1), end)
+    return segments
+
+
+def period_range(granularity: str, start: date | None, end: date | None) -> tuple[list[str], list[str]]:
+    """WHERE clauses and parameters selecting a segment's rows by their period column."""
+    where, params = [], []
+    if start is not None:
+        where.append("period >= ?")
+        params.append(period_of(granularity, start))
+    if end is not None:
+        where.append("period <= ?")
+        params.append(period_of(granularity, end))
+    return where, params
+
+
+class _Query:
+    def __init__(self, conn, target: str, group_by: list[str], filters: Dict[str, str]) -> None:
+        self.conn, self.target, self.group_by, self.filters = conn, target, group_by, filters
+        self.totals: Dict[tuple, list] = {}
+        self.rows_read = 0
+
+    def collect(self, start: date | None, end: date | None) -> None:
+        for granularity, first, last in range_segments(self.target, start, end):
+            self._read(granularity, first, last)
+
+    def _read(self, granularity: str, start: date | None, end: date | None) -> None:
+        where, params = period_range(granularity, start, end)
+        where.insert(0, "granularity = ?")
+        params.insert(0, granularity)
+        for name, value in self.filters.items():
+            where.append(f"{name} = ?")
+            params.append(value)
+        keys = ", ".join(["period"] + self.group_by)
+        rows = self.conn.execute(
+            f"""
+            SELECT {keys}, {", ".join(f"SUM({c})" for c in ROLLUP_TOTALS)}
+            FROM assessment_rollups WHERE {" AND ".join(where)}
+            GROUP BY {keys}
+            """,
+            params,
+        ).fetchall()
+        self.rows_read += len(rows)
+        width = 1 + len(self.group_by)
+        for row in rows:
+            period = row[0] if granularity == self.target else period_of(self.target, _first_day(row[0]))
+            key = (period, *row[1:width])
+            totals = self.totals.setdefault(key, [0] * len(ROLLUP_TOTALS))
+            for i, value in enumerate(row[width:]):
+                totals[i] += value or 0
+
+
+def _summary(totals: list) -> Dict[str, Any]:
+    row = dict(zip(ROLLUP_TOTALS, totals))
+    n = row["assessments"]
+    return {
+        "assessments": n,
+        "avg_scores": {d: round(row[f"{d}_sum"] / n, 1) if n else 0 for d in ROLLUP_DOMAINS},
+        "high_risk_counts": {d: row[f"{d}_high"] for d in ROLLUP_DOMAINS},
+        "avg_risk_score": round(row["risk_score_sum"] / n, 2) if n else 0,
+    }
+
+
+def cohort_series(
+    granularity: str = "day",
+    start: str | None = None,
+    end: str | None = None,
+    group_by: list[str] | None = None,
+    filters: Dict[str, str] | None = None,
+) -> Dict[str, Any]:
+    """Assessment counts, mean scores and High counts per period, optionally per cohort dimension."""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+    group_by = list(dict.fromkeys(group_by or []))
+    filters = {k: v for k, v in (filters or {}).items() if v}
+    for name in group_by + list(filters):
+        if name not in DIMENSIONS:
+            raise ValueError(f"cohort dimensions are: {', '.join(DIMENSIONS)}")
+    start_day, end_day = parse_day(start, "start"), parse_day(end, "end")
+
+    conn = get_connection()
+    try:
+        query = _Query(conn, granularity, group_by, filters)
+        if start_day is None or end_day is None or start_day <= end_day:
+            query.collect(start_day, end_day)
+    finally:
+        conn.close()
+
+    grand = [sum(t[i] for t in query.totals.values()) for i in range(len(ROLLUP_TOTALS))]
+    return {
+        "granularity": granularity,
+        "start": start_day and start_day.isoformat(),
+        "end": end_day and end_day.isoformat(),
+        "group_by": group_by,
+        "filters": filters,
+        "series": [
+            {"period": key[0], **dict(zip(group_by, key[1:])), **_summary(totals)}
+            for key, totals in sorted(query.totals.items())
+        ],
+        "totals": _summary(grand),
+        "rollup_rows_read": query.rows_read,
+    }
+
+
+def rebuild_rollups(include_archive: bool = True) -> Dict[str, int]:
+    """Recompute assessment_rollups from assessments and, by default, the archive files."""
+    conn = get_connection()
+    conn.isolation_level = None
+    try:
+        archived = archived_rows(rollup_day_select) if include_archive else []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM assessment_rollups")
+            conn.execute(
+                f"INSERT INTO assessment_rollups ({', '.join(ROLLUP_KEYS + ROLLUP_TOTALS)}) "
+                + rollup_day_select("main.assessments")
+            )
+            conn.executemany(ROLLUP_UPSERT_SQL, archived)
+            derive_coarse_rollups(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        rows, assessments = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(assessments), 0) FROM assessment_rollups WHERE granularity = 'day'"
+        ).fetchone()
+    finally:
+        conn.close()
+    return {"day_rows": rows, "assessments": assessments}
@@ -0,0 +1,129 @@
+"""Median, percentiles and histograms of domain scores over date ranges (see migration 0007).
+
+Scores are stored as whole percents, so a 101-bin count per domain is an exact, mergeable
+summary: merging the days and months of a range gives the same quantiles as sorting its rows.
+A range reads whole months plus the days at its edges, at most 101 rows per domain for each.
+"""
+import math
+from datetime import date
+from typing import Any, Dict
+
+from .db import get_connection
+from .migrations import (
+    ROLLUP_DOMAINS,
+    SCORE_HISTOGRAM_UPSERT_SQL,
+    archived_rows,
+    derive_monthly_score_histograms,
+    score_histogram_day_select,
+)
+from .rollup_model import parse_day, period_range, range_segments
+
+BINS = 101
+DEFAULT_QUANTILES = [0.5, 0.9]
+
+
+def histogram_quantile(counts: list[int], q: float) -> int | None:
+    """Nearest-rank quantile: the smallest score with at least ceil(q * n) scores at or below it."""
+    n = sum(counts)
+    if n == 0:
+        return None
+    rank = max(1, math.ceil(q * n))
+    seen = 0
+    for score, count in enumerate(counts):
+        seen += count
+        if seen >= rank:
+            return score
+    return len(counts) - 1
+
+
+def merged_counts(conn, start: date | None, end: date | None, domains: list[str]) -> Dict[str, list[int]]:
+    counts = {d: [0] * BINS for d in domains}
+    placeholders = ", ".join("?" for _ in domains)
+    for granularity, first, last in range_segments("month", start, end):
+        where, params = period_range(granularity, first, last)
+        rows = conn.execute(
+            f"""
+            SELECT domain, score, SUM(count) FROM score_histograms
+            WHERE granularity = ? AND domain IN ({placeholders}) {"".join(" AND " + w for w in where)}
+            GROUP BY domain, score
+            """,
+            [granularity, *domains, *params],
+        )
+        for domain, score, count in rows:
+            counts[domain][score] += count
+    return counts
+
+
+def score_distribution(
+    start: str | None = None,
+    end: str | None = None,
+    domains: list[str] | None = None,
+    quantiles: list[float] | None = None,
+    bin_width: int = 10,
+) -> Dict[str, Any]:
+    """Count, mean, quantiles and a bin_width-wide histogram of each domain's scores in [start, end]."""
+    domains = list(dict.fromkeys(domains or ROLLUP_DOMAINS))
+    unknown = [d for d in domains if d not in ROLLUP_DOMAINS]
+    if unknown:
+        raise ValueError(f"domain must be one of: {', '.join(ROLLUP_DOMAINS)}")
+    quantiles = DEFAULT_QUANTILES if quantiles is None else quantiles
+    if any(not 0 <= q <= 1 for q in quantiles):
+        raise ValueError("quantiles must be between 0 and 1")
+    if not 1 <= bin_width <= BINS:
+        raise ValueError(f"bin_width must be between 1 and {BINS}")
+    start_day, end_day = parse_day(start, "start"), parse_day(end, "end")
+
+    conn = get_connection()
+    try:
+        if start_day and end_day and start_day > end_day:
+            counts = {d: [0] * BINS for d in domains}
+        else:
+            counts = merged_counts(conn, start_day, end_day, domains)
+    finally:
+        conn.close()
+
+    result = {}
+    for domain, bins in counts.items():
+        n = sum(bins)
+        result[domain] = {
+            "count": n,
+            "mean": round(sum(s * c for s, c in enumerate(bins)) / n, 2) if n else None,
+            "quantiles": {f"p{round(q * 100, 1):g}": histogram_quantile(bins, q) for q in quantiles},
+            "histogram": [
+                {"from": lo, "to": min(lo + bin_width, BINS) - 1, "count": sum(bins[lo : lo + bin_width])}
+                for lo in range(0, BINS, bin_width)
+            ],
+        }
+    return {
+        "start": start_day and start_day.isoformat(),
+        "end": end_day and end_day.isoformat(),
+        "bin_width": bin_width,
+        "domains": result,
+    }
+
+
+def rebuild_score_histograms(include_archive: bool = True) -> Dict[str, int]:
+    """Recompute score_histograms from assessments and, by default, the archive files."""
+    conn = get_connection()
+    conn.isolation_level = None
+    try:
+        archived = archived_rows(score_histogram_day_select) if include_archive else []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM score_histograms")
+            conn.execute(
+                "INSERT INTO score_histograms (granularity, period, domain, score, count) "
+                + score_histogram_day_select("main.assessments")
+            )
+            conn.executemany(SCORE_HISTOGRAM_UPSERT_SQL, archived)
+            derive_monthly_score_histograms(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        rows, scores = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(count), 0) FROM score_histograms WHERE granularity = 'day'"
+        ).fetchone()
+    finally:
+        conn.close()
+    return {"day_rows": rows, "scores": scores}
@@ -0,0 +1,139 @@
+import threading
+from pathlib import Path
+from typing import Any, Dict
+
+from . import db
+from .db import get_connection
+
+DOMAINS = ["thyroid", "diabetes", "pcos", "adrenal", "metabolic"]
+BINS = 101  # whole-percent scores 0..100
+
+
+def _to_bin(value: Any) -> int | None:
+    try:
+        score = int(round(float(str(value).replace("%", ""))))
+    except (TypeError, ValueError):
+        return None
+    return min(max(score, 0), BINS - 1)
+
+
+class _Fenwick:
+    """Counts per bin with O(log BINS) point updates and prefix sums."""
+
+    def __init__(self, size: int) -> None:
+        self._tree = [0] * (size + 1)
+
+    def add(self, i: int, delta: int) -> None:
+        i += 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i: int) -> int:
+        """Sum of bins [0, i)."""
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+
+class ScoreIndex:
+    """Per-domain score histograms over the assessments table, for percentile-rank lookups.
+
+    The index is loaded on first use. It then catches up with rows above its id watermark, so
+    rows written by the async writer or by other processes are counted once. Deleting rows
+    (archiving) requires invalidate().
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, path: Path | None) -> None:
+        self._path = path
+        self._watermark = 0
+        self._trees = {d: _Fenwick(BINS) for d in DOMAINS}
+        self._totals = {d: 0 for d in DOMAINS}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._reset(None)
+
+    @property
+    def loaded(self) -> bool:
+        return self._path is not None
+
+    def sync(self, conn=None) -> None:
+        with self._lock:
+            own = conn is None
+            conn = conn or get_connection()
+            try:
+                self._sync(conn)
+            finally:
+                if own:
+                    conn.close()
+
+    def _sync(self, conn) -> None:
+        if self._path != db.DB_PATH:
+            self._reset(db.DB_PATH)
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM assessments").fetchone()[0]
+        if max_id < self._watermark:
+            self._reset(db.DB_PATH)
+        if max_id == self._watermark:
+            return
+        for domain in DOMAINS:
+            column = f"{domain}_risk"
+            rows = conn.execute(
+                f"SELECT {column}, COUNT(*) FROM assessments WHERE id > ? AND id <= ? GROUP BY {column}",
+                (self._watermark, max_id),
+            ).fetchall()
+            for value, count in rows:
+                b = _to_bin(value)
+                if b is not None:
+                    self._trees[domain].add(b, count)
+                    self._totals[domain] += count
+        self._watermark = max_id
+
+    def percentiles(self, scores: Dict[str, Any], stored: bool = False) -> Dict[str, Any]:
+        """Mid-rank percentile of each score among stored assessments (ties count half).
+
+        stored=True means `scores` come from an assessment that is already in the table; it is left
+        out of its own ranking, so a saved assessment ranks the same as it did before saving.
+        """
+        self.sync()
+        ranks: Dict[str, float | None] = {}
+        with self._lock:
+            for domain in DOMAINS:
+                b = _to_bin(scores.get(domain))
+                if b is None:
+                    ranks[domain] = None
+                    continue
+                tree = self._trees[domain]
+                below = tree.prefix(b)
+                equal = tree.prefix(b + 1) - below
+                own = 1 if stored and equal else 0
+                total = self._totals[domain] - own
+                if total == 0:
+                    ranks[domain] = None
+                    continue
+                ranks[domain] = round(100.0 * (below + (equal - own) / 2) / total, 1)
+            population = max(self._totals.values()) - (1 if stored else 0)
+        return {"percentiles": ranks, "population": max(population, 0)}
+
+
+_index = ScoreIndex()
+
+
+def score_percentiles(scores: Dict[str, Any], stored: bool = False) -> Dict[str, Any]:
+    return _index.percentiles(scores, stored)
+
+
+def refresh_score_index(conn=None) -> None:
+    """Fold newly committed rows into the index; a no-op until the index is first used."""
+    if _index.loaded:
+        _index.sync(conn)
+
+
+def invalidate_score_index() -> None:
+    _index.invalidate()
@@ -0,0 +1,116 @@
+"""Column-wise version of risk_engine.calculate_risk for scoring many rows at once.
+
+Rows use the training dataset column names (age, gender, bmi, sleep_quality, ..., symptoms as a
+comma-joined string, lab markers with NaN for missing). Text rules are evaluated once per distinct
+value and broadcast back by code, so cost is dominated by a few NumPy operations per rule.
+Scores match calculate_risk row for row (see tests/test_risk_engine.py).
+"""
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from .risk_engine import to_lower_str
+
+DOMAINS = ("thyroid", "diabetes", "pcos", "adrenal", "metabolic")
+
+
+def _text_flag(values: pd.Series, predicate: Callable[[str], bool]) -> np.ndarray:
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    lookup = np.array([predicate("" if pd.isna(u) else to_lower_str(u)) for u in uniques], dtype=bool)
+    return lookup[codes] if len(lookup) else np.zeros(len(values), dtype=bool)
+
+
+def _has_any(words: list[str]) -> Callable[[str], bool]:
+    return lambda text: any(w in text for w in words)
+
+
+def _numeric(df: pd.DataFrame, col: str) -> np.ndarray:
+    if col not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+
+
+def _text(df: pd.DataFrame, col: str, default: str) -> pd.Series:
+    if col not in df.columns:
+        return pd.Series(default, index=df.index)
+    return df[col]
+
+
+def calculate_risk_batch(df: pd.DataFrame) -> pd.DataFrame:
+    """Clamped 0-100 scores per domain, one row per input row."""
+    n = len(df)
+    age = _numeric(df, "age")
+    bmi = _numeric(df, "bmi")
+    female = _text_flag(_text(df, "gender", ""), lambda g: g == "female")
+    sleep = _text(df, "sleep_quality", "average")
+    stress = _text(df, "stress_level", "moderate")
+    exercise = _text(df, "exercise_frequency", "low")
+    diet = _text(df, "diet_type", "mixed")
+    family = _text(df, "family_history", "")
+    symptoms = _text(df, "symptoms", "")
+
+    sleep_poor = _text_flag(sleep, _has_any(["poor", "low"]))
+    sleep_avg = ~sleep_poor & _text_flag(sleep, _has_any(["average"]))
+    stress_high = _text_flag(stress, _has_any(["high"]))
+    stress_mod = ~stress_high & _text_flag(stress, _has_any(["moderate"]))
+    ex_low = _text_flag(exercise, _has_any(["none", "rare", "sedentary", "low"]))
+    ex_active = ~ex_low & _text_flag(exercise, _has_any(["3", "4", "5", "regular", "daily"]))
+    diet_bad = _text_flag(diet, _has_any(["high sugar", "processed", "junk", "high-carb", "high carb"]))
+    diet_good = ~diet_bad & _text_flag(diet, _has_any(["balanced", "mediterranean", "whole foods", "high protein"]))
+    fh_diabetes = _text_flag(family, _has_any(["diabetes", "insulin resistance"]))
+    fh_thyroid = _text_flag(family, _has_any(["thyroid", "hypothyroid", "hyperthyroid", "hashimoto"]))
+    fh_pcos = _text_flag(family, _has_any(["pcos"])) & female
+    sym_thyroid = _text_flag(symptoms, _has_any(["fatigue", "weight gain", "cold intolerance", "hair loss", "dry skin"]))
+    sym_diabetes = _text_flag(
+        symptoms, _has_any(["acanthosis", "increased thirst", "frequent urination", "sugar cravings"])
+    )
+    sym_pcos = female & _text_flag(symptoms, _has_any(["irregular cycles", "acne", "hirsutism", "ovarian cyst"]))
+    sym_irregular = female & _text_flag(symptoms, _has_any(["irregular cycles"]))
+
+    tsh = _numeric(df, "tsh")
+    t3 = _numeric(df, "t3")
+    t4 = _numeric(df, "t4")
+    hba1c = _numeric(df, "hba1c")
+    insulin = _numeric(df, "insulin")
+    cortisol = _numeric(df, "cortisol")
+    cholesterol = _numeric(df, "cholesterol")
+    glucose = _numeric(df, "fasting_glucose")
+
+    # NaN compares False everywhere below, matching the "marker is not None" guards.
+    with np.errstate(invalid="ignore"):
+        obese = bmi >= 30
+        overweight = ~obese & (bmi >= 25)
+        hba1c_diabetic = hba1c >= 6.5
+        hba1c_pre = ~hba1c_diabetic & (hba1c >= 5.7)
+        glucose_high = glucose >= 126
+        glucose_pre = ~glucose_high & (glucose >= 100)
+        insulin_high = insulin > 15
+        older = age >= 40
+
+        thyroid = np.full(n, 20.0)
+        thyroid += 8 * stress_high + 20 * fh_thyroid + 12 * sym_thyroid
+        thyroid += 25 * ((tsh > 4.5) | (tsh < 0.4)) + 10 * (t3 < 2.0) + 10 * (t4 < 0.8)
+
+        diabetes = np.full(n, 20.0)
+        diabetes += 20 * obese + 12 * overweight + 6 * sleep_poor + 5 * stress_high
+        diabetes += 12 * ex_low - 6 * ex_active + 14 * diet_bad - 4 * diet_good
+        diabetes += 20 * fh_diabetes + 15 * sym_diabetes + 8 * older
+        diabetes += 35 * hba1c_diabetic + 18 * hba1c_pre + 30 * glucose_high + 15 * glucose_pre + 15 * insulin_high
+        diabetes += 12 * ((bmi >= 25) & fh_diabetes)
+
+        pcos = np.where(female, 15.0, 0.0)
+        pcos += 10 * obese + 6 * overweight + 6 * diet_bad + 20 * fh_pcos + 20 * sym_pcos + 12 * insulin_high
+        pcos += 15 * (sym_irregular & (insulin_high | (hba1c >= 5.7)))
+
+        adrenal = np.full(n, 20.0)
+        adrenal += 18 * sleep_poor + 8 * sleep_avg + 20 * stress_high + 10 * stress_mod + 8 * sym_thyroid
+        adrenal += 20 * ((cortisol > 20) | (cortisol < 5)) + 12 * (sleep_poor & stress_high)
+
+        metabolic = np.full(n, 20.0)
+        metabolic += 25 * obese + 15 * overweight + 12 * ex_low - 6 * ex_active + 10 * diet_bad - 4 * diet_good
+        metabolic += 10 * fh_diabetes + 8 * older + 20 * hba1c_diabetic + 10 * hba1c_pre
+        metabolic += 15 * glucose_high + 8 * glucose_pre + 10 * insulin_high + 15 * (cholesterol >= 200)
+
+    scores = {"thyroid": thyroid, "diabetes": diabetes, "pcos": pcos, "adrenal": adrenal, "metabolic": metabolic}
+    return pd.DataFrame({d: np.clip(scores[d], 0.0, 100.0) for d in DOMAINS}, index=df.index)
@@ -1,19 +1,33 @@
 from functools import wraps
-import json
 
 from flask import Blueprint, Response, jsonify, redirect, render_template, request, session, url_for
 
 from ..models.admin_model import verify_admin_credentials
-from ..models.assessment_model import get_all_assessment_rows, get_all_assessments_json, get_dashboard_assessments
+from ..models.assessment_model import (
+    get_all_assessment_rows,
+    get_all_assessments_json,
+    get_assessment_write_stats,
+    get_dashboard_assessments,
+    search_assessments,
+)
+from ..models.result_codec import decode_result
+from ..models.rollup_model import DIMENSIONS, cohort_series
+from ..models.score_distribution import score_distribution
 from ..models.user_model import get_all_users
 from ..services.analytics_service import build_dashboard_stats
-from ..services.model_inference import model_available
+from ..services.drift_monitor import feature_drift, reset_feature_drift
+from ..services.model_inference import model_available, shadow_stats
 from ..services.openai_service import openai_available
 from ..services.report_service import assessments_to_csv, assessments_to_pdf_bytes
+from ..services.similarity_index import similar_assessments
 
 admin_bp = Blueprint("admin", __name__)
 
 
+def wants_archive() -> bool:
+    return request.args.get("include_archive", "").strip().lower() in ("1", "true", "yes")
+
+
 def admin_required(view_fn):
     @wraps(view_fn)
     def wrapped(*args, **kwargs):
@@ -50,12 +64,11 @@ def admin_dashboard():
     rows = []
     for r in rows_raw:
         item = dict(r)
-        source = "rule_engine"
-        if item.get("result_json"):
-            try:
-                source = json.loads(item["result_json"]).get("prediction_source", "rule_engine")
-            except Exception:
-                source = "rule_engine"
+        try:
+            source = decode_result(item, include_static=False).get("prediction_source", "rule_engine")
+        except Exception:
+            source = "rule_engine"
+        item.pop("result_blob", None)
         item["prediction_source"] = source
         rows.append(item)
     stats = build_dashboard_stats(rows)
@@ -71,13 +84,112 @@ def admin_dashboard():
 @admin_bp.route("/api/admin/assessments")
 @admin_required
 def list_assessments():
-    return jsonify({"assessments": get_all_assessments_json()})
+    return jsonify({"assessments": get_all_assessments_json(include_archive=wants_archive())})
+
+
+@admin_bp.route("/api/admin/search")
+@admin_required
+def search_assessments_api():
+    args = request.args
+    try:
+        min_risk = args.get("min_risk")
+        data = search_assessments(
+            args.get("q", ""),
+            domain=args.get("domain") or None,
+            min_risk=int(min_risk) if min_risk not in (None, "") else None,
+            date_from=args.get("from") or None,
+            date_to=args.get("to") or None,
+            page=int(args.get("page", 1)),
+            per_page=int(args.get("per_page", 25)),
+            sort=args.get("sort", "relevance"),
+        )
+    except ValueError as exc:
+        return jsonify({"status": "error", "message": str(exc)}), 400
+    return jsonify({"status": "success", **data})
+
+
+@admin_bp.route("/api/admin/analytics")
+@admin_required
+def analytics_api():
+    args = request.args
+    group_by = [g.strip() for g in args.get("group_by", "").split(",") if g.strip()]
+    try:
+        data = cohort_series(
+            granularity=args.get("granularity", "day"),
+            start=args.get("start"),
+            end=args.get("end"),
+            group_by=group_by,
+            filters={name: args.get(name) for name in DIMENSIONS},
+        )
+    except ValueError as exc:
+        return jsonify({"status": "error", "message": str(exc)}), 400
+    return jsonify({"status": "success", **data})
+
+
+@admin_bp.route("/api/admin/score-distribution")
+@admin_required
+def score_distribution_api():
+    args = request.args
+    try:
+        data = score_distribution(
+            start=args.get("start"),
+            end=args.get("end"),
+            domains=[d.strip() for d in args.get("domain", "").split(",") if d.strip()] or None,
+            quantiles=[float(q) for q in args["quantiles"].split(",")] if args.get("quantiles") else None,
+            bin_width=int(args.get("bin_width", 10)),
+        )
+    except ValueError as exc:
+        return jsonify({"status": "error", "message": str(exc)}), 400
+    return jsonify({"status": "success", **data})
+
+
+@admin_bp.route("/api/admin/assessments/<int:assessment_id>/similar")
+@admin_required
+def similar_assessments_api(assessment_id: int):
+    try:
+        k = min(max(int(request.args.get("k", 10)), 1), 100)
+    except ValueError:
+        return jsonify({"status": "error", "message": "k must be an integer"}), 400
+    data = similar_assessments(assessment_id, k)
+    if data is None:
+        return jsonify({"status": "error", "message": "Similarity index not built"}), 503
+    if not data["found"]:
+        return jsonify({"status": "error", "message": "Assessment not found"}), 404
+    return jsonify({"status": "success", "assessment_id": assessment_id, **data})
+
+
+@admin_bp.route("/api/admin/drift")
+@admin_required
+def drift_api():
+    data = feature_drift()
+    if data is None:
+        return jsonify({"status": "error", "message": "No drift reference; retrain the models"}), 503
+    return jsonify({"status": "success", **data})
+
+
+@admin_bp.route("/api/admin/drift/reset", methods=["POST"])
+@admin_required
+def drift_reset_api():
+    reset_feature_drift()
+    return jsonify({"status": "success"})
+
+
+@admin_bp.route("/api/admin/storage-stats")
+@admin_required
+def storage_stats():
+    return jsonify({"status": "success", "assessment_writes": get_assessment_write_stats()})
+
+
+@admin_bp.route("/api/admin/shadow-stats")
+@admin_required
+def shadow_stats_api():
+    return jsonify({"status": "success", "shadow": shadow_stats()})
 
 
 @admin_bp.route("/admin/export.csv")
 @admin_required
 def export_assessments_csv():
-    rows = get_all_assessment_rows()
+    rows = get_all_assessment_rows(include_archive=wants_archive())
     csv_data = assessments_to_csv(rows)
     return Response(
         csv_data,
@@ -89,7 +201,7 @@ def export_assessments_csv():
 @admin_bp.route("/admin/export.pdf")
 @admin_required
 def export_assessments_pdf():
-    rows = get_all_assessment_rows()
+    rows = get_all_assessment_rows(include_archive=wants_archive())
     pdf_data = assessments_to_pdf_bytes(rows)
     return Response(
         pdf_data,
@@ -2,10 +2,14 @@ import json
 from flask import Blueprint, jsonify, request, session
 
 from ..models.assessment_model import save_assessment
+from ..models.score_index import score_percentiles
 from ..services.chat_service import generate_chat_reply
-from ..services.model_inference import model_available, predict_with_models
+from ..services.drift_monitor import record_features
+from ..services.feature_engineering import build_feature_row
+from ..services.model_inference import model_available, model_versions, predict_with_models
 from ..services.openai_service import chat_completion, openai_available
 from ..services.risk_engine import calculate_risk, extract_markers
+from ..services.sequence_inference import predict_next_visit, sequence_model_available
 
 api_bp = Blueprint("api", __name__)
 
@@ -62,6 +66,7 @@ def assess_profile():
     explicit_labs = profile.get("Lab results (optional)", {}) or {}
     merged_markers = {**extracted_markers, **explicit_labs}
     result = calculate_risk(profile, merged_markers)
+    record_features(build_feature_row(profile, merged_markers))
 
     # Use trained ML models when available, with safe fallback to rule engine.
     ml_result = predict_with_models(profile, merged_markers)
@@ -69,6 +74,11 @@ def assess_profile():
         result["risk_scores"] = ml_result["risk_scores"]
         result["risk_level"] = ml_result["risk_level"]
         result["prediction_source"] = ml_result["prediction_source"]
+        result["top_drivers"] = ml_result["top_drivers"]
+        if ml_result["key_triggers"]:
+            # Explain the scores that are shown; keep the rule engine's view alongside.
+            result["rule_triggers"] = result.get("key_triggers", [])
+            result["key_triggers"] = ml_result["key_triggers"]
         result["explanation"] = (
             result.get("explanation", "") + " " + ml_result.get("explanation", "")
         ).strip()
@@ -100,6 +110,8 @@ def assess_profile():
     else:
         result["ai_enabled"] = False
 
+    # Ranked against the assessments stored before this one.
+    percentiles = score_percentiles(result["risk_scores"])
     save_assessment(
         profile,
         result,
@@ -112,6 +124,7 @@ def assess_profile():
             "status": "success",
             "extracted_markers": extracted_markers,
             "assessment": result,
+            "percentiles": percentiles,
         }
     )
 
@@ -171,12 +184,27 @@ def api_chat():
     )
 
 
+@api_bp.route("/api/next-visit-risk", methods=["GET"])
+def api_next_visit_risk():
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"status": "error", "message": "Login required"}), 401
+    if not sequence_model_available():
+        return jsonify({"status": "error", "message": "Sequence model not trained"}), 503
+
+    prediction = predict_next_visit(user_id)
+    if prediction is None:
+        return jsonify({"status": "error", "message": "No assessments recorded for this user"}), 404
+    return jsonify({"status": "success", "next_visit": prediction})
+
+
 @api_bp.route("/api/model-status", methods=["GET"])
 def api_model_status():
     return jsonify(
         {
             "status": "success",
             "model_available": model_available(),
+            "model_versions": model_versions(),
             "openai_available": openai_available(),
         }
     )
@@ -3,6 +3,7 @@ from functools import wraps
 from flask import Blueprint, redirect, render_template, request, session, url_for
 
 from ..models.assessment_model import get_user_assessments
+from ..models.score_index import DOMAINS, score_percentiles
 from ..models.user_model import create_user, verify_user
 
 auth_bp = Blueprint("auth", __name__)
@@ -58,4 +59,9 @@ def user_logout():
 @user_required
 def user_dashboard():
     assessments = get_user_assessments(session["user_id"])
-    return render_template("user_dashboard.html", assessments=assessments)
+    percentiles = None
+    if assessments:
+        latest = assessments[0]
+        # Ranked against every other assessment, as /api/assess ranked it before saving.
+        percentiles = score_percentiles({d: latest.get(f"{d}_risk") for d in DOMAINS}, stored=True)
+    return render_template("user_dashboard.html", assessments=assessments, percentiles=percentiles)
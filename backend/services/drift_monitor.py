@@ -0,0 +1,298 @@
+"""Feature drift of live /api/assess traffic against the training data.
+
+Training writes drift_reference.json next to the models. It holds one sketch per model input:
+- numeric features get a KLL quantile sketch and a missing rate;
+- categories get their shares;
+- symptom and family-history tokens get their shares.
+
+Serving folds every assessed feature row into sketches of the same kind. It snapshots them next
+to the database every SNAPSHOT_EVERY rows and at shutdown, so a restart resumes the counts. The report compares
+the two sides without touching the assessments table:
+- numeric features report PSI over the reference deciles and a KS distance;
+- categorical features report PSI over their shares.
+"""
+import atexit
+import json
+import math
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict
+
+import pandas as pd
+
+from ..models import db
+from .feature_engineering import LIST_SEPARATOR, NUMERIC_FEATURES, WORD_SEPARATOR
+from .model_inference import MODEL_DIR
+from .sketches import CategoryCounts, KLLSketch
+
+REFERENCE_PATH = MODEL_DIR / "drift_reference.json"
+CATEGORICAL_FEATURES = ["gender", "sleep_quality", "stress_level", "exercise_frequency", "diet_type"]
+TOKEN_FEATURES = {"symptoms": LIST_SEPARATOR, "family_history": WORD_SEPARATOR}
+MISSING = "(missing)"
+SNAPSHOT_EVERY = 100
+MIN_ROWS = 50
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+PSI_FLOOR = 1e-4  # share used for a bin one side never saw, so PSI stays finite
+
+
+def _number(value: Any) -> float | None:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _category(value: Any) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return MISSING
+    text = str(value).strip()
+    return text or MISSING
+
+
+def _tokens(value: Any, separator: str) -> list[str]:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return []
+    return [t for t in re.split(separator, str(value).strip().lower()) if t]
+
+
+class FeatureSketches:
+    """One sketch per model input; the same shape on the training and the serving side."""
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.numeric = {col: KLLSketch() for col in NUMERIC_FEATURES}
+        self.missing = {col: 0 for col in NUMERIC_FEATURES}
+        self.categorical = {col: CategoryCounts() for col in CATEGORICAL_FEATURES}
+        self.tokens = {col: CategoryCounts() for col in TOKEN_FEATURES}
+
+    def update(self, row: Dict[str, Any]) -> None:
+        self.rows += 1
+        for col, sketch in self.numeric.items():
+            value = _number(row.get(col))
+            if value is None:
+                self.missing[col] += 1
+            else:
+                sketch.update(value)
+        for col, counts in self.categorical.items():
+            counts.update(_category(row.get(col)))
+        for col, counts in self.tokens.items():
+            for token in _tokens(row.get(col), TOKEN_FEATURES[col]):
+                counts.update(token)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "numeric": {col: s.to_dict() for col, s in self.numeric.items()},
+            "missing": self.missing,
+            "categorical": {col: c.to_dict() for col, c in self.categorical.items()},
+            "tokens": {col: c.to_dict() for col, c in self.tokens.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FeatureSketches":
+        sketches = cls()
+        sketches.rows = data["rows"]
+        sketches.numeric.update({col: KLLSketch.from_dict(s) for col, s in data["numeric"].items()})
+        sketches.missing.update(data["missing"])
+        sketches.categorical.update({col: CategoryCounts.from_dict(c) for col, c in data["categorical"].items()})
+        sketches.tokens.update({col: CategoryCounts.from_dict(c) for col, c in data["tokens"].items()})
+        return sketches
+
+
+def build_reference(df: pd.DataFrame) -> Dict[str, Any]:
+    sketches = FeatureSketches()
+    for row in df.to_dict(orient="records"):
+        sketches.update(row)
+    return {"created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z", **sketches.to_dict()}
+
+
+def write_reference(df: pd.DataFrame, path: Path = REFERENCE_PATH) -> Dict[str, Any]:
+    reference = build_reference(df)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(reference, f)
+    return reference
+
+
+def psi(expected: list[float], actual: list[float]) -> float:
+    """Population stability index between two share vectors over the same bins."""
+    total = 0.0
+    for e, a in zip(expected, actual):
+        e, a = max(e, PSI_FLOOR), max(a, PSI_FLOOR)
+        total += (a - e) * math.log(a / e)
+    return total
+
+
+def _status(value: float | None) -> str:
+    if value is None:
+        return "insufficient_data"
+    if value >= PSI_ALERT:
+        return "drift"
+    return "warning" if value >= PSI_WARN else "stable"
+
+
+def _bin_shares(sketch: KLLSketch, edges: list[float]) -> list[float]:
+    """Shares of (-inf, e0], (e0, e1], ..., (e_last, inf)."""
+    cdf = [0.0] + sketch.cdf(edges) + [1.0]
+    return [hi - lo for lo, hi in zip(cdf, cdf[1:])]
+
+
+def compare_numeric(reference: KLLSketch, live: KLLSketch) -> Dict[str, Any]:
+    if live.n < MIN_ROWS or reference.n == 0:
+        return {"psi": None, "ks": None}
+    edges = sorted(set(reference.quantiles([i / 10 for i in range(1, 10)])))
+    value = psi(_bin_shares(reference, edges), _bin_shares(live, edges))
+    points = sorted(set(reference.quantiles([i / 100 for i in range(101)]) + live.quantiles([i / 100 for i in range(101)])))
+    ks = max(abs(r - l) for r, l in zip(reference.cdf(points), live.cdf(points)))
+    return {"psi": round(value, 4), "ks": round(ks, 4)}
+
+
+def compare_counts(reference: CategoryCounts, live: CategoryCounts) -> Dict[str, Any]:
+    if live.n < MIN_ROWS or reference.n == 0:
+        return {"psi": None}
+    expected, actual = reference.shares(), live.shares()
+    keys = sorted(set(expected) | set(actual))
+    value = psi([expected.get(k, 0.0) for k in keys], [actual.get(k, 0.0) for k in keys])
+    # The categories that moved most explain the score.
+    moved = sorted(keys, key=lambda k: -abs(actual.get(k, 0.0) - expected.get(k, 0.0)))[:3]
+    return {
+        "psi": round(value, 4),
+        "largest_shifts": [
+            {"value": k, "reference_share": round(expected.get(k, 0.0), 4), "live_share": round(actual.get(k, 0.0), 4)}
+            for k in moved
+        ],
+    }
+
+
+def drift_report(reference: FeatureSketches, live: FeatureSketches) -> Dict[str, Any]:
+    features: Dict[str, Any] = {}
+    for col in NUMERIC_FEATURES:
+        ref_sketch, live_sketch = reference.numeric[col], live.numeric[col]
+        entry = compare_numeric(ref_sketch, live_sketch)
+        entry.update(
+            {
+                "kind": "numeric",
+                "reference_missing_rate": round(reference.missing[col] / max(reference.rows, 1), 4),
+                "live_missing_rate": round(live.missing[col] / max(live.rows, 1), 4),
+                "reference_median": ref_sketch.quantiles([0.5])[0],
+                "live_median": live_sketch.quantiles([0.5])[0],
+            }
+        )
+        features[col] = entry
+    for kind, ref_group, live_group in (
+        ("categorical", reference.categorical, live.categorical),
+        ("tokens", reference.tokens, live.tokens),
+    ):
+        for col, counts in ref_group.items():
+            features[col] = {"kind": kind, **compare_counts(counts, live_group[col])}
+    for entry in features.values():
+        entry["status"] = _status(entry["psi"])
+    scored = [e["psi"] for e in features.values() if e["psi"] is not None]
+    worst = max(scored) if scored else None
+    return {
+        "status": _status(worst),
+        "max_psi": worst,
+        "reference_rows": reference.rows,
+        "live_rows": live.rows,
+        "features": features,
+    }
+
+
+class DriftMonitor:
+    """Live sketches for the current database, snapshotted next to it."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._path: Path | None = None
+        self._live = FeatureSketches()
+        self._pending = 0
+        self._reference_key = None
+        self._reference: FeatureSketches | None = None
+
+    def _snapshot_path(self) -> Path:
+        return self._path.parent / "drift_sketches.json"
+
+    def _ensure_loaded(self) -> None:
+        if self._path == db.DB_PATH:
+            return
+        self._path, self._live, self._pending = db.DB_PATH, FeatureSketches(), 0
+        path = self._snapshot_path()
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                self._live = FeatureSketches.from_dict(json.load(f))
+
+    def _save(self) -> None:
+        path = self._snapshot_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._live.to_dict(), f)
+        tmp.replace(path)
+        self._pending = 0
+
+    def _load_reference(self) -> FeatureSketches | None:
+        if not REFERENCE_PATH.exists():
+            return None
+        key = (str(REFERENCE_PATH), REFERENCE_PATH.stat().st_mtime_ns)
+        if key != self._reference_key:
+            with open(REFERENCE_PATH, "r", encoding="utf-8") as f:
+                self._reference = FeatureSketches.from_dict(json.load(f))
+            self._reference_key = key
+        return self._reference
+
+    def record(self, row: Dict[str, Any]) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            self._live.update(row)
+            self._pending += 1
+            if self._pending >= SNAPSHOT_EVERY:
+                self._save()
+
+    def flush(self) -> None:
+        """Snapshot rows recorded since the last save."""
+        with self._lock:
+            if self._path is not None and self._pending:
+                self._save()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            self._live = FeatureSketches()
+            self._save()
+
+    def report(self) -> Dict[str, Any] | None:
+        with self._lock:
+            self._ensure_loaded()
+            reference = self._load_reference()
+            if reference is None:
+                return None
+            return drift_report(reference, self._live)
+
+
+_monitor = DriftMonitor()
+
+
+def record_features(row: Dict[str, Any]) -> None:
+    """Fold one model feature row (see build_feature_row) into the live sketches."""
+    _monitor.record(row)
+
+
+def save_feature_drift() -> None:
+    """Snapshot the live sketches now; also runs at interpreter exit."""
+    _monitor.flush()
+
+
+atexit.register(save_feature_drift)
+
+
+def feature_drift() -> Dict[str, Any] | None:
+    """Drift of live traffic against the training reference; None when no reference exists."""
+    return _monitor.report()
+
+
+def reset_feature_drift() -> None:
+    """Start a new comparison window, e.g. after retraining on the drifted data."""
+    _monitor.reset()
@@ -1,22 +1,109 @@
+import re
 from typing import Any, Dict
 
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.base import BaseEstimator, TransformerMixin
+
+# build_feature_row joins symptom lists with this; MultiHotEncoder splits on it.
+SYMPTOM_SEPARATOR = ", "
+LIST_SEPARATOR = r"\s*[,;]\s*"
+WORD_SEPARATOR = r"[^a-z0-9]+"
+NUMERIC_FEATURES = ["age", "bmi", "tsh", "t3", "t4", "hba1c", "insulin", "cortisol", "cholesterol", "fasting_glucose"]
+# The training data stores a missing text answer as "" (dataset_io.MISSING_CATEGORY), so the models learned
+# "" as its own category. Serving must send the same, not None, which the imputer would turn into the mode.
+MISSING_CATEGORY = ""
+
+
+class MultiHotEncoder(BaseEstimator, TransformerMixin):
+    """Encode delimited text columns as one indicator per known token.
+
+    "Fatigue, Acne" and "Acne, Fatigue" produce the same row, and an unseen combination of known
+    tokens still lights up its tokens instead of being dropped like an unknown one-hot category.
+    Tokens are lower-cased; those outside the vocabulary learned in fit (or passed in) are ignored.
+    """
+
+    def __init__(self, separator: str = LIST_SEPARATOR, vocabulary: list[str] | None = None, min_count: int = 1):
+        self.separator = separator
+        self.vocabulary = vocabulary
+        self.min_count = min_count
+
+    def _columns(self, X) -> list[np.ndarray]:
+        if hasattr(X, "iloc"):
+            return [X.iloc[:, j].to_numpy(dtype=object) for j in range(X.shape[1])]
+        X = np.asarray(X, dtype=object)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        return [X[:, j] for j in range(X.shape[1])]
+
+    def _tokens(self, value: Any) -> list[str]:
+        if value is None or pd.isna(value):
+            return []
+        return [t for t in re.split(self.separator, str(value).strip().lower()) if t]
+
+    def fit(self, X, y=None):
+        columns = self._columns(X)
+        self.n_features_in_ = len(columns)
+        self.vocabulary_ = []
+        for values in columns:
+            if self.vocabulary is not None:
+                vocab = sorted({str(t).strip().lower() for t in self.vocabulary})
+            else:
+                counts: Dict[str, int] = {}
+                for value, n in pd.Series(values).value_counts(dropna=True).items():
+                    for token in set(self._tokens(value)):
+                        counts[token] = counts.get(token, 0) + int(n)
+                vocab = sorted(t for t, n in counts.items() if n >= self.min_count)
+            self.vocabulary_.append(vocab)
+        return self
+
+    def transform(self, X):
+        columns = self._columns(X)
+        blocks = []
+        for values, vocab in zip(columns, self.vocabulary_):
+            index = {token: i for i, token in enumerate(vocab)}
+            # Tokenize each distinct string once, then expand to rows with NumPy.
+            codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+            per_unique = [sorted({index[t] for t in self._tokens(u) if t in index}) for u in uniques]
+            lengths = np.array([len(cols) for cols in per_unique] + [0], dtype=np.int64)
+            flat = np.array([c for cols in per_unique for c in cols], dtype=np.int64)
+            starts = np.concatenate([[0], np.cumsum(lengths[:-1])])
+            row_lengths = lengths[codes]  # code -1 (missing) picks the trailing 0
+            indptr = np.concatenate([[0], np.cumsum(row_lengths)])
+            offsets = np.arange(indptr[-1]) - np.repeat(indptr[:-1], row_lengths)
+            indices = flat[np.repeat(starts[codes], row_lengths) + offsets]
+            data = np.ones(len(indices), dtype=np.float64)
+            blocks.append(sparse.csr_matrix((data, indices, indptr), shape=(len(values), len(vocab))))
+        return sparse.hstack(blocks, format="csr")
+
+    def get_feature_names_out(self, input_features=None):
+        names = list(input_features) if input_features is not None else [f"x{j}" for j in range(self.n_features_in_)]
+        return np.array([f"{name}_{token}" for name, vocab in zip(names, self.vocabulary_) for token in vocab], dtype=object)
+
+
+def _text(value: Any) -> str:
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return MISSING_CATEGORY
+    return str(value).strip()
+
 
 def build_feature_row(profile: Dict[str, Any], markers: Dict[str, Any]) -> Dict[str, Any]:
     symptoms = profile.get("Symptoms", [])
     if isinstance(symptoms, list):
-        symptom_text = ", ".join(str(x) for x in symptoms)
+        symptom_text = SYMPTOM_SEPARATOR.join(str(x) for x in symptoms)
     else:
-        symptom_text = str(symptoms or "")
+        symptom_text = _text(symptoms)
 
     return {
         "age": profile.get("Age"),
-        "gender": profile.get("Gender"),
+        "gender": _text(profile.get("Gender")),
         "bmi": profile.get("BMI"),
-        "sleep_quality": profile.get("Sleep quality"),
-        "stress_level": profile.get("Stress level"),
-        "exercise_frequency": profile.get("Exercise frequency"),
-        "diet_type": profile.get("Diet type"),
-        "family_history": profile.get("Family history", ""),
+        "sleep_quality": _text(profile.get("Sleep quality")),
+        "stress_level": _text(profile.get("Stress level")),
+        "exercise_frequency": _text(profile.get("Exercise frequency")),
+        "diet_type": _text(profile.get("Diet type")),
+        "family_history": _text(profile.get("Family history")),
         "symptoms": symptom_text,
         "tsh": markers.get("TSH"),
         "t3": markers.get("T3"),
@@ -27,3 +114,12 @@ def build_feature_row(profile: Dict[str, Any], markers: Dict[str, Any]) -> Dict[
         "cholesterol": markers.get("Cholesterol"),
         "fasting_glucose": markers.get("Fasting glucose"),
     }
+
+
+def profile_feature_frame(profiles: list[Dict[str, Any]]) -> pd.DataFrame:
+    """Model features for decoded assessment profiles (see result_codec.decode_profile)."""
+    features = [build_feature_row(profile, profile.get("Lab results (optional)") or {}) for profile in profiles]
+    X = pd.DataFrame(features, columns=list(build_feature_row({}, {})))
+    for col in NUMERIC_FEATURES:
+        X[col] = pd.to_numeric(X[col], errors="coerce").astype(float)
+    return X
@@ -1,13 +1,48 @@
+import atexit
+import logging
 import os
+import queue
+import random
+import threading
+import time
+import weakref
+from collections import deque
 from pathlib import Path
 from typing import Any, Dict
 
+import numpy as np
 import pandas as pd
 
-from .feature_engineering import build_feature_row
+from .feature_engineering import MultiHotEncoder, build_feature_row
 
 TARGETS = ["thyroid", "diabetes", "pcos", "adrenal", "metabolic"]
 MODEL_DIR = Path(__file__).resolve().parents[2] / "ml" / "artifacts"
+TOP_DRIVERS = 3
+MAX_ML_TRIGGERS = 6
+FEATURE_LABELS = {
+    "age": "Age",
+    "gender": "Gender",
+    "bmi": "BMI",
+    "sleep_quality": "Sleep quality",
+    "stress_level": "Stress level",
+    "exercise_frequency": "Exercise frequency",
+    "diet_type": "Diet type",
+    "family_history": "Family history",
+    "symptoms": "Symptoms",
+    "tsh": "TSH",
+    "t3": "T3",
+    "t4": "T4",
+    "hba1c": "HbA1c",
+    "insulin": "Insulin",
+    "cortisol": "Cortisol",
+    "cholesterol": "Cholesterol",
+    "fasting_glucose": "Fasting glucose",
+}
+TOKEN_LABELS = {"symptoms": "Symptom", "family_history": "Family history"}
+SHADOW_LATENCY_WINDOW = 1000
+SHADOW_LOG_EVERY = 500
+
+logger = logging.getLogger(__name__)
 
 
 def _risk_level(score: int) -> str:
@@ -18,16 +53,184 @@ def _risk_level(score: int) -> str:
     return "High"
 
 
+# Loaded pipelines keyed by artifact path; reloaded only when the file changes on disk.
+_registry: Dict[Path, tuple[int, Any]] = {}
+_registry_lock = threading.Lock()
+
+
 def _load_model(path: Path):
     import joblib
 
-    return joblib.load(path)
+    mtime = path.stat().st_mtime_ns
+    with _registry_lock:
+        cached = _registry.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    model = joblib.load(path)
+    with _registry_lock:
+        _registry[path] = (mtime, model)
+    return model
+
+
+def _feature_groups(pre) -> tuple[np.ndarray, list[tuple[str, str | None]]]:
+    """Map each encoded column to an input column, or to one token of a multi-hot column."""
+    groups = np.zeros(len(pre.get_feature_names_out()), dtype=np.intp)
+    labels: list[tuple[str, str | None]] = []
+    for name, transformer, columns in pre.transformers_:
+        if transformer == "drop" or name == "remainder":
+            continue
+        out = pre.output_indices_[name]
+        last = transformer.steps[-1][1] if hasattr(transformer, "steps") else transformer
+        if isinstance(last, MultiHotEncoder):
+            for column, vocab in zip(columns, last.vocabulary_):
+                for token in vocab:
+                    labels.append((column, token))
+            groups[out] = np.arange(len(labels) - (out.stop - out.start), len(labels))
+        elif hasattr(last, "categories_"):
+            start = out.start
+            for column, categories in zip(columns, last.categories_):
+                labels.append((column, None))
+                groups[start : start + len(categories)] = len(labels) - 1
+                start += len(categories)
+        else:
+            for j, column in enumerate(columns):
+                labels.append((column, None))
+                groups[out.start + j] = len(labels) - 1
+    return groups, labels
+
+
+class _Explainer:
+    """Per-artifact attribution state, built once per loaded model.
+
+    Linear models get exact contributions coef * (x - baseline), where the baseline is the mean
+    encoded training row stored as attribution_baseline_ (zeros for artifacts without one). Tree
+    ensembles get path attributions: along each tree's decision path, the change in node value
+    at a split is credited to its feature, so contributions plus the expected value add up to the
+    model output. The trees are flattened into shared arrays and walked together, one level per
+    NumPy step. Units are log-odds for linear models and boosting, probability for forests.
+    """
+
+    def __init__(self, model):
+        self.pre, clf = model.steps[0][1], model.steps[-1][1]
+        self.groups, self.labels = _feature_groups(self.pre)
+        self.kind = None
+        if hasattr(clf, "coef_") and not hasattr(clf, "support_vectors_"):
+            self.kind = "linear"
+            self.coef = np.ravel(clf.coef_).astype(np.float64)
+            baseline = getattr(model, "attribution_baseline_", None)
+            self.baseline = np.zeros_like(self.coef) if baseline is None else np.asarray(baseline, dtype=np.float64)
+        elif hasattr(clf, "estimators_") and hasattr(np.ravel(clf.estimators_)[0], "tree_"):
+            self.kind = "trees"
+            self._flatten([m.tree_ for m in np.ravel(clf.estimators_)], clf)
+
+    def _flatten(self, trees, clf) -> None:
+        boosted = hasattr(clf, "learning_rate")
+        scale = clf.learning_rate if boosted else 1.0 / len(trees)
+        feature, threshold, left, right, missing_left, value, roots = [], [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            n = tree.node_count
+            roots.append(offset)
+            feature.append(tree.feature)
+            threshold.append(tree.threshold)
+            left.append(np.where(tree.children_left >= 0, tree.children_left + offset, -1))
+            right.append(np.where(tree.children_right >= 0, tree.children_right + offset, -1))
+            missing_left.append(tree.missing_go_to_left.astype(bool))
+            if boosted:
+                value.append(tree.value[:, 0, 0] * scale)
+            else:
+                fractions = tree.value[:, 0, :] / tree.value[:, 0, :].sum(axis=1, keepdims=True)
+                value.append(fractions[:, 1] * scale)
+            offset += n
+        self.feature = np.concatenate(feature)
+        self.threshold = np.concatenate(threshold)
+        self.left, self.right = np.concatenate(left), np.concatenate(right)
+        self.missing_left = np.concatenate(missing_left)
+        self.value = np.concatenate(value)
+        self.roots = np.array(roots, dtype=np.intp)
+        self.max_depth = max(tree.max_depth for tree in trees)
+
+    def contributions(self, x: np.ndarray) -> np.ndarray:
+        """Per-encoded-column contributions for one encoded row."""
+        if self.kind == "linear":
+            return self.coef * (x - self.baseline)
+        # Trees see float32 inputs, as in sklearn's own predict.
+        x = x.astype(np.float32)
+        contrib = np.zeros(len(x))
+        node = self.roots.copy()
+        for _ in range(self.max_depth):
+            feature = self.feature[node]
+            active = feature >= 0
+            if not active.any():
+                break
+            at, f = node[active], feature[active]
+            xv = x[f]
+            go_left = (xv <= self.threshold[at]) | (np.isnan(xv) & self.missing_left[at])
+            child = np.where(go_left, self.left[at], self.right[at])
+            np.add.at(contrib, f, self.value[child] - self.value[at])
+            node[active] = child
+        return contrib
+
+    def top_drivers(self, encoded: np.ndarray, raw: Dict[str, Any], k: int = TOP_DRIVERS) -> list[dict]:
+        by_group = np.bincount(self.groups, weights=self.contributions(encoded), minlength=len(self.labels))
+        drivers = []
+        for g in np.argsort(-np.abs(by_group))[:k]:
+            if abs(by_group[g]) < 1e-6:
+                break
+            column, token = self.labels[g]
+            label = FEATURE_LABELS.get(column, column)
+            if token is not None:
+                label = TOKEN_LABELS.get(column, label)
+                present = bool(encoded[self.groups == g].any())
+                text = f"{label}: {token}" if present else f"No {label.lower()}: {token}"
+                value: Any = "present" if present else "absent"
+            else:
+                value = raw.get(column)
+                if value is None or value == "" or (isinstance(value, float) and np.isnan(value)):
+                    value, text = None, f"{label} not provided"
+                elif column in FEATURE_LABELS and isinstance(value, (int, float)):
+                    text = f"{label} {value}"
+                else:
+                    text = f"{label}: {value}"
+            drivers.append({"feature": text, "value": value, "contribution": round(float(by_group[g]), 4)})
+        return drivers
+
+
+_explainers: "weakref.WeakKeyDictionary[Any, _Explainer]" = weakref.WeakKeyDictionary()
+_explainers_lock = threading.Lock()
+
+
+def _explainer(model) -> _Explainer | None:
+    if not hasattr(model, "steps") or not hasattr(model.steps[0][1], "transformers_"):
+        return None
+    with _explainers_lock:
+        explainer = _explainers.get(model)
+    if explainer is None:
+        explainer = _Explainer(model)
+        with _explainers_lock:
+            _explainers[model] = explainer
+    return explainer if explainer.kind else None
+
+
+def model_versions() -> Dict[str, str | None]:
+    """Fingerprint of the artifact each target serves (None for artifacts trained before fingerprints)."""
+    versions: Dict[str, str | None] = {}
+    for target in TARGETS:
+        path = MODEL_DIR / f"{target}_best_model.pkl"
+        versions[target] = getattr(_load_model(path), "model_fingerprint_", None) if path.exists() else None
+    return versions
 
 
 def model_available() -> bool:
     return all((MODEL_DIR / f"{t}_best_model.pkl").exists() for t in TARGETS)
 
 
+def _pipeline_score(model, df: pd.DataFrame) -> int:
+    if hasattr(model, "predict_proba"):
+        return int(round(float(model.predict_proba(df)[0][1]) * 100))
+    return 75 if int(model.predict(df)[0]) == 1 else 25
+
+
 def predict_with_models(profile: Dict[str, Any], markers: Dict[str, Any]) -> Dict[str, Any] | None:
     if not model_available():
         return None
@@ -37,24 +240,235 @@ def predict_with_models(profile: Dict[str, Any], markers: Dict[str, Any]) -> Dic
 
     scores: Dict[str, str] = {}
     levels: Dict[str, str] = {}
+    drivers: Dict[str, list] = {}
+    timings: Dict[str, float] = {}
 
     for target in TARGETS:
         model_path = MODEL_DIR / f"{target}_best_model.pkl"
         model = _load_model(model_path)
+        explainer = _explainer(model)
 
-        if hasattr(model, "predict_proba"):
-            proba = float(model.predict_proba(df)[0][1])
+        started = time.perf_counter()
+        if explainer is not None:
+            # Encode once and share the row between the classifier and the attribution.
+            encoded = explainer.pre.transform(df)
+            clf = model.steps[-1][1]
+            proba = float(clf.predict_proba(encoded)[0][1])
+            timings[target] = (time.perf_counter() - started) * 1000
+            dense = encoded.toarray()[0] if hasattr(encoded, "toarray") else np.asarray(encoded)[0]
+            drivers[target] = explainer.top_drivers(dense.astype(np.float64), row)
             score = int(round(proba * 100))
         else:
-            pred = int(model.predict(df)[0])
-            score = 75 if pred == 1 else 25
+            score = _pipeline_score(model, df)
+        timings.setdefault(target, (time.perf_counter() - started) * 1000)
 
         scores[target] = f"{score}%"
         levels[target] = _risk_level(score)
 
+    # Provided features that pushed a Moderate/High score up (any score if none is), strongest first.
+    flagged = [t for t in drivers if levels[t] != "Low"] or list(drivers)
+    raising = sorted(
+        (d for t in flagged for d in drivers[t] if d["contribution"] > 0 and d["value"] is not None),
+        key=lambda d: -d["contribution"],
+    )
+    triggers = list(dict.fromkeys(d["feature"] for d in raising))[:MAX_ML_TRIGGERS]
+
+    if _shadow is not None:
+        _shadow.submit(df, scores, timings)
+
     return {
         "risk_scores": scores,
         "risk_level": levels,
+        "top_drivers": drivers,
+        "key_triggers": triggers,
         "prediction_source": "ml_model",
         "explanation": "Risk scores predicted by trained ML models using profile + lab features.",
     }
+
+
+class ShadowEvaluator:
+    """Scores a candidate artifact set on a sample of live requests, off the request thread.
+
+    The candidate directory holds <target>_best_model.pkl files laid out like MODEL_DIR; targets
+    without a candidate are skipped. Requests hand their feature row and production scores to a
+    bounded queue and return at once; a full queue drops the sample instead of waiting. A daemon
+    thread scores the candidates and keeps per-target disagreement and latency stats, which reset
+    whenever a candidate file changes.
+    """
+
+    def __init__(self, model_dir: Path, sample_rate: float = 0.1, max_queue: int = 1000) -> None:
+        self.model_dir = Path(model_dir)
+        self.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._counters = {"sampled": 0, "dropped": 0, "compared": 0, "errors": 0}
+        self._targets: Dict[str, Dict[str, Any]] = {}
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="shadow-evaluator", daemon=True)
+        self._thread.start()
+
+    def submit(self, df: pd.DataFrame, scores: Dict[str, str], timings: Dict[str, float]) -> None:
+        if random.random() >= self.sample_rate:
+            return
+        production = {t: int(str(v).rstrip("%")) for t, v in scores.items()}
+        try:
+            self._queue.put_nowait((df, production, timings))
+        except queue.Full:
+            with self._lock:
+                self._counters["dropped"] += 1
+            return
+        with self._lock:
+            self._counters["sampled"] += 1
+
+    def flush(self) -> None:
+        if self._thread and self._thread.is_alive():
+            self._queue.join()
+            return
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._evaluate_and_ack(item)
+
+    def close(self) -> None:
+        self.flush()
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                item = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            self._evaluate_and_ack(item)
+
+    def _evaluate_and_ack(self, item) -> None:
+        try:
+            self._evaluate(*item)
+        except Exception:
+            logger.exception("Shadow evaluation failed")
+            with self._lock:
+                self._counters["errors"] += 1
+        finally:
+            self._queue.task_done()
+
+    def _target_stats(self, target: str, version: str | None) -> Dict[str, Any]:
+        stats = self._targets.get(target)
+        if stats is None or stats["candidate_version"] != version:
+            stats = {
+                "candidate_version": version,
+                "compared": 0,
+                "level_disagreements": 0,
+                "label_disagreements": 0,
+                "total_abs_diff": 0,
+                "max_abs_diff": 0,
+                "production_ms": deque(maxlen=SHADOW_LATENCY_WINDOW),
+                "candidate_ms": deque(maxlen=SHADOW_LATENCY_WINDOW),
+            }
+            self._targets[target] = stats
+        return stats
+
+    def _evaluate(self, df: pd.DataFrame, production: Dict[str, int], timings: Dict[str, float]) -> None:
+        for target, prod_score in production.items():
+            path = self.model_dir / f"{target}_best_model.pkl"
+            if not path.exists():
+                continue
+            model = _load_model(path)
+            started = time.perf_counter()
+            score = _pipeline_score(model, df)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            diff = abs(score - prod_score)
+            with self._lock:
+                stats = self._target_stats(target, getattr(model, "model_fingerprint_", None) or str(path.stat().st_mtime_ns))
+                stats["compared"] += 1
+                stats["level_disagreements"] += _risk_level(score) != _risk_level(prod_score)
+                stats["label_disagreements"] += (score >= 50) != (prod_score >= 50)
+                stats["total_abs_diff"] += diff
+                stats["max_abs_diff"] = max(stats["max_abs_diff"], diff)
+                stats["candidate_ms"].append(elapsed_ms)
+                if target in timings:
+                    stats["production_ms"].append(timings[target])
+        with self._lock:
+            self._counters["compared"] += 1
+            compared = self._counters["compared"]
+        if compared % SHADOW_LOG_EVERY == 0:
+            logger.info("Shadow evaluation after %d requests: %s", compared, self.stats()["targets"])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = {
+                "model_dir": str(self.model_dir),
+                "sample_rate": self.sample_rate,
+                **self._counters,
+                "queue_depth": self._queue.qsize(),
+                "running": bool(self._thread and self._thread.is_alive()),
+            }
+            targets = {}
+            for target, stats in self._targets.items():
+                n = stats["compared"]
+                targets[target] = {
+                    "candidate_version": stats["candidate_version"],
+                    "compared": n,
+                    "level_disagreement_rate": round(stats["level_disagreements"] / n, 4) if n else None,
+                    "label_disagreement_rate": round(stats["label_disagreements"] / n, 4) if n else None,
+                    "mean_abs_score_diff": round(stats["total_abs_diff"] / n, 2) if n else None,
+                    "max_abs_score_diff": stats["max_abs_diff"],
+                    **_latency_summary("production", stats["production_ms"]),
+                    **_latency_summary("candidate", stats["candidate_ms"]),
+                }
+        out["targets"] = targets
+        return out
+
+
+def _latency_summary(prefix: str, samples) -> Dict[str, float | None]:
+    if not samples:
+        return {f"{prefix}_p50_ms": None, f"{prefix}_p99_ms": None}
+    p50, p99 = np.percentile(np.fromiter(samples, dtype=np.float64), [50, 99])
+    return {f"{prefix}_p50_ms": round(float(p50), 3), f"{prefix}_p99_ms": round(float(p99), 3)}
+
+
+_shadow: ShadowEvaluator | None = None
+
+
+def configure_shadow(model_dir: str | Path | None, sample_rate: float = 0.1, max_queue: int = 1000) -> None:
+    """Shadow-score the artifacts in model_dir on sample_rate of requests; an empty model_dir turns it off."""
+    global _shadow
+    stop_shadow()
+    if not model_dir:
+        return
+    path = Path(model_dir)
+    if not path.is_absolute():
+        path = MODEL_DIR.parents[1] / path
+    _shadow = ShadowEvaluator(path, sample_rate=sample_rate, max_queue=max_queue)
+    _shadow.start()
+
+
+def stop_shadow() -> None:
+    global _shadow
+    if _shadow is not None:
+        _shadow.close()
+        _shadow = None
+
+
+def shadow_stats() -> Dict[str, Any]:
+    if _shadow is None:
+        return {"enabled": False}
+    return {"enabled": True, **_shadow.stats()}
+
+
+def flush_shadow() -> None:
+    if _shadow is not None:
+        _shadow.flush()
+
+
+atexit.register(stop_shadow)
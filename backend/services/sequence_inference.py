@@ -0,0 +1,127 @@
+"""Next-visit risk from a user's assessment history with a small GRU.
+
+ml/training/train_lstm_gru.py trains the model. This module holds the pieces that training and
+serving share: how a visit becomes a vector, and the GRU step. It also holds the serving path.
+Training cuts each history into windows of max_len visits, each starting from a zero hidden
+state. Serving resets the state at the same visit boundaries, so the last visit is scored with the
+context it would have had in training. It keeps each user's hidden state after their last scored
+visit, so a request only runs the visits added since then.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict
+
+import numpy as np
+
+from ..models.db import get_connection
+from ..models.result_codec import decode_profile
+from .feature_engineering import profile_feature_frame
+from .model_inference import MODEL_DIR, _load_model, _risk_level
+
+DOMAINS = ["thyroid", "diabetes", "pcos", "adrenal", "metabolic"]
+SEQUENCE_MODEL_PATH = MODEL_DIR / "sequence_gru.pkl"
+VISIT_COLUMNS = (
+    "id, user_id, age, gender, bmi, profile_json, profile_blob, "
+    "thyroid_risk, diabetes_risk, pcos_risk, adrenal_risk, metabolic_risk"
+)
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+
+def stored_scores(rows: list[dict]) -> np.ndarray:
+    """Recorded domain scores ("72%") as an [n, 5] array in 0-1; missing scores count as 0."""
+    out = np.zeros((len(rows), len(DOMAINS)), dtype=np.float32)
+    for i, row in enumerate(rows):
+        for j, domain in enumerate(DOMAINS):
+            try:
+                out[i, j] = float(str(row.get(f"{domain}_risk")).rstrip("%")) / 100
+            except ValueError:
+                pass
+    return out
+
+
+def encode_visits(rows: list[dict], pre) -> np.ndarray:
+    """Visit vectors: the classical preprocessor on the visit's features, then its recorded scores."""
+    Xt = pre.transform(profile_feature_frame([decode_profile(r) for r in rows]))
+    Xt = Xt.toarray() if hasattr(Xt, "toarray") else np.asarray(Xt)
+    return np.hstack([Xt.astype(np.float32), stored_scores(rows)])
+
+
+def gru_step(params: Dict[str, np.ndarray], x: np.ndarray, h: np.ndarray) -> np.ndarray:
+    """One GRU update for a batch: x is [B, F], h is [B, H]."""
+    z = _sigmoid(x @ params["Wz"] + h @ params["Uz"] + params["bz"])
+    r = _sigmoid(x @ params["Wr"] + h @ params["Ur"] + params["br"])
+    n = np.tanh(x @ params["Wn"] + (r * h) @ params["Un"] + params["bn"])
+    return (1 - z) * n + z * h
+
+
+def gru_output(params: Dict[str, np.ndarray], h: np.ndarray) -> np.ndarray:
+    """Probability of each domain being High (>= 65) at the next visit."""
+    return _sigmoid(h @ params["Wo"] + params["bo"])
+
+
+def sequence_model_available() -> bool:
+    return SEQUENCE_MODEL_PATH.exists()
+
+
+# user_id -> (model fingerprint, last visit id folded in, visits seen, hidden state), least recent first.
+_hidden: "OrderedDict[int, tuple[str, int, int, np.ndarray]]" = OrderedDict()
+_hidden_lock = threading.Lock()
+MAX_CACHED_USERS = 10000
+
+
+def clear_hidden_cache() -> None:
+    with _hidden_lock:
+        _hidden.clear()
+
+
+def predict_next_visit(user_id: int) -> Dict[str, Any] | None:
+    """Score a user's next visit, or None without a model or any assessments."""
+    if not sequence_model_available():
+        return None
+    model = _load_model(SEQUENCE_MODEL_PATH)
+    params = model["params"]
+    fingerprint = model["fingerprint"]
+
+    with _hidden_lock:
+        cached = _hidden.get(user_id)
+    if cached is None or cached[0] != fingerprint:
+        last_id, seen, h = 0, 0, np.zeros((1, model["hidden_size"]), dtype=np.float32)
+    else:
+        _, last_id, seen, h = cached
+
+    conn = get_connection()
+    rows = conn.execute(
+        f"SELECT {VISIT_COLUMNS} FROM assessments WHERE user_id = ? AND id > ? ORDER BY id",
+        (user_id, last_id),
+    ).fetchall()
+    conn.close()
+    if rows:
+        rows = [dict(r) for r in rows]
+        for x in encode_visits(rows, model["pre"]):
+            if seen % model["max_len"] == 0:
+                h = np.zeros_like(h)
+            h = gru_step(params, x[None, :], h)
+            seen += 1
+        last_id = rows[-1]["id"]
+    if seen == 0:
+        return None
+
+    with _hidden_lock:
+        _hidden[user_id] = (fingerprint, last_id, seen, h)
+        _hidden.move_to_end(user_id)
+        while len(_hidden) > MAX_CACHED_USERS:
+            _hidden.popitem(last=False)
+
+    proba = gru_output(params, h)[0]
+    scores = {d: int(round(float(p) * 100)) for d, p in zip(DOMAINS, proba)}
+    return {
+        "risk_scores": {d: f"{s}%" for d, s in scores.items()},
+        "risk_level": {d: _risk_level(s) for d, s in scores.items()},
+        "visits": seen,
+        "last_assessment_id": last_id,
+        "prediction_source": "sequence_model",
+        "model_version": fingerprint,
+    }
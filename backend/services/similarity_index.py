@@ -0,0 +1,306 @@
+"""Nearest-neighbour search over encoded assessments ("similar patients").
+
+scripts/build_similarity_index.py encodes every assessment into a float32 vector and writes the
+vectors in segments next to the database, under similarity/. The encoding standardizes numeric
+features, one-hot encodes categories and multi-hot encodes symptom and family-history tokens.
+- A rebuild refits the encoder and rewrites every segment.
+- An update appends a segment with the rows above the stored watermark.
+
+The server memory-maps the segments. Rows saved since the last build are encoded in memory on
+the next query. A query is a brute-force scan of squared Euclidean distances, done in blocks of
+BLOCK_ROWS with a partial sort per block. That answers queries over hundreds of thousands of rows
+in milliseconds, with no tree structure to keep balanced as rows are appended.
+"""
+import json
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict
+
+import joblib
+import numpy as np
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from ..models import db
+from ..models.archive_model import iter_archive_rows
+from ..models.db import get_connection
+from ..models.result_codec import decode_profile
+from .feature_engineering import (
+    LIST_SEPARATOR,
+    NUMERIC_FEATURES,
+    WORD_SEPARATOR,
+    MultiHotEncoder,
+    profile_feature_frame,
+)
+
+CATEGORICAL_FEATURES = ["gender", "sleep_quality", "stress_level", "exercise_frequency", "diet_type"]
+ROW_COLUMNS = "id, age, gender, bmi, profile_json, profile_blob"
+RESULT_COLUMNS = (
+    "id, created_at, patient_name, age, gender, bmi, symptoms, "
+    "thyroid_risk, diabetes_risk, pcos_risk, adrenal_risk, metabolic_risk, risk_score"
+)
+DOMAINS = ["thyroid", "diabetes", "pcos", "adrenal", "metabolic"]
+BLOCK_ROWS = 65536
+FIT_SAMPLE = 50000
+
+
+def index_dir() -> Path:
+    return db.DB_PATH.parent / "similarity"
+
+
+def make_encoder() -> ColumnTransformer:
+    numeric = Pipeline([("imputer", SimpleImputer(strategy="mean", keep_empty_features=True)), ("scaler", StandardScaler())])
+    return ColumnTransformer(
+        [
+            ("num", numeric, NUMERIC_FEATURES),
+            ("cat", OneHotEncoder(handle_unknown="ignore"), CATEGORICAL_FEATURES),
+            ("symptoms", MultiHotEncoder(separator=LIST_SEPARATOR, min_count=5), ["symptoms"]),
+            ("family_history", MultiHotEncoder(separator=WORD_SEPARATOR, min_count=5), ["family_history"]),
+        ],
+        sparse_threshold=0,
+    )
+
+
+def feature_frame(rows: list[Dict[str, Any]]):
+    return profile_feature_frame([decode_profile(r) for r in rows])
+
+
+def encode_rows(encoder: ColumnTransformer, rows: list[Dict[str, Any]]) -> np.ndarray:
+    return np.ascontiguousarray(encoder.transform(feature_frame(rows)), dtype=np.float32)
+
+
+def _read_meta(folder: Path) -> Dict[str, Any] | None:
+    path = folder / "meta.json"
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_meta(folder: Path, meta: Dict[str, Any]) -> None:
+    tmp = folder / "meta.json.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    tmp.replace(folder / "meta.json")
+
+
+def _write_segments(conn, folder: Path, encoder, meta: Dict[str, Any], batch_size: int) -> int:
+    """Append one segment holding every row above meta's watermark; returns rows added."""
+    max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM assessments").fetchone()[0]
+    name = f"{len(meta['segments']):05d}"
+    ids, vectors, after = [], [], meta["watermark"]
+    while True:
+        rows = conn.execute(
+            f"SELECT {ROW_COLUMNS} FROM assessments WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+            (after, max_id, batch_size),
+        ).fetchall()
+        if not rows:
+            break
+        rows = [dict(r) for r in rows]
+        ids.append(np.array([r["id"] for r in rows], dtype=np.int64))
+        vectors.append(encode_rows(encoder, rows))
+        after = rows[-1]["id"]
+    if ids:
+        np.save(folder / f"ids-{name}.npy", np.concatenate(ids))
+        np.save(folder / f"vectors-{name}.npy", np.concatenate(vectors))
+        meta["segments"].append(name)
+    added = int(sum(len(i) for i in ids))
+    meta.update({"watermark": max_id, "rows": meta["rows"] + added, "updated_at": datetime.utcnow().isoformat(timespec="seconds") + "Z"})
+    return added
+
+
+def build_index(rebuild: bool = False, batch_size: int = 5000) -> Dict[str, Any]:
+    """Append new assessments to the on-disk index, or refit and rewrite it with rebuild=True."""
+    folder = index_dir()
+    meta = None if rebuild else _read_meta(folder)
+    conn = get_connection()
+    try:
+        if meta is None:
+            sample = [dict(r) for r in conn.execute(
+                f"SELECT {ROW_COLUMNS} FROM assessments ORDER BY RANDOM() LIMIT ?", (FIT_SAMPLE,)
+            ).fetchall()]
+            if not sample:
+                raise ValueError("No assessments to index")
+            encoder = make_encoder().fit(feature_frame(sample))
+            # Build next to the live index, then swap, so the server never sees a half-built one.
+            staging = folder.with_name(folder.name + ".new")
+            shutil.rmtree(staging, ignore_errors=True)
+            staging.mkdir(parents=True)
+            joblib.dump(encoder, staging / "encoder.pkl")
+            meta = {"segments": [], "watermark": 0, "rows": 0, "dims": len(encoder.get_feature_names_out())}
+            added = _write_segments(conn, staging, encoder, meta, batch_size)
+            _write_meta(staging, meta)
+            if folder.exists():
+                retired = folder.with_name(folder.name + ".old")
+                shutil.rmtree(retired, ignore_errors=True)
+                folder.rename(retired)
+                staging.rename(folder)
+                shutil.rmtree(retired, ignore_errors=True)
+            else:
+                staging.rename(folder)
+        else:
+            encoder = joblib.load(folder / "encoder.pkl")
+            added = _write_segments(conn, folder, encoder, meta, batch_size)
+            _write_meta(folder, meta)
+    finally:
+        conn.close()
+    return {**meta, "added": added}
+
+
+class SimilarityIndex:
+    """Memory-mapped segments plus an in-memory tail of rows saved since the last build."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._key = None
+        self._segments: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+
+    def _load(self) -> bool:
+        folder = index_dir()
+        meta_path = folder / "meta.json"
+        if not meta_path.exists():
+            self._key, self._segments = None, []
+            return False
+        key = (str(folder), meta_path.stat().st_mtime_ns)
+        if key == self._key:
+            return True
+        meta = _read_meta(folder)
+        self._encoder = joblib.load(folder / "encoder.pkl")
+        self._segments = []
+        for name in meta["segments"]:
+            vectors = np.load(folder / f"vectors-{name}.npy", mmap_mode="r")
+            ids = np.load(folder / f"ids-{name}.npy")
+            self._segments.append((ids, vectors, np.einsum("ij,ij->i", vectors, vectors)))
+        self._watermark = meta["watermark"]
+        self._tail_ids = np.empty(0, dtype=np.int64)
+        self._tail_vectors = np.empty((0, meta["dims"]), dtype=np.float32)
+        self._key = key
+        return True
+
+    def _catch_up(self, conn) -> None:
+        rows = conn.execute(
+            f"SELECT {ROW_COLUMNS} FROM assessments WHERE id > ? ORDER BY id", (self._watermark,)
+        ).fetchall()
+        if not rows:
+            return
+        rows = [dict(r) for r in rows]
+        self._tail_ids = np.concatenate([self._tail_ids, [r["id"] for r in rows]]).astype(np.int64)
+        self._tail_vectors = np.vstack([self._tail_vectors, encode_rows(self._encoder, rows)])
+        self._watermark = rows[-1]["id"]
+
+    def _all_segments(self):
+        tail = (self._tail_ids, self._tail_vectors, np.einsum("ij,ij->i", self._tail_vectors, self._tail_vectors))
+        return self._segments + [tail]
+
+    def _vector_for(self, conn, assessment_id: int) -> np.ndarray | None:
+        for ids, vectors, _ in self._all_segments():
+            pos = np.searchsorted(ids, assessment_id)
+            if pos < len(ids) and ids[pos] == assessment_id:
+                return np.asarray(vectors[pos], dtype=np.float32)
+        row = conn.execute(f"SELECT {ROW_COLUMNS} FROM assessments WHERE id = ?", (assessment_id,)).fetchone()
+        if row is None:
+            row = next(iter_archive_rows(conn, f"SELECT {ROW_COLUMNS} FROM {{table}} WHERE id = ?", (assessment_id,)), None)
+        return encode_rows(self._encoder, [dict(row)])[0] if row else None
+
+    def neighbours(self, assessment_id: int, k: int = 10) -> Dict[str, Any] | None:
+        """Ids and distances of the k assessments nearest to assessment_id, or None without an index."""
+        with self._lock:
+            if not self._load():
+                return None
+            conn = get_connection()
+            try:
+                self._catch_up(conn)
+                query = self._vector_for(conn, assessment_id)
+            finally:
+                conn.close()
+            segments = self._all_segments()
+        if query is None:
+            return {"found": False, "rows": sum(len(s[0]) for s in segments), "neighbours": []}
+
+        started = time.perf_counter()
+        qq = float(query @ query)
+        best_ids, best_dist = [], []
+        for ids, vectors, sq_norms in segments:
+            for start in range(0, len(ids), BLOCK_ROWS):
+                stop = min(start + BLOCK_ROWS, len(ids))
+                dist = sq_norms[start:stop] - 2.0 * (vectors[start:stop] @ query) + qq
+                # One spare slot in case the query row itself is among the nearest.
+                take = min(k + 1, stop - start)
+                top = np.argpartition(dist, take - 1)[:take]
+                best_ids.append(ids[start:stop][top])
+                best_dist.append(dist[top])
+        result = []
+        if best_ids:
+            ids, dist = np.concatenate(best_ids), np.concatenate(best_dist)
+            for i in np.argsort(dist, kind="stable"):
+                if ids[i] != assessment_id:
+                    result.append((int(ids[i]), float(np.sqrt(max(dist[i], 0.0)))))
+                if len(result) == k:
+                    break
+        return {
+            "found": True,
+            "rows": sum(len(s[0]) for s in segments),
+            "search_ms": round((time.perf_counter() - started) * 1000, 3),
+            "neighbours": result,
+        }
+
+
+_index = SimilarityIndex()
+
+
+def _details(ids: list[int]) -> Dict[int, Dict[str, Any]]:
+    details: Dict[int, Dict[str, Any]] = {}
+    conn = get_connection()
+    try:
+        placeholders = ", ".join("?" for _ in ids)
+        for row in conn.execute(f"SELECT {RESULT_COLUMNS} FROM assessments WHERE id IN ({placeholders})", ids):
+            details[row["id"]] = dict(row)
+        missing = [i for i in ids if i not in details]
+        if missing:
+            # Rows archived since the index was built keep their details in the month files.
+            placeholders = ", ".join("?" for _ in missing)
+            select = f"SELECT {RESULT_COLUMNS} FROM {{table}} WHERE id IN ({placeholders})"
+            for row in iter_archive_rows(conn, select, tuple(missing)):
+                details[row["id"]] = {**row, "archived": True}
+    finally:
+        conn.close()
+    return details
+
+
+def similar_assessments(assessment_id: int, k: int = 10) -> Dict[str, Any] | None:
+    """The k nearest stored assessments with their scores; None when no index has been built."""
+    wanted = k
+    while True:
+        found = _index.neighbours(assessment_id, wanted)
+        if found is None or not found["found"]:
+            return found
+        details = _details([i for i, _ in found["neighbours"]]) if found["neighbours"] else {}
+        neighbours = []
+        for neighbour_id, distance in found["neighbours"]:
+            row = details.get(neighbour_id)
+            if row is None:
+                continue
+            neighbours.append(
+                {
+                    "id": neighbour_id,
+                    "distance": round(distance, 4),
+                    "created_at": row["created_at"],
+                    "patient_name": row["patient_name"],
+                    "age": row["age"],
+                    "gender": row["gender"],
+                    "bmi": row["bmi"],
+                    "symptoms": row["symptoms"],
+                    "risk_scores": {d: row[f"{d}_risk"] for d in DOMAINS},
+                    "risk_score": row["risk_score"],
+                    "archived": row.get("archived", False),
+                }
+            )
+        # Rows deleted since the index was built are gone everywhere; ask for more to refill k.
+        if len(neighbours) >= k or len(found["neighbours"]) < wanted:
+            return {**found, "neighbours": neighbours[:k]}
+        wanted += k - len(neighbours)
@@ -11,16 +11,23 @@ function toListItems(targetId, items) {
   });
 }
 
-function renderRiskCards(scores, levels) {
+function ordinal(n) {
+  const suffix = n % 100 >= 11 && n % 100 <= 13 ? "th" : { 1: "st", 2: "nd", 3: "rd" }[n % 10] || "th";
+  return `${n}${suffix}`;
+}
+
+function renderRiskCards(scores, levels, percentiles) {
   const container = document.getElementById("risk-cards");
   container.innerHTML = "";
   Object.keys(scores).forEach((key) => {
     const card = document.createElement("div");
     card.className = "risk-card";
+    const rank = percentiles && percentiles[key] != null ? Math.round(percentiles[key]) : null;
     card.innerHTML = `
       <h4>${key}</h4>
       <p><strong>${scores[key]}</strong></p>
       <p class="level-${levels[key]}">${levels[key]}</p>
+      ${rank != null ? `<p class="muted">${ordinal(rank)} percentile</p>` : ""}
     `;
     container.appendChild(card);
   });
@@ -78,7 +85,7 @@ form.addEventListener("submit", async (e) => {
     aiWrap.classList.add("hidden");
   }
 
-  renderRiskCards(out.risk_scores, out.risk_level);
+  renderRiskCards(out.risk_scores, out.risk_level, (data.percentiles || {}).percentiles);
   toListItems("key-triggers", out.key_triggers);
   toListItems("actions", out.recommended_actions);
   toListItems("tests", out.suggested_tests);
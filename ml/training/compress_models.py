@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""Shrink the served pipelines after training and report what each variant costs and loses.
+
+For every target it builds these variants from <target>_best_model.pkl:
+
+- original: the artifact as trained.
+- compressed:
+  - For linear models, dense parameters are cast to float32: coefficients, scaler and imputer
+    statistics.
+  - Tree thresholds are rounded down to float32. Trees compare float32 inputs against them, so
+    splits are unchanged.
+  - Leaf values are left as they are: sklearn only loads float64 value arrays, so rounding them
+    would lose precision without saving any space.
+  - Sibling leaves whose outputs differ by at most --merge-tol are merged into their parent, and
+    this repeats up the tree. For boosting the tolerance is on the log-odds contribution
+    (learning_rate * leaf value). For forests it is on the averaged probability.
+  - The pickle is written with zlib compression.
+- distilled (--distill, ensembles only): a small gradient-boosting student.
+  - It is trained on the teacher's labels for the training split plus --augment synthetic rows.
+  - Each synthetic row copies a training row, then swaps each column for another row's value
+    with probability 0.5.
+  - It is then compressed the same way.
+
+Every variant is scored on the standard test split. The report gives its largest probability
+change from the original on that split. Its F1 delta is measured against both the
+original and the F1 recorded in metrics.json. Its latency, peak memory, node count and file size
+sit beside the scores in compression_report.json. --promote serves the recommended variant,
+which is the smallest one within --max-f1-drop of the original, and records it in metrics.json.
+"""
+import argparse
+import copy
+import json
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.tree._tree import Tree
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from dataset_io import dataset_path, read_dataset
+from train_classical_models import (
+    ARTIFACTS,
+    FEATURES,
+    METRICS_PATH,
+    TARGETS,
+    evaluate,
+    record_promotion,
+    serving_profile,
+    split_target,
+)
+
+COMPRESSED_DIR = ARTIFACTS / "compressed"
+REPORT_PATH = ARTIFACTS / "compression_report.json"
+FLOAT32_ATTRIBUTES = ("coef_", "intercept_", "mean_", "scale_", "var_", "statistics_")
+TREE_LEAF = -1
+TREE_UNDEFINED = -2
+# compact_tree rewrites sklearn's private Tree pickle state; this is the layout it is written against.
+TREE_STATE_KEYS = {"max_depth", "node_count", "nodes", "values"}
+TREE_NODE_FIELDS = {"left_child", "right_child", "feature", "threshold", "weighted_n_node_samples"}
+
+
+def iter_estimators(estimator):
+    """The estimator and every nested step, transformer and ensemble member."""
+    yield estimator
+    children = []
+    if hasattr(estimator, "steps"):
+        children = [step for _, step in estimator.steps]
+    elif hasattr(estimator, "transformers_"):
+        children = [t for _, t, _ in estimator.transformers_]
+    elif hasattr(estimator, "estimators_"):
+        children = list(np.ravel(estimator.estimators_))
+    for child in children:
+        if hasattr(child, "get_params"):
+            yield from iter_estimators(child)
+
+
+def cast_float32(estimator) -> None:
+    """Store dense float64 parameters as float32; sklearn upcasts them against float64 inputs."""
+    for est in iter_estimators(estimator):
+        for attr in FLOAT32_ATTRIBUTES:
+            value = getattr(est, attr, None)
+            if isinstance(value, np.ndarray) and value.dtype == np.float64:
+                setattr(est, attr, value.astype(np.float32))
+
+
+def _float32_floor(values: np.ndarray) -> np.ndarray:
+    """Largest float32 <= each value, returned as float64 (what sklearn's node arrays hold)."""
+    rounded = values.astype(np.float32)
+    rounded = np.where(rounded.astype(np.float64) > values, np.nextafter(rounded, np.float32(-np.inf)), rounded)
+    return rounded.astype(np.float64)
+
+
+def tree_state_supported(tree_: Tree) -> bool:
+    state = tree_.__getstate__()
+    fields = set(state.get("nodes", np.empty(0)).dtype.names or ())
+    return set(state) == TREE_STATE_KEYS and TREE_NODE_FIELDS <= fields and state["values"].ndim == 3
+
+
+def compact_tree(tree_: Tree, tol: float, scale: float) -> Tree:
+    """Copy of tree_ with float32-rounded thresholds and redundant splits merged."""
+    if not tree_state_supported(tree_):
+        raise ValueError(f"unsupported Tree state layout in scikit-learn {sklearn.__version__}")
+    state = tree_.__getstate__()
+    nodes, values = state["nodes"].copy(), state["values"].copy()
+    left, right = nodes["left_child"], nodes["right_child"]
+    weight = nodes["weighted_n_node_samples"]
+    is_leaf = left == TREE_LEAF
+
+    # Merge bottom-up without recursion: unbounded max_depth trees can be thousands of levels deep.
+    internal, stack = [], [0]
+    while stack:
+        i = stack.pop()
+        if not is_leaf[i]:
+            internal.append(i)
+            stack.extend((left[i], right[i]))
+    for i in reversed(internal):  # every node comes after its parent, so children are merged first
+        l, r = left[i], right[i]
+        if is_leaf[l] and is_leaf[r] and np.abs(values[l] - values[r]).max() * scale <= tol:
+            values[i] = (values[l] * weight[l] + values[r] * weight[r]) / (weight[l] + weight[r])
+            is_leaf[i] = True
+
+    # Re-number the reachable nodes in pre-order.
+    order, depth, stack = [], {0: 0}, [0]
+    while stack:
+        i = stack.pop()
+        order.append(i)
+        if not is_leaf[i]:
+            for child in (right[i], left[i]):
+                depth[child] = depth[i] + 1
+                stack.append(child)
+    new_index = {old: new for new, old in enumerate(order)}
+    out = nodes[order].copy()
+    for new, old in enumerate(order):
+        if is_leaf[old]:
+            out[new]["left_child"] = out[new]["right_child"] = TREE_LEAF
+            out[new]["feature"] = TREE_UNDEFINED
+            out[new]["threshold"] = TREE_UNDEFINED
+        else:
+            out[new]["left_child"] = new_index[left[old]]
+            out[new]["right_child"] = new_index[right[old]]
+    splits = ~is_leaf[order]
+    out["threshold"][splits] = _float32_floor(out["threshold"][splits])
+
+    compacted = Tree(tree_.n_features, np.asarray(tree_.n_classes, dtype=np.intp), tree_.n_outputs)
+    compacted.__setstate__(
+        {
+            "max_depth": max(depth[i] for i in order),
+            "node_count": len(order),
+            "nodes": out,
+            "values": np.ascontiguousarray(values[order]),
+        }
+    )
+    return compacted
+
+
+def compact_trees(clf, tol: float) -> None:
+    if not hasattr(clf, "estimators_"):
+        return
+    members = np.ravel(clf.estimators_)
+    if not members.size or not hasattr(members[0], "tree_"):
+        return
+    if not all(tree_state_supported(m.tree_) for m in members):
+        print(f"Tree state layout of scikit-learn {sklearn.__version__} is not supported; trees left as they are")
+        return
+    scale = getattr(clf, "learning_rate", None) or 1.0 / len(members)
+    for member in members:
+        member.tree_ = compact_tree(member.tree_, tol, scale)
+
+
+def node_count(clf) -> int | None:
+    if not hasattr(clf, "estimators_"):
+        return None
+    members = [m for m in np.ravel(clf.estimators_) if hasattr(m, "tree_")]
+    return sum(m.tree_.node_count for m in members) if members else None
+
+
+def compress(pipe: Pipeline, tol: float) -> Pipeline:
+    pipe = copy.deepcopy(pipe)
+    clf = pipe.steps[-1][1]
+    if node_count(clf) is None:
+        cast_float32(pipe)
+    else:
+        # Tree thresholds sit between adjacent float32 training values, so a scaler rounded to
+        # float32 can move inputs across them; the preprocessing in front of trees stays float64.
+        compact_trees(clf, tol)
+    return pipe
+
+
+def augment(X: pd.DataFrame, n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Synthetic rows: resampled training rows with each column swapped to a random row's value half the time."""
+    base = X.iloc[rng.integers(0, len(X), n)].reset_index(drop=True)
+    for col in X.columns:
+        donor = X[col].iloc[rng.integers(0, len(X), n)].reset_index(drop=True)
+        swap = rng.random(n) < 0.5
+        base[col] = base[col].where(~swap, donor)
+    return base
+
+
+def distill(teacher: Pipeline, X_train: pd.DataFrame, n_augment: int, n_trees: int, seed: int) -> Pipeline:
+    rng = np.random.default_rng(seed)
+    X_student = pd.concat([X_train, augment(X_train, n_augment, rng)], ignore_index=True)
+    y_student = (teacher.predict_proba(X_student)[:, 1] >= 0.5).astype(int)
+    pre = teacher.steps[0][1]
+    student = GradientBoostingClassifier(n_estimators=n_trees, max_depth=3, random_state=seed)
+    student.fit(pre.transform(X_student), y_student)
+    return Pipeline([("pre", pre), ("clf", student)])
+
+
+def describe(pipe: Pipeline, X_test: pd.DataFrame, y_test: pd.Series, path: Path, repeats: int) -> dict:
+    started = time.perf_counter()
+    loaded = joblib.load(path)
+    load_ms = (time.perf_counter() - started) * 1000
+    return {
+        **evaluate(y_test, loaded.predict(X_test)),
+        **serving_profile(loaded, X_test, repeats),
+        "file_kb": round(path.stat().st_size / 1024, 1),
+        "load_ms": round(load_ms, 2),
+        "nodes": node_count(pipe.steps[-1][1]),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compress the served models and compare them with the originals")
+    parser.add_argument("--merge-tol", type=float, default=1e-3, help="Max output change allowed per merged split")
+    parser.add_argument("--distill", action="store_true", help="Also train a small student for ensemble models")
+    parser.add_argument("--student-trees", type=int, default=30)
+    parser.add_argument("--augment", type=int, default=5000, help="Synthetic rows labelled by the teacher")
+    parser.add_argument("--max-f1-drop", type=float, default=0.005, help="Accepted F1 loss vs the original")
+    parser.add_argument("--latency-repeats", type=int, default=100)
+    parser.add_argument("--promote", action="store_true", help="Serve each target's recommended variant")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    df = read_dataset(columns=FEATURES + list(TARGETS.values()), path=dataset_path())
+    X = df[FEATURES]
+    recorded = {}
+    if METRICS_PATH.exists():
+        with open(METRICS_PATH, "r", encoding="utf-8") as f:
+            recorded = json.load(f)
+    COMPRESSED_DIR.mkdir(parents=True, exist_ok=True)
+
+    report = {}
+    for name, target_col in TARGETS.items():
+        served = ARTIFACTS / f"{name}_best_model.pkl"
+        if not served.exists():
+            print(f"[{name}] no served model; skipped")
+            continue
+        y = pd.to_numeric(df[target_col], errors="coerce").fillna(0).astype(int)
+        X_train, X_test, _, y_test = split_target(X, y)
+        original = joblib.load(served)
+        fingerprint = getattr(original, "model_fingerprint_", None)
+
+        variants = {"original": (original, served)}
+        compressed = compress(original, args.merge_tol)
+        variants["compressed"] = (compressed, COMPRESSED_DIR / f"{name}_compressed.pkl")
+        if args.distill and hasattr(original.steps[-1][1], "estimators_"):
+            student = compress(distill(original, X_train, args.augment, args.student_trees, args.seed), args.merge_tol)
+            variants["distilled"] = (student, COMPRESSED_DIR / f"{name}_distilled.pkl")
+
+        rows = {}
+        reference = original.predict_proba(X_test)[:, 1]
+        for variant, (pipe, path) in variants.items():
+            if variant != "original":
+                pipe.model_fingerprint_ = f"{fingerprint or 'unversioned'}+{variant}"
+                joblib.dump(pipe, path, compress=("zlib", 3))
+            rows[variant] = describe(pipe, X_test, y_test, path, args.latency_repeats)
+            rows[variant]["max_proba_diff"] = round(float(np.abs(pipe.predict_proba(X_test)[:, 1] - reference).max()), 6)
+
+        base = rows["original"]
+        recorded_f1 = recorded.get(name, {}).get("best", {}).get("f1")
+        for m in rows.values():
+            m["delta_f1"] = round(m["f1"] - base["f1"], 4)
+            m["delta_f1_vs_recorded"] = round(m["f1"] - recorded_f1, 4) if recorded_f1 is not None else None
+        eligible = [v for v, m in rows.items() if m["f1"] >= base["f1"] - args.max_f1_drop]
+        recommended = min(eligible, key=lambda v: (rows[v]["file_kb"], rows[v]["p99_ms"]))
+        report[name] = {
+            "model": type(original.steps[-1][1]).__name__,
+            "recorded_f1": recorded_f1,
+            "variants": rows,
+            "recommended": recommended,
+        }
+
+        table = pd.DataFrame(rows).T[["f1", "delta_f1", "max_proba_diff", "file_kb", "size_kb", "nodes", "p50_ms", "p99_ms", "loaded_kb", "peak_mem_kb"]]
+        print(f"[{name}] {report[name]['model']}, recommended: {recommended}")
+        print(table.to_string())
+
+        if args.promote and recommended != "original":
+            # Copy then rename, so the serving registry never loads a half-written file.
+            shutil.copyfile(variants[recommended][1], served.with_suffix(".pkl.tmp"))
+            served.with_suffix(".pkl.tmp").replace(served)
+            best = recorded.get(name, {}).get("best", {})
+            record_promotion(
+                name,
+                {
+                    **best,
+                    **rows[recommended],
+                    "model": f"{best.get('model', report[name]['model'])}+{recommended}",
+                    "fingerprint": variants[recommended][0].model_fingerprint_,
+                    "artifact": str(served),
+                    "reason": f"{recommended} variant promoted by compress_models",
+                },
+            )
+            report[name]["promoted"] = True
+
+    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved report: {REPORT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
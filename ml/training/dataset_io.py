@@ -0,0 +1,183 @@
+"""Typed reading/writing of the unified training dataset.
+
+The canonical on-disk format is Parquet with dtypes taken from `column_types` in
+ml/config/dataset_schema.json (categoricals for text fields, float64 markers, int8 labels).
+CSV stays supported as an export and as a fallback when no Parquet file exists yet.
+Multi-source merges and sharded synthetic data are written as a hive-partitioned Parquet
+directory (one `source=<name>` folder per input).
+
+Which output training reads is explicit: $TRAINING_DATASET when set, otherwise the pointer file
+the last writer (prepare_dataset.py, generate_demo_training_data.py) recorded, otherwise the CSV.
+"""
+from pathlib import Path
+import json
+import os
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[2]
+SCHEMA_PATH = ROOT / "ml" / "config" / "dataset_schema.json"
+PROCESSED_DIR = ROOT / "ml" / "data" / "processed"
+PARQUET_PATH = PROCESSED_DIR / "unified_endocrine_dataset.parquet"
+CSV_PATH = PROCESSED_DIR / "unified_endocrine_dataset.csv"
+PARTITIONED_PATH = PROCESSED_DIR / "unified_endocrine_dataset"
+CURRENT_PATH = PROCESSED_DIR / "current_dataset.txt"
+# Missing text answers; backend feature_engineering.build_feature_row sends the same at serving time.
+MISSING_CATEGORY = ""
+
+
+def load_schema() -> dict:
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def column_types(schema: dict | None = None) -> dict[str, str]:
+    return dict((schema or load_schema()).get("column_types", {}))
+
+
+def dataset_path() -> Path:
+    """$TRAINING_DATASET, else the output named in the pointer file, else the CSV export.
+
+    A pointer to an output that no longer exists is returned as is, so callers fail loudly instead
+    of silently training on another file.
+    """
+    override = os.getenv("TRAINING_DATASET", "").strip()
+    if override:
+        return Path(override)
+    if CURRENT_PATH.exists():
+        name = CURRENT_PATH.read_text(encoding="utf-8").strip()
+        if name:
+            return PROCESSED_DIR / name
+    return CSV_PATH
+
+
+def set_dataset_path(path: Path) -> None:
+    """Record `path` as the dataset training reads; relative to the processed folder when inside it."""
+    path = Path(path).resolve()
+    try:
+        name = str(path.relative_to(PROCESSED_DIR.resolve()))
+    except ValueError:
+        name = str(path)
+    CURRENT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    CURRENT_PATH.write_text(name + "\n", encoding="utf-8")
+
+
+def dataset_files(path: Path) -> list[Path]:
+    """Data files behind `path`, in a stable order (a single file or every part of a partitioned dataset)."""
+    if path.is_dir():
+        return sorted(path.glob("*/*.parquet"))
+    return [path]
+
+
+def _clean_categorical(values: pd.Series) -> pd.Series | None:
+    """Strip/fill an already categorical column through its categories; None if stripping merges any."""
+    categories = [str(c).strip() for c in values.cat.categories]
+    if len(set(categories)) != len(categories):
+        return None
+    values = values.cat.rename_categories(categories)
+    if values.isna().any():
+        if MISSING_CATEGORY not in categories:
+            values = values.cat.add_categories([MISSING_CATEGORY])
+        values = values.fillna(MISSING_CATEGORY)
+    return values
+
+
+def apply_schema(df: pd.DataFrame, schema: dict | None = None) -> pd.DataFrame:
+    types = column_types(schema)
+    for col, kind in types.items():
+        if col not in df.columns:
+            continue
+        if kind == "category":
+            cleaned = _clean_categorical(df[col]) if isinstance(df[col].dtype, pd.CategoricalDtype) else None
+            if cleaned is None:
+                cleaned = df[col].astype("string").fillna(MISSING_CATEGORY).str.strip().astype("category")
+            df[col] = cleaned
+        elif kind == "string":
+            df[col] = df[col].astype("string")
+        elif kind.startswith("int"):
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(kind)
+        else:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(kind)
+    return df
+
+
+def arrow_schema(columns: list[str], schema: dict | None = None):
+    """Fixed Arrow schema so every appended chunk shares one Parquet schema."""
+    import pyarrow as pa
+
+    kinds = {
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "string": pa.string(),
+        "float64": pa.float64(),
+        "int8": pa.int8(),
+    }
+    types = column_types(schema)
+    return pa.schema([(c, kinds.get(types.get(c, "string"), pa.string())) for c in columns])
+
+
+class DatasetAppender:
+    """Append DataFrame chunks to a Parquet or CSV file without holding the whole dataset in memory."""
+
+    def __init__(self, path: Path, schema: dict | None = None) -> None:
+        self.path = path
+        self.schema = schema or load_schema()
+        self.rows = 0
+        self._writer = None
+        self._arrow_schema = None
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            path.unlink()
+
+    def append(self, df: pd.DataFrame) -> None:
+        if self.path.suffix == ".csv":
+            df.to_csv(self.path, mode="a", header=self.rows == 0, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._writer is None:
+                self._arrow_schema = arrow_schema(list(df.columns), self.schema)
+                self._writer = pq.ParquetWriter(self.path, self._arrow_schema, compression="zstd")
+            table = pa.Table.from_pandas(apply_schema(df.copy(), self.schema), preserve_index=False)
+            self._writer.write_table(table.cast(self._arrow_schema))
+        self.rows += len(df)
+
+    def close(self) -> Path:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        return self.path
+
+
+def write_dataset(df: pd.DataFrame, path: Path = PARQUET_PATH, schema: dict | None = None) -> Path:
+    appender = DatasetAppender(path, schema)
+    appender.append(df)
+    return appender.close()
+
+
+def dataset_columns(path: Path | None = None) -> list[str]:
+    """Column names without loading any data."""
+    path = path or dataset_path()
+    if path.suffix == ".csv":
+        return list(pd.read_csv(path, nrows=0).columns)
+    if path.is_dir():
+        import pyarrow.dataset as ds
+
+        return list(ds.dataset(path, format="parquet", partitioning="hive").schema.names)
+    import pyarrow.parquet as pq
+
+    return list(pq.read_schema(path).names)
+
+
+def read_dataset(columns: list[str] | None = None, path: Path | None = None) -> pd.DataFrame:
+    """Read only `columns` (all when None). Parquet reads skip the other columns entirely."""
+    path = path or dataset_path()
+    if not path.exists():
+        raise FileNotFoundError(path)
+    if path.suffix == ".csv":
+        types = column_types()
+        usecols = None if columns is None else (lambda c: c in set(columns))
+        dtypes = {c: ("string" if t == "category" else t) for c, t in types.items() if not t.startswith("int")}
+        df = pd.read_csv(path, usecols=usecols, dtype=dtypes)
+        return apply_schema(df)
+    return pd.read_parquet(path, columns=columns, engine="pyarrow")
@@ -5,6 +5,21 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[2]
 METRICS = ROOT / "ml" / "artifacts" / "metrics.json"
 
+COLUMNS = [
+    ("f1", "f1", 7),
+    ("acc", "accuracy", 7),
+    ("p50_ms", "p50_ms", 8),
+    ("p99_ms", "p99_ms", 8),
+    ("b1000_ms", "batch1000_ms", 9),
+    ("size_kb", "size_kb", 9),
+    ("load_kb", "loaded_kb", 9),
+    ("mem_kb", "peak_mem_kb", 9),
+]
+
+
+def fmt(value, width: int) -> str:
+    return f"{'-' if value is None else value!s:>{width}}"
+
 
 def main() -> None:
     if not METRICS.exists():
@@ -21,6 +36,20 @@ def main() -> None:
             f"{target:10s} best={best.get('model')} "
             f"acc={best.get('accuracy')} prec={best.get('precision')} rec={best.get('recall')} f1={best.get('f1')}"
         )
+        if best.get("reason"):
+            print(f"{'':10s} selection={best.get('selection')} ({best['reason']})")
+
+    print()
+    header = f"{'target':10s} {'model':20s}" + "".join(f"{label:>{w}}" for label, _, w in COLUMNS)
+    print(header)
+    print("-" * len(header))
+    for target, info in data.items():
+        best_model = info.get("best", {}).get("model")
+        for model, m in info.items():
+            if model == "best":
+                continue
+            marker = "*" if model == best_model else " "
+            print(f"{target:10s} {marker}{model:19s}" + "".join(fmt(m.get(key), w) for _, key, w in COLUMNS))
 
 
 if __name__ == "__main__":
@@ -1,26 +1,25 @@
 #!/usr/bin/env python3
-from pathlib import Path
-
 import pandas as pd
 from sklearn.dummy import DummyClassifier
 from sklearn.metrics import f1_score
 from sklearn.model_selection import train_test_split
 
-ROOT = Path(__file__).resolve().parents[2]
-DATA_PATH = ROOT / "ml" / "data" / "processed" / "unified_endocrine_dataset.csv"
+from dataset_io import dataset_columns, dataset_path, read_dataset
+
 TARGET = "target_diabetes_risk"
 
 
 def main() -> None:
-    if not DATA_PATH.exists():
-        raise SystemExit(f"Dataset not found: {DATA_PATH}")
-
-    df = pd.read_csv(DATA_PATH)
-    if TARGET not in df.columns:
+    data_path = dataset_path()
+    if not data_path.exists():
+        raise SystemExit(f"Dataset not found: {data_path}")
+    if TARGET not in dataset_columns(data_path):
         raise SystemExit(f"Missing target column: {TARGET}")
 
+    # The most-frequent baseline only needs the label column.
+    df = read_dataset(columns=[TARGET], path=data_path)
     y = pd.to_numeric(df[TARGET], errors="coerce").fillna(0).astype(int)
-    X = df[[c for c in df.columns if c != TARGET]].copy()
+    X = pd.DataFrame(index=df.index)
 
     # Dummy setup for baseline F1 only.
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
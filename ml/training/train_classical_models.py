@@ -1,9 +1,22 @@
 #!/usr/bin/env python3
+import argparse
+import hashlib
+import inspect
+import io
 import json
+import os
+import shutil
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 import joblib
+import numpy as np
 import pandas as pd
+import sklearn
+from scipy import sparse
 from sklearn.compose import ColumnTransformer
 from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
 from sklearn.impute import SimpleImputer
@@ -13,11 +26,24 @@ from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.svm import SVC
+from threadpoolctl import threadpool_limits
 
 ROOT = Path(__file__).resolve().parents[2]
-DATA_PATH = ROOT / "ml" / "data" / "processed" / "unified_endocrine_dataset.csv"
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.services.drift_monitor import REFERENCE_PATH, write_reference
+from backend.services.feature_engineering import LIST_SEPARATOR, WORD_SEPARATOR, MultiHotEncoder
+from dataset_io import dataset_columns, dataset_files, dataset_path, read_dataset
+
 ARTIFACTS = ROOT / "ml" / "artifacts"
 METRICS_PATH = ARTIFACTS / "metrics.json"
+TIMINGS_PATH = ARTIFACTS / "training_timings.json"
+CACHE_DIR = ROOT / "ml" / "data" / "cache"
+FIT_CACHE_DIR = CACHE_DIR / "fits"
+TEST_SIZE = 0.2
+SPLIT_SEED = 42
+SERVING_PROFILE_VERSION = 2  # bump when serving_profile measures differently, so cached profiles are redone
 
 TARGETS = {
     "thyroid": "target_thyroid_risk",
@@ -48,7 +74,9 @@ FEATURES = [
 ]
 
 NUMERIC = ["age", "bmi", "tsh", "t3", "t4", "hba1c", "insulin", "cortisol", "cholesterol", "fasting_glucose"]
-CATEGORICAL = ["gender", "sleep_quality", "stress_level", "exercise_frequency", "diet_type", "family_history", "symptoms"]
+CATEGORICAL = ["gender", "sleep_quality", "stress_level", "exercise_frequency", "diet_type"]
+# Delimited text: one indicator per token instead of one column per distinct combination.
+MULTI_HOT = {"symptoms": LIST_SEPARATOR, "family_history": WORD_SEPARATOR}
 
 
 
@@ -70,14 +98,15 @@ def make_preprocessor() -> ColumnTransformer:
         [
             ("num", num_pipe, NUMERIC),
             ("cat", cat_pipe, CATEGORICAL),
+            *[(col, MultiHotEncoder(separator=sep), [col]) for col, sep in MULTI_HOT.items()],
         ]
     )
 
 
-def model_bank() -> dict:
+def model_bank(n_jobs: int = 1) -> dict:
     return {
         "logistic_regression": LogisticRegression(max_iter=1200),
-        "random_forest": RandomForestClassifier(n_estimators=220, random_state=42),
+        "random_forest": RandomForestClassifier(n_estimators=220, random_state=42, n_jobs=n_jobs),
         "gradient_boosting": GradientBoostingClassifier(random_state=42),
         "svm": SVC(probability=True, random_state=42),
     }
@@ -92,58 +121,503 @@ def evaluate(y_true, y_pred) -> dict:
     }
 
 
+def split_target(X: pd.DataFrame, y: pd.Series):
+    return train_test_split(
+        X, y, test_size=TEST_SIZE, random_state=SPLIT_SEED, stratify=y if y.nunique() > 1 else None
+    )
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    for part in dataset_files(path):
+        if path.is_dir():
+            digest.update(str(part.relative_to(path)).encode("utf-8"))
+        with open(part, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def encoding_hash() -> str:
+    """Hash of the code that produces an encoded split; repr() of the preprocessor misses edits to it."""
+    source = "".join(inspect.getsource(obj) for obj in (make_preprocessor, split_target, MultiHotEncoder))
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+
+
+def split_cache_key(data_hash: str, target: str) -> str:
+    spec = {
+        "data": data_hash,
+        "target": target,
+        "features": FEATURES,
+        "preprocessor": repr(make_preprocessor()),
+        "code": encoding_hash(),
+        "split": {"test_size": TEST_SIZE, "random_state": SPLIT_SEED},
+        "sklearn": sklearn.__version__,
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()[:20]
+
+
+def _save_matrix(path_stem: Path, matrix) -> Path:
+    if sparse.issparse(matrix):
+        path = path_stem.with_suffix(".npz")
+        sparse.save_npz(path, matrix.tocsr(), compressed=False)
+    else:
+        path = path_stem.with_suffix(".npy")
+        np.save(path, np.ascontiguousarray(matrix))
+    return path
+
+
+def load_matrix(path: str):
+    if path.endswith(".npz"):
+        return sparse.load_npz(path)
+    return np.load(path, mmap_mode="r")
+
+
+def _resolve(manifest: dict, folder: Path) -> dict:
+    return {k: (str(folder / v) if k in ("X_train", "X_test", "y_train", "y_test") else v) for k, v in manifest.items()}
+
+
+def encode_split(target: str, X: pd.DataFrame, y: pd.Series, data_hash: str, cache_dir: Path = CACHE_DIR) -> dict:
+    """Fit the preprocessor once for this target's split and cache the encoded matrices on disk.
+
+    Returns file paths (shared with worker processes) and the fitted preprocessor.
+    """
+    folder = cache_dir / split_cache_key(data_hash, target)
+    manifest_path = folder / "manifest.json"
+    if manifest_path.exists():
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = _resolve(json.load(f), folder)
+        manifest["pre"] = joblib.load(folder / "pre.pkl")
+        manifest["cached"] = True
+        return manifest
+
+    X_train, X_test, y_train, y_test = split_target(X, y)
+    pre = make_preprocessor()
+    Xt_train = pre.fit_transform(X_train)
+    Xt_test = pre.transform(X_test)
+
+    tmp = folder.with_name(folder.name + f".tmp{os.getpid()}")
+    tmp.mkdir(parents=True, exist_ok=True)
+    manifest = {
+        "X_train": _save_matrix(tmp / "X_train", Xt_train).name,
+        "X_test": _save_matrix(tmp / "X_test", Xt_test).name,
+        "y_train": _save_matrix(tmp / "y_train", y_train.to_numpy()).name,
+        "y_test": _save_matrix(tmp / "y_test", y_test.to_numpy()).name,
+        "n_features": int(Xt_train.shape[1]),
+    }
+    joblib.dump(pre, tmp / "pre.pkl")
+    with open(tmp / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    if folder.exists():
+        # Another run finished the same split first; keep theirs.
+        for child in tmp.iterdir():
+            child.unlink()
+        tmp.rmdir()
+    else:
+        tmp.rename(folder)
+
+    manifest = _resolve(manifest, folder)
+    manifest["pre"] = pre
+    manifest["cached"] = False
+    return manifest
+
+
+def fit_candidate(target: str, model_name: str, threads: int, paths: dict, params: dict | None = None) -> dict:
+    """Fit one classifier on the cached encoded split; runs in a worker limited to `threads` cores."""
+    started = time.perf_counter()
+    X_train, X_test = load_matrix(paths["X_train"]), load_matrix(paths["X_test"])
+    y_train, y_test = np.load(paths["y_train"]), np.load(paths["y_test"])
+    with threadpool_limits(limits=threads):
+        clf = model_bank(n_jobs=threads)[model_name]
+        if params:
+            clf.set_params(**params)
+        clf.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - started
+        preds = clf.predict(X_test)
+    return {
+        "target": target,
+        "model": model_name,
+        "clf": clf,
+        "metrics": evaluate(y_test, preds),
+        "fit_seconds": round(fit_seconds, 3),
+        "total_seconds": round(time.perf_counter() - started, 3),
+        "pid": os.getpid(),
+    }
+
+
+def code_hash() -> str:
+    """Hash of the code that determines a fitted model, so edits to it invalidate cached fits."""
+    source = "".join(inspect.getsource(fn) for fn in (make_preprocessor, model_bank, split_target, fit_candidate, evaluate))
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+
+
+def load_tuned_params(path: Path) -> dict[str, dict]:
+    """tune_models.py output without partial entries, whose search stopped before the full split."""
+    with open(path, "r", encoding="utf-8") as f:
+        tuned = json.load(f)
+    for name, models in tuned.items():
+        for model_name in [m for m, entry in models.items() if entry.get("partial")]:
+            print(f"[{name}] {model_name}: ignoring partial tuned params, using defaults")
+            del models[model_name]
+    return tuned
+
+
+def fit_fingerprint(split_key: str, model_name: str, params: dict | None, code: str) -> str:
+    """Content address of one fit: the encoded split (data, target, features, preprocessor), the
+    classifier's full configuration and the training code. n_jobs is left out since it only changes speed."""
+    clf = model_bank()[model_name]
+    if params:
+        clf.set_params(**params)
+    config = {k: v for k, v in clf.get_params().items() if k != "n_jobs"}
+    spec = {"split": split_key, "model": model_name, "config": config, "code": code}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, default=repr).encode("utf-8")).hexdigest()[:20]
+
+
+def load_cached_fit(fingerprint: str, cache_dir: Path = FIT_CACHE_DIR) -> dict | None:
+    folder = cache_dir / fingerprint
+    if not (folder / "result.json").exists():
+        return None
+    with open(folder / "result.json", "r", encoding="utf-8") as f:
+        res = json.load(f)
+    res["clf"] = joblib.load(folder / "clf.pkl")
+    res["cached"] = True
+    return res
+
+
+def store_fit(fingerprint: str, res: dict, cache_dir: Path = FIT_CACHE_DIR) -> None:
+    folder = cache_dir / fingerprint
+    tmp = folder.with_name(folder.name + f".tmp{os.getpid()}")
+    tmp.mkdir(parents=True, exist_ok=True)
+    joblib.dump(res["clf"], tmp / "clf.pkl")
+    update_cached_fit(fingerprint, res, tmp)
+    if folder.exists():
+        shutil.rmtree(tmp)
+    else:
+        tmp.rename(folder)
+
+
+def update_cached_fit(fingerprint: str, res: dict, folder: Path | None = None) -> None:
+    folder = folder or FIT_CACHE_DIR / fingerprint
+    if not folder.exists():
+        return
+    record = {k: v for k, v in res.items() if k not in ("clf", "cached", "pid")}
+    with open(folder / "result.json", "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+
+
+def _traced_peak(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def serving_profile(pipe: Pipeline, X_sample: pd.DataFrame, repeats: int = 100) -> dict:
+    """Measure what serving this pipeline costs: per-row and batch latency, artifact size, memory.
+
+    Memory is the classifier's own: `loaded_kb` is what the unpickled pipeline holds, and
+    `peak_mem_kb` is the classifier's peak on an already encoded batch, since the preprocessor
+    and pandas temporaries are the same for every candidate.
+    """
+    single = []
+    for i in range(repeats):
+        row = X_sample.iloc[[i % len(X_sample)]]
+        started = time.perf_counter()
+        pipe.predict_proba(row)
+        single.append((time.perf_counter() - started) * 1000)
+
+    batch = X_sample.sample(n=1000, replace=len(X_sample) < 1000, random_state=0)
+    batch_times = []
+    for _ in range(3):
+        started = time.perf_counter()
+        pipe.predict_proba(batch)
+        batch_times.append((time.perf_counter() - started) * 1000)
+
+    encoded = pipe[:-1].transform(batch)
+    peak = _traced_peak(lambda: pipe[-1].predict_proba(encoded))
+
+    buf = io.BytesIO()
+    joblib.dump(pipe, buf)
+    size = buf.tell()
+    buf.seek(0)
+    tracemalloc.start()
+    try:
+        loaded = joblib.load(buf)
+        held, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del loaded
+    return {
+        "p50_ms": round(float(np.percentile(single, 50)), 3),
+        "p99_ms": round(float(np.percentile(single, 99)), 3),
+        "batch1000_ms": round(min(batch_times), 3),
+        "size_kb": round(size / 1024, 1),
+        "loaded_kb": round(held / 1024, 1),
+        "peak_mem_kb": round(peak / 1024, 1),
+    }
+
+
+def pareto_front(candidates: dict[str, dict]) -> list[str]:
+    """Candidates not dominated on (higher f1, lower p99_ms, smaller size_kb)."""
+    front = []
+    for name, m in candidates.items():
+        dominated = any(
+            o["f1"] >= m["f1"]
+            and o["p99_ms"] <= m["p99_ms"]
+            and o["size_kb"] <= m["size_kb"]
+            and (o["f1"], -o["p99_ms"], -o["size_kb"]) != (m["f1"], -m["p99_ms"], -m["size_kb"])
+            for other, o in candidates.items()
+            if other != name
+        )
+        if not dominated:
+            front.append(name)
+    return front
+
+
+def select_best(candidates: dict[str, dict], policy: str, max_p99_ms: float | None, max_size_kb: float | None,
+                f1_tolerance: float) -> tuple[str, str]:
+    """Pick the serving model for one target. Returns (model_name, reason).
+
+    f1:     highest F1 (ties keep model-bank order).
+    slo:    highest F1 among models meeting --max-p99-ms / --max-size-kb; falls back to f1 if none do.
+    pareto: among Pareto-optimal models within --f1-tolerance of the best F1, the lowest p99 latency.
+    """
+    names = list(candidates)
+    by_f1 = max(names, key=lambda n: (candidates[n]["f1"], -names.index(n)))
+    if policy == "slo":
+        ok = [
+            n
+            for n in names
+            if (max_p99_ms is None or candidates[n]["p99_ms"] <= max_p99_ms)
+            and (max_size_kb is None or candidates[n]["size_kb"] <= max_size_kb)
+        ]
+        if not ok:
+            return by_f1, "slo unmet by all candidates; fell back to best f1"
+        return max(ok, key=lambda n: (candidates[n]["f1"], -names.index(n))), "best f1 within slo"
+    if policy == "pareto":
+        top_f1 = candidates[by_f1]["f1"]
+        near = [n for n in pareto_front(candidates) if candidates[n]["f1"] >= top_f1 - f1_tolerance]
+        pick = min(near, key=lambda n: (candidates[n]["p99_ms"], candidates[n]["size_kb"], names.index(n)))
+        return pick, f"fastest pareto-optimal model within {f1_tolerance} f1 of best"
+    return by_f1, "best f1"
+
+
+def served_fingerprint(path: Path) -> str | None:
+    """Fingerprint of the artifact serving actually loads; None when it is missing or unreadable."""
+    if not path.exists():
+        return None
+    try:
+        return getattr(joblib.load(path), "model_fingerprint_", None)
+    except Exception:
+        # An unreadable artifact is simply replaced.
+        return None
+
+
+def record_promotion(target: str, best: dict) -> None:
+    """Point metrics.json's `best` entry for target at a model promoted outside this script,
+    so the served artifact, its fingerprint and its metrics stay in step."""
+    metrics = {}
+    if METRICS_PATH.exists():
+        with open(METRICS_PATH, "r", encoding="utf-8") as f:
+            metrics = json.load(f)
+    metrics.setdefault(target, {})["best"] = best
+    tmp = METRICS_PATH.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(metrics, f, indent=2)
+    tmp.replace(METRICS_PATH)
+
+
+def plan_workers(n_jobs: int, cores: int) -> tuple[int, int]:
+    """Split the core budget into (worker processes, threads per worker) without oversubscribing."""
+    cores = max(1, cores)
+    workers = max(1, min(cores, n_jobs))
+    return workers, max(1, cores // workers)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Train classical models for every risk target")
+    parser.add_argument(
+        "--cores",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Global core budget shared by all concurrent fits (default: all cores)",
+    )
+    parser.add_argument("--params", type=Path, help="tuned_params.json from tune_models.py to override defaults")
+    parser.add_argument(
+        "--selection",
+        choices=["f1", "slo", "pareto"],
+        default="f1",
+        help="How to pick the served model per target (see select_best)",
+    )
+    parser.add_argument("--max-p99-ms", type=float, help="SLO: max single-row p99 latency per target")
+    parser.add_argument("--max-size-kb", type=float, help="SLO: max artifact size per target")
+    parser.add_argument("--f1-tolerance", type=float, default=0.01, help="Pareto: accepted F1 loss vs the best")
+    parser.add_argument("--latency-repeats", type=int, default=100, help="Single-row predictions timed per candidate")
+    return parser.parse_args()
+
+
 def main() -> None:
-    if not DATA_PATH.exists():
-        raise SystemExit(f"Dataset not found: {DATA_PATH}")
+    args = parse_args()
+    data_path = dataset_path()
+    if not data_path.exists():
+        raise SystemExit(f"Dataset not found: {data_path}")
 
-    df = pd.read_csv(DATA_PATH)
-    missing = [c for c in FEATURES + list(TARGETS.values()) if c not in df.columns]
+    needed = FEATURES + list(TARGETS.values())
+    missing = [c for c in needed if c not in dataset_columns(data_path)]
     if missing:
         raise SystemExit("Missing required columns: " + ", ".join(missing))
+    df = read_dataset(columns=needed, path=data_path)
 
     X = df[FEATURES]
     ARTIFACTS.mkdir(parents=True, exist_ok=True)
+    reference = write_reference(X, REFERENCE_PATH)
+    print(f"Saved drift reference: {REFERENCE_PATH} ({reference['rows']} rows)")
 
-    all_metrics = {}
+    # Preprocess each target's split once; every candidate classifier trains off the cached matrices.
+    data_hash = file_hash(data_path)
+    splits = {}
     for name, target_col in TARGETS.items():
         y = pd.to_numeric(df[target_col], errors="coerce").fillna(0).astype(int)
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y if y.nunique() > 1 else None
+        splits[name] = encode_split(name, X, y, data_hash)
+        state = "cache hit" if splits[name]["cached"] else "encoded"
+        print(f"[{name}] {state}: {splits[name]['n_features']} features")
+    paths = {
+        name: {k: v for k, v in split.items() if k in ("X_train", "X_test", "y_train", "y_test")}
+        for name, split in splits.items()
+    }
+
+    tuned = load_tuned_params(args.params) if args.params else {}
+
+    model_names = list(model_bank())
+    code = code_hash()
+    fingerprints = {
+        (name, model_name): fit_fingerprint(
+            split_cache_key(data_hash, name),
+            model_name,
+            tuned.get(name, {}).get(model_name, {}).get("params"),
+            code,
         )
+        for name in TARGETS
+        for model_name in model_names
+    }
+
+    # Unchanged (data, target, features, config, code) combinations reuse their cached fit.
+    results: dict[tuple[str, str], dict] = {}
+    for pair, fingerprint in fingerprints.items():
+        cached = load_cached_fit(fingerprint)
+        if cached is not None:
+            results[pair] = cached
+    jobs = [pair for pair in fingerprints if pair not in results]
+    workers, threads = plan_workers(len(jobs), args.cores)
+    print(
+        f"Training {len(jobs)} fits on {workers} worker(s) x {threads} thread(s) (core budget {args.cores}); "
+        f"{len(results)} reused from the fit cache"
+    )
 
-        best_model = None
-        best_score = -1
+    started = time.perf_counter()
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(
+                    fit_candidate,
+                    name,
+                    model_name,
+                    threads,
+                    paths[name],
+                    tuned.get(name, {}).get(model_name, {}).get("params"),
+                ): (name, model_name)
+                for name, model_name in jobs
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                res = future.result()
+                res["cached"] = False
+                results[futures[future]] = res
+                store_fit(fingerprints[futures[future]], res)
+                print(
+                    f"[{done}/{len(jobs)}] {res['target']}/{res['model']} f1={res['metrics']['f1']} "
+                    f"fit={res['fit_seconds']}s total={res['total_seconds']}s",
+                    flush=True,
+                )
+
+    # Assemble in fixed target/model order so metrics.json does not depend on completion order.
+    # Serving costs are measured here, one candidate at a time, so fits running in parallel don't skew them.
+    all_metrics = {}
+    timings = {"wall_seconds": round(time.perf_counter() - started, 3), "workers": workers, "threads": threads, "fits": {}}
+    X_sample = X.sample(n=min(len(X), 1000), random_state=0)
+    for name in TARGETS:
         target_metrics = {}
+        pipes = {}
+        for model_name in model_names:
+            res = results[(name, model_name)]
+            fingerprint = fingerprints[(name, model_name)]
+            clf = res["clf"]
+            if "n_jobs" in clf.get_params():
+                # Served one row at a time: parallel tree evaluation only adds thread start-up cost.
+                clf.set_params(n_jobs=1)
+            # Ship a single runnable pipeline: the shared fitted preprocessor plus the classifier.
+            pipes[model_name] = Pipeline([("pre", splits[name]["pre"]), ("clf", clf)])
+            pipes[model_name].model_fingerprint_ = fingerprint
+            serving = res.get("serving")
+            if (
+                not serving
+                or serving.get("repeats") != args.latency_repeats
+                or serving.get("version") != SERVING_PROFILE_VERSION
+            ):
+                serving = {
+                    **serving_profile(pipes[model_name], X_sample, repeats=args.latency_repeats),
+                    "repeats": args.latency_repeats,
+                    "version": SERVING_PROFILE_VERSION,
+                }
+                res["serving"] = serving
+                update_cached_fit(fingerprint, res)
+            target_metrics[model_name] = {
+                **res["metrics"],
+                **{k: v for k, v in serving.items() if k not in ("repeats", "version")},
+                "fingerprint": fingerprint,
+            }
+            timings["fits"][f"{name}/{model_name}"] = {
+                "fit_seconds": res["fit_seconds"],
+                "total_seconds": res["total_seconds"],
+                "cached": res["cached"],
+            }
 
-        for model_name, clf in model_bank().items():
-            pipe = Pipeline(
-                [
-                    ("pre", make_preprocessor()),
-                    ("clf", clf),
-                ]
-            )
-            pipe.fit(X_train, y_train)
-            preds = pipe.predict(X_test)
-            m = evaluate(y_test, preds)
-            target_metrics[model_name] = m
-
-            if m["f1"] > best_score:
-                best_score = m["f1"]
-                best_model = (model_name, pipe, m)
-
-        assert best_model is not None
-        best_name, best_pipe, best_m = best_model
+        best_name, reason = select_best(
+            target_metrics, args.selection, args.max_p99_ms, args.max_size_kb, args.f1_tolerance
+        )
         model_path = ARTIFACTS / f"{name}_best_model.pkl"
-        joblib.dump(best_pipe, model_path)
-        target_metrics["best"] = {"model": best_name, **best_m, "artifact": str(model_path)}
+        best_fingerprint = target_metrics[best_name]["fingerprint"]
+        # Compare with the file itself: metrics.json can lag behind a promotion or a manual copy.
+        unchanged = served_fingerprint(model_path) == best_fingerprint
+        if not unchanged:
+            # Mean encoded training row: the reference point for linear attributions at serving time.
+            X_train = load_matrix(splits[name]["X_train"])
+            pipes[best_name].attribution_baseline_ = np.asarray(X_train.mean(axis=0), dtype=np.float64).ravel()
+            joblib.dump(pipes[best_name], model_path)
+        target_metrics["best"] = {
+            "model": best_name,
+            **target_metrics[best_name],
+            "artifact": str(model_path),
+            "selection": args.selection,
+            "reason": reason,
+        }
         all_metrics[name] = target_metrics
 
-        print(f"[{name}] best={best_name} f1={best_m['f1']} saved={model_path.name}")
+        best_m = target_metrics[best_name]
+        print(
+            f"[{name}] best={best_name} f1={best_m['f1']} p99={best_m['p99_ms']}ms "
+            f"size={best_m['size_kb']}KB ({reason}) "
+            + (f"unchanged={model_path.name}" if unchanged else f"saved={model_path.name}")
+        )
 
     with open(METRICS_PATH, "w", encoding="utf-8") as f:
         json.dump(all_metrics, f, indent=2)
+    with open(TIMINGS_PATH, "w", encoding="utf-8") as f:
+        json.dump(timings, f, indent=2)
 
     print(f"Saved metrics: {METRICS_PATH}")
+    print(f"Training wall time: {timings['wall_seconds']}s")
 
 
 if __name__ == "__main__":
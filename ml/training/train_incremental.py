@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Incremental retraining from new assessments in the app database.
+
+One SGD logistic-regression pipeline per target lives under ml/artifacts/incremental/. The first run
+bootstraps them from the unified dataset. Later runs read only assessments with an id above the
+stored watermark and update each model with partial_fit, so a nightly refresh costs time
+proportional to the new rows. Those rows are relabelled with the rule engine, because the stored
+scores may come from the served models themselves.
+
+Every run with new rows writes a new version per target and advances the watermark in state.json.
+--promote copies the newest version over <target>_best_model.pkl, which serving loads, and
+records it as the target's best model in metrics.json.
+"""
+import argparse
+import json
+import shutil
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import log_loss
+from sklearn.pipeline import Pipeline
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.models.db import get_connection
+from backend.models.result_codec import decode_profile
+from backend.services.feature_engineering import build_feature_row
+from backend.services.risk_engine import calculate_risk
+from dataset_io import dataset_path, read_dataset
+from train_classical_models import (
+    ARTIFACTS,
+    FEATURES,
+    NUMERIC,
+    TARGETS,
+    evaluate,
+    make_preprocessor,
+    record_promotion,
+)
+
+INCREMENTAL_DIR = ARTIFACTS / "incremental"
+STATE_PATH = INCREMENTAL_DIR / "state.json"
+
+
+def new_classifier() -> SGDClassifier:
+    return SGDClassifier(loss="log_loss", alpha=1e-4, random_state=42)
+
+
+def load_state() -> dict | None:
+    if not STATE_PATH.exists():
+        return None
+    with open(STATE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state: dict) -> None:
+    tmp = STATE_PATH.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    tmp.replace(STATE_PATH)
+
+
+def version_path(target: str, version: int) -> Path:
+    return INCREMENTAL_DIR / target / f"v{version:04d}.pkl"
+
+
+def bootstrap() -> dict[str, Pipeline]:
+    """Version 1: fit the preprocessor and an SGD classifier per target on the unified dataset."""
+    df = read_dataset(columns=FEATURES + list(TARGETS.values()), path=dataset_path())
+    X = df[FEATURES]
+    pre = make_preprocessor().fit(X)
+    Xt = pre.transform(X)
+    pipes = {}
+    for name, target_col in TARGETS.items():
+        y = pd.to_numeric(df[target_col], errors="coerce").fillna(0).astype(int).to_numpy()
+        clf = new_classifier()
+        clf.partial_fit(Xt, y, classes=np.array([0, 1]))
+        for _ in range(4):
+            clf.partial_fit(Xt, y)
+        pipes[name] = Pipeline([("pre", pre), ("clf", clf)])
+    print(f"Bootstrapped {len(pipes)} models from {len(df)} dataset rows")
+    return pipes
+
+
+def iter_new_assessments(after_id: int, batch_size: int):
+    """Yield (last_id, features, labels) batches of assessments with id > after_id, oldest first."""
+    conn = get_connection()
+    try:
+        while True:
+            rows = conn.execute(
+                """
+                SELECT id, age, gender, bmi, profile_json, profile_blob
+                FROM assessments
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
+                """,
+                (after_id, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            features, labels = [], []
+            for row in rows:
+                profile = decode_profile(dict(row))
+                markers = profile.get("Lab results (optional)") or {}
+                features.append(build_feature_row(profile, markers))
+                scores = calculate_risk(profile, markers)["risk_scores"]
+                labels.append({name: int(int(str(scores[name]).rstrip("%")) >= 65) for name in TARGETS})
+            after_id = rows[-1]["id"]
+            X = pd.DataFrame(features, columns=FEATURES)
+            for col in NUMERIC:
+                X[col] = pd.to_numeric(X[col], errors="coerce")
+            yield after_id, X, pd.DataFrame(labels)
+    finally:
+        conn.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Update SGD models with assessments newer than the watermark")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Assessments read and fitted at a time")
+    parser.add_argument("--promote", action="store_true", help="Serve the new version (<target>_best_model.pkl)")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the stored state and bootstrap again")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    started = time.perf_counter()
+    INCREMENTAL_DIR.mkdir(parents=True, exist_ok=True)
+
+    state = None if args.rebuild else load_state()
+    if state is None:
+        pipes = bootstrap()
+        state = {"version": 0, "watermark": 0, "history": []}
+    else:
+        pipes = {name: joblib.load(version_path(name, state["version"])) for name in TARGETS}
+
+    watermark = state["watermark"]
+    rows = 0
+    # Prequential metrics: each batch is scored by the model before the model learns from it.
+    seen = {name: {"y": [], "pred": [], "proba": []} for name in TARGETS}
+    for last_id, X, y in iter_new_assessments(watermark, args.batch_size):
+        Xt = pipes["thyroid"].named_steps["pre"].transform(X)
+        for name in TARGETS:
+            clf = pipes[name].named_steps["clf"]
+            seen[name]["y"].append(y[name].to_numpy())
+            seen[name]["pred"].append(clf.predict(Xt))
+            seen[name]["proba"].append(clf.predict_proba(Xt)[:, 1])
+            clf.partial_fit(Xt, y[name].to_numpy())
+        rows += len(X)
+        watermark = last_id
+
+    if rows == 0 and state["version"] > 0:
+        print(f"No assessments after id {watermark}; keeping version {state['version']}")
+        return
+
+    version = state["version"] + 1
+    metrics = {}
+    for name in TARGETS:
+        path = version_path(name, version)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pipes[name].model_fingerprint_ = f"incremental-v{version:04d}-{watermark}"
+        joblib.dump(pipes[name], path)
+        if rows:
+            y_true = np.concatenate(seen[name]["y"])
+            proba = np.concatenate(seen[name]["proba"])
+            metrics[name] = {
+                **evaluate(y_true, np.concatenate(seen[name]["pred"])),
+                "log_loss": round(float(log_loss(y_true, proba, labels=[0, 1])), 4),
+            }
+
+    entry = {
+        "version": version,
+        "watermark": watermark,
+        "rows": rows,
+        "seconds": round(time.perf_counter() - started, 3),
+        "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "prequential": metrics,
+    }
+    if args.promote:
+        for name in TARGETS:
+            # Copy then rename, so the serving registry never loads a half-written file.
+            served = ARTIFACTS / f"{name}_best_model.pkl"
+            shutil.copyfile(version_path(name, version), served.with_suffix(".pkl.tmp"))
+            served.with_suffix(".pkl.tmp").replace(served)
+            record_promotion(
+                name,
+                {
+                    "model": "sgd_incremental",
+                    **metrics.get(name, {}),
+                    "fingerprint": pipes[name].model_fingerprint_,
+                    "artifact": str(served),
+                    "selection": "incremental",
+                    "reason": f"promoted incremental version {version} (prequential metrics)",
+                },
+            )
+        state["promoted_version"] = version
+        entry["promoted"] = True
+    state.update({"version": version, "watermark": watermark})
+    state["history"].append(entry)
+    save_state(state)
+
+    for name, m in metrics.items():
+        print(f"[{name}] prequential f1={m['f1']} log_loss={m['log_loss']}")
+    print(
+        f"Version {version}: {rows} new assessment(s), watermark id {watermark}, "
+        f"{entry['seconds']}s{' (promoted)' if args.promote else ''}"
+    )
+
+
+if __name__ == "__main__":
+    main()
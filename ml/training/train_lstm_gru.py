@@ -1,13 +1,337 @@
 #!/usr/bin/env python3
-"""Placeholder for Phase-3 sequence modeling.
+"""Train a GRU on users' assessment histories to predict next-visit risk.
 
-This file is intentionally kept minimal for now.
-For college submission, start with classical ML and add LSTM/GRU in next phase.
+Histories are read from the app database with a single `ORDER BY user_id, id` query and
+fetched in chunks. A user's visits can span two chunks. Each user's history is cut into
+windows of at most --max-len steps. Every step is trained to predict whether each domain is
+High (>= 65) at the following visit.
+
+The windows go into zero-padded, memory-mapped tensors under ml/data/cache/sequences/, so a
+database larger than RAM can still be trained on. A first COUNT query sizes the tensors. The
+GRU is written in NumPy and trained with truncated BPTT and Adam, which runs comfortably on a
+CPU. It is saved to ml/artifacts/sequence_gru.pkl, where backend/services/sequence_inference.py
+serves it.
 """
+import argparse
+import hashlib
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.models.db import get_connection
+from backend.services.sequence_inference import (
+    DOMAINS,
+    SEQUENCE_MODEL_PATH,
+    VISIT_COLUMNS,
+    _sigmoid,
+    encode_visits,
+    gru_output,
+    gru_step,
+    stored_scores,
+)
+from dataset_io import dataset_path, read_dataset
+from train_classical_models import CACHE_DIR, FEATURES, evaluate, make_preprocessor
+
+SEQUENCE_DIR = CACHE_DIR / "sequences"
+HIGH = 0.65
+
+
+def n_windows(visits: int, max_len: int) -> int:
+    """Windows covering every (visit, next visit) transition once."""
+    return -(-(visits - 1) // max_len) if visits > 1 else 0
+
+
+def count_windows(conn, max_id: int, min_visits: int, max_len: int) -> tuple[int, int]:
+    rows = conn.execute(
+        """
+        SELECT COUNT(*) AS visits FROM assessments
+        WHERE user_id IS NOT NULL AND id <= ?
+        GROUP BY user_id HAVING COUNT(*) >= ?
+        """,
+        (max_id, max(2, min_visits)),
+    ).fetchall()
+    return len(rows), sum(n_windows(r["visits"], max_len) for r in rows)
+
+
+def iter_user_batches(conn, max_id: int, chunk_size: int):
+    """Yield lists of (user_id, visits) holding about chunk_size visits, users kept whole."""
+    cursor = conn.execute(
+        f"SELECT {VISIT_COLUMNS} FROM assessments WHERE user_id IS NOT NULL AND id <= ? ORDER BY user_id, id",
+        (max_id,),
+    )
+    batch, batch_rows = [], 0
+    user_id, visits = None, []
+    while True:
+        chunk = cursor.fetchmany(chunk_size)
+        if not chunk:
+            break
+        for row in chunk:
+            if row["user_id"] != user_id:
+                if visits:
+                    batch.append((user_id, visits))
+                    batch_rows += len(visits)
+                user_id, visits = row["user_id"], []
+            visits.append(dict(row))
+        if batch_rows >= chunk_size:
+            yield batch
+            batch, batch_rows = [], 0
+    if visits:
+        batch.append((user_id, visits))
+    if batch:
+        yield batch
+
+
+def build_tensors(pre, out_dir: Path, max_len: int, min_visits: int, chunk_size: int) -> dict:
+    """Write X [n, T, F] float32, Y [n, T, 5] uint8, lengths and user ids as .npy memmaps."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    conn = get_connection()
+    try:
+        # Bound both passes by the same id so rows written meanwhile cannot overflow the tensors.
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM assessments").fetchone()[0]
+        users, n_seq = count_windows(conn, max_id, min_visits, max_len)
+        if n_seq == 0:
+            raise SystemExit(f"No user with at least {max(2, min_visits)} assessments; nothing to train on.")
+        n_features = len(pre.get_feature_names_out()) + len(DOMAINS)
+
+        X = np.lib.format.open_memmap(out_dir / "X.npy", mode="w+", dtype=np.float32, shape=(n_seq, max_len, n_features))
+        Y = np.lib.format.open_memmap(out_dir / "Y.npy", mode="w+", dtype=np.uint8, shape=(n_seq, max_len, len(DOMAINS)))
+        lengths = np.lib.format.open_memmap(out_dir / "lengths.npy", mode="w+", dtype=np.int32, shape=(n_seq,))
+        owners = np.lib.format.open_memmap(out_dir / "users.npy", mode="w+", dtype=np.int64, shape=(n_seq,))
+
+        i = 0
+        for batch in iter_user_batches(conn, max_id, chunk_size):
+            batch = [(uid, visits) for uid, visits in batch if len(visits) >= max(2, min_visits)]
+            if not batch:
+                continue
+            rows = [row for _, visits in batch for row in visits]
+            vectors = encode_visits(rows, pre)
+            labels = stored_scores(rows) >= HIGH
+            offset = 0
+            for uid, visits in batch:
+                v = vectors[offset : offset + len(visits)]
+                lab = labels[offset : offset + len(visits)]
+                offset += len(visits)
+                for start in range(0, len(visits) - 1, max_len):
+                    m = min(max_len, len(visits) - 1 - start)
+                    X[i, :m] = v[start : start + m]
+                    Y[i, :m] = lab[start + 1 : start + 1 + m]
+                    lengths[i] = m
+                    owners[i] = uid
+                    i += 1
+        for array in (X, Y, lengths, owners):
+            array.flush()
+    finally:
+        conn.close()
+    return {"users": users, "sequences": n_seq, "steps": int(lengths.sum()), "features": n_features, "max_id": max_id}
+
+
+def init_params(rng: np.random.Generator, n_features: int, hidden: int) -> dict:
+    def glorot(rows: int, cols: int) -> np.ndarray:
+        limit = np.sqrt(6.0 / (rows + cols))
+        return rng.uniform(-limit, limit, (rows, cols)).astype(np.float32)
+
+    params = {}
+    for gate in ("z", "r", "n"):
+        params[f"W{gate}"] = glorot(n_features, hidden)
+        params[f"U{gate}"] = glorot(hidden, hidden)
+        params[f"b{gate}"] = np.zeros(hidden, dtype=np.float32)
+    params["Wo"] = glorot(hidden, len(DOMAINS))
+    params["bo"] = np.zeros(len(DOMAINS), dtype=np.float32)
+    return params
+
+
+def forward_backward(params: dict, X: np.ndarray, Y: np.ndarray, mask: np.ndarray) -> tuple[float, dict]:
+    """Masked mean binary cross-entropy over valid steps and its gradients (BPTT)."""
+    B, T, _ = X.shape
+    hidden = params["Uz"].shape[0]
+    h = np.zeros((B, hidden), dtype=np.float32)
+    steps, outputs = [], []
+    for t in range(T):
+        x = X[:, t]
+        z = _sigmoid(x @ params["Wz"] + h @ params["Uz"] + params["bz"])
+        r = _sigmoid(x @ params["Wr"] + h @ params["Ur"] + params["br"])
+        n = np.tanh(x @ params["Wn"] + (r * h) @ params["Un"] + params["bn"])
+        steps.append((x, h, z, r, n))
+        h = (1 - z) * n + z * h
+        outputs.append((h, gru_output(params, h)))
+
+    scale = 1.0 / max(float(mask.sum()) * len(DOMAINS), 1.0)
+    grads = {k: np.zeros_like(v) for k, v in params.items()}
+    loss = 0.0
+    dh_next = np.zeros((B, hidden), dtype=np.float32)
+    for t in reversed(range(T)):
+        h_t, p = outputs[t]
+        y = Y[:, t]
+        m = mask[:, t, None]
+        p_safe = np.clip(p, 1e-7, 1 - 1e-7)
+        loss -= float((m * (y * np.log(p_safe) + (1 - y) * np.log(1 - p_safe))).sum()) * scale
+        dlogit = (p - y) * m * scale
+        grads["Wo"] += h_t.T @ dlogit
+        grads["bo"] += dlogit.sum(axis=0)
+        dh = dh_next + dlogit @ params["Wo"].T
+
+        x, h_prev, z, r, n = steps[t]
+        da_n = dh * (1 - z) * (1 - n**2)
+        da_z = dh * (h_prev - n) * z * (1 - z)
+        d_rh = da_n @ params["Un"].T
+        da_r = d_rh * h_prev * r * (1 - r)
+        grads["Wn"] += x.T @ da_n
+        grads["Un"] += (r * h_prev).T @ da_n
+        grads["bn"] += da_n.sum(axis=0)
+        grads["Wz"] += x.T @ da_z
+        grads["Uz"] += h_prev.T @ da_z
+        grads["bz"] += da_z.sum(axis=0)
+        grads["Wr"] += x.T @ da_r
+        grads["Ur"] += h_prev.T @ da_r
+        grads["br"] += da_r.sum(axis=0)
+        dh_next = dh * z + d_rh * r + da_z @ params["Uz"].T + da_r @ params["Ur"].T
+    return loss, grads
+
+
+def predict_sequences(params: dict, X: np.ndarray) -> np.ndarray:
+    h = np.zeros((X.shape[0], params["Uz"].shape[0]), dtype=np.float32)
+    out = np.empty((X.shape[0], X.shape[1], len(DOMAINS)), dtype=np.float32)
+    for t in range(X.shape[1]):
+        h = gru_step(params, X[:, t], h)
+        out[:, t] = gru_output(params, h)
+    return out
+
+
+def step_mask(lengths: np.ndarray, max_len: int) -> np.ndarray:
+    return (np.arange(max_len)[None, :] < lengths[:, None]).astype(np.float32)
+
+
+def score(params: dict, X, Y, lengths, idx: np.ndarray, batch_size: int) -> dict:
+    """Per-domain metrics on valid steps, next to carrying the current visit's level forward."""
+    probs, truth, current = [], [], []
+    for start in range(0, len(idx), batch_size):
+        sel = idx[start : start + batch_size]
+        xb = np.asarray(X[sel])
+        valid = step_mask(lengths[sel], xb.shape[1]).astype(bool)
+        probs.append(predict_sequences(params, xb)[valid])
+        truth.append(np.asarray(Y[sel])[valid])
+        current.append(xb[valid][:, -len(DOMAINS) :] >= HIGH)
+    probs, truth, current = np.concatenate(probs), np.concatenate(truth), np.concatenate(current)
+    report = {}
+    for j, domain in enumerate(DOMAINS):
+        p = np.clip(probs[:, j], 1e-7, 1 - 1e-7)
+        report[domain] = {
+            **evaluate(truth[:, j], (probs[:, j] >= 0.5).astype(int)),
+            "log_loss": round(float(-np.mean(truth[:, j] * np.log(p) + (1 - truth[:, j]) * np.log(1 - p))), 4),
+            "persistence_f1": evaluate(truth[:, j], current[:, j].astype(int))["f1"],
+        }
+    return report
+
+
+def train(X, Y, lengths, owners, args) -> tuple[dict, dict]:
+    rng = np.random.default_rng(args.seed)
+    # Hold out whole users so no window of a validation user is seen in training.
+    unique = np.unique(owners)
+    val_users = rng.choice(unique, size=int(round(len(unique) * args.val_fraction)), replace=False)
+    is_val = np.isin(owners, val_users)
+    train_idx, val_idx = np.flatnonzero(~is_val), np.flatnonzero(is_val)
+
+    params = init_params(rng, X.shape[2], args.hidden)
+    moments = {k: (np.zeros_like(v), np.zeros_like(v)) for k, v in params.items()}
+    beta1, beta2, step = 0.9, 0.999, 0
+    for epoch in range(1, args.epochs + 1):
+        started = time.perf_counter()
+        order = rng.permutation(train_idx)
+        total, batches = 0.0, 0
+        for start in range(0, len(order), args.batch_size):
+            # Sorted indices turn the memmap gather into mostly sequential reads.
+            sel = np.sort(order[start : start + args.batch_size])
+            xb, yb, lb = np.asarray(X[sel]), np.asarray(Y[sel], dtype=np.float32), lengths[sel]
+            # Trim padding past the longest window in the batch.
+            T = int(lb.max())
+            loss, grads = forward_backward(params, xb[:, :T], yb[:, :T], step_mask(lb, T))
+            norm = np.sqrt(sum(float((g**2).sum()) for g in grads.values()))
+            clip = min(1.0, args.clip / max(norm, 1e-12))
+            step += 1
+            for k, g in grads.items():
+                m, v = moments[k]
+                m *= beta1
+                m += (1 - beta1) * g * clip
+                v *= beta2
+                v += (1 - beta2) * (g * clip) ** 2
+                update = args.lr * (m / (1 - beta1**step)) / (np.sqrt(v / (1 - beta2**step)) + 1e-8)
+                params[k] -= update.astype(np.float32)
+            total += loss
+            batches += 1
+        print(f"epoch {epoch:3d}  loss {total / max(batches, 1):.4f}  {time.perf_counter() - started:.2f}s")
+
+    metrics = {"train_sequences": int(len(train_idx)), "val_sequences": int(len(val_idx))}
+    if len(val_idx):
+        metrics["validation"] = score(params, X, Y, lengths, val_idx, args.batch_size)
+    return params, metrics
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Train the next-visit GRU on per-user assessment histories")
+    parser.add_argument("--max-len", type=int, default=12, help="Steps per window; longer histories are split")
+    parser.add_argument("--min-visits", type=int, default=2, help="Skip users with fewer assessments")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows fetched from SQLite at a time")
+    parser.add_argument("--hidden", type=int, default=32)
+    parser.add_argument("--epochs", type=int, default=15)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--lr", type=float, default=0.005)
+    parser.add_argument("--clip", type=float, default=5.0, help="Global gradient-norm clip")
+    parser.add_argument("--val-fraction", type=float, default=0.2, help="Share of users held out")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--work-dir", type=Path, default=SEQUENCE_DIR, help="Where the memmapped tensors go")
+    return parser.parse_args()
 
 
 def main() -> None:
-    print("Phase-3 placeholder: implement LSTM/GRU using longitudinal sequence dataset")
+    args = parse_args()
+    started = time.perf_counter()
+
+    df = read_dataset(columns=FEATURES, path=dataset_path())
+    pre = make_preprocessor().fit(df[FEATURES])
+    info = build_tensors(pre, args.work_dir, args.max_len, args.min_visits, args.chunk_size)
+    print(
+        f"Sequences: {info['sequences']} window(s) from {info['users']} user(s), {info['steps']} step(s), "
+        f"{info['features']} features/visit ({time.perf_counter() - started:.1f}s)"
+    )
+
+    X = np.load(args.work_dir / "X.npy", mmap_mode="r")
+    Y = np.load(args.work_dir / "Y.npy", mmap_mode="r")
+    lengths = np.load(args.work_dir / "lengths.npy")
+    owners = np.load(args.work_dir / "users.npy")
+    params, metrics = train(X, Y, lengths, owners, args)
+
+    digest = hashlib.sha256()
+    for key in sorted(params):
+        digest.update(params[key].tobytes())
+    model = {
+        "pre": pre,
+        "params": params,
+        "hidden_size": args.hidden,
+        "max_len": args.max_len,
+        "domains": DOMAINS,
+        "fingerprint": digest.hexdigest()[:16],
+        "trained_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "data": info,
+        "metrics": metrics,
+    }
+    SEQUENCE_MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = SEQUENCE_MODEL_PATH.with_suffix(".pkl.tmp")
+    joblib.dump(model, tmp)
+    tmp.replace(SEQUENCE_MODEL_PATH)
+
+    for domain, m in metrics.get("validation", {}).items():
+        print(f"[{domain}] f1={m['f1']} log_loss={m['log_loss']} (carry-forward f1={m['persistence_f1']})")
+    print(json.dumps({"model": str(SEQUENCE_MODEL_PATH), "fingerprint": model["fingerprint"]}))
+    print(f"Done in {time.perf_counter() - started:.1f}s")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""Successive-halving hyperparameter search for the classical model bank.
+
+Every (target, model) pair starts with --candidates sampled configs evaluated by cross-validated F1
+on a small fraction of the training split. Each rung keeps the best 1/eta configs and multiplies
+their training fraction by eta until the full split is reached. Evaluations are appended to a JSONL
+log, so an interrupted or budget-limited run resumes where it stopped.
+
+The winning params are written to ml/artifacts/tuned_params.json; train with them via
+`train_classical_models.py --params ml/artifacts/tuned_params.json`. A run stopped by its budget
+marks its winners `"partial": true` (they were never scored on the full split) and leaves complete
+entries from earlier runs in place; training ignores partial entries.
+"""
+import argparse
+import hashlib
+import inspect
+import json
+import math
+import os
+import random
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import StratifiedKFold, cross_val_score, train_test_split
+from threadpoolctl import threadpool_limits
+
+from dataset_io import dataset_path, read_dataset
+from train_classical_models import (
+    ARTIFACTS,
+    FEATURES,
+    TARGETS,
+    code_hash,
+    encode_split,
+    file_hash,
+    load_matrix,
+    model_bank,
+    plan_workers,
+    split_cache_key,
+)
+
+TUNING_DIR = ARTIFACTS / "tuning"
+LOG_PATH = TUNING_DIR / "tuning_log.jsonl"
+TUNED_PARAMS_PATH = ARTIFACTS / "tuned_params.json"
+
+SEARCH_SPACES = {
+    "logistic_regression": {
+        "C": [0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0],
+        "class_weight": [None, "balanced"],
+    },
+    "random_forest": {
+        "n_estimators": [100, 220, 400],
+        "max_depth": [None, 6, 10, 16],
+        "min_samples_leaf": [1, 2, 4],
+        "max_features": ["sqrt", 0.5],
+    },
+    "gradient_boosting": {
+        "n_estimators": [50, 100, 200],
+        "learning_rate": [0.03, 0.1, 0.2],
+        "max_depth": [2, 3, 4],
+        "subsample": [0.7, 1.0],
+    },
+    "svm": {
+        "C": [0.3, 1.0, 3.0, 10.0],
+        "gamma": ["scale", 0.01, 0.1],
+        "class_weight": [None, "balanced"],
+    },
+}
+
+
+def sample_configs(model_name: str, n: int, seed: int) -> list[dict]:
+    space = SEARCH_SPACES[model_name]
+    keys = sorted(space)
+    grid_size = math.prod(len(space[k]) for k in keys)
+    rng = random.Random(f"{model_name}:{seed}")
+    picked: list[dict] = []
+    seen: set[str] = set()
+    while len(picked) < min(n, grid_size):
+        params = {k: rng.choice(space[k]) for k in keys}
+        key = json.dumps(params, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            picked.append(params)
+    return picked
+
+
+def config_id(params: dict) -> str:
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def rung_fractions(min_fraction: float, eta: int) -> list[float]:
+    fractions = []
+    fraction = min_fraction
+    while fraction < 1.0:
+        fractions.append(round(fraction, 6))
+        fraction *= eta
+    # A last rung within a factor of eta of the full split (0.9 before 1.0) would refit nearly the
+    # same data for a smaller field; the full rung takes its place.
+    if len(fractions) > 1 and fractions[-1] * eta > 1.0 + 1e-6:
+        fractions.pop()
+    fractions.append(1.0)
+    return fractions
+
+
+def evaluate_config(job: dict) -> dict:
+    """Cross-validated F1 for one config on a stratified fraction of the cached training split."""
+    started, cpu_started = time.perf_counter(), time.process_time()
+    X = load_matrix(job["X_train"])
+    y = np.load(job["y_train"])
+    idx = np.arange(len(y))
+    if job["fraction"] < 1.0:
+        stratify = y if np.bincount(y).min() >= 2 else None
+        idx, _ = train_test_split(idx, train_size=job["fraction"], random_state=job["seed"], stratify=stratify)
+        idx = np.sort(idx)
+
+    clf = model_bank(n_jobs=job["threads"])[job["model"]]
+    clf.set_params(**job["params"])
+    if job["model"] == "svm":
+        # Only F1 is needed here, so skip SVC's internal probability calibration.
+        clf.set_params(probability=False)
+
+    folds = max(2, min(job["folds"], int(np.bincount(y[idx]).min())))
+    with threadpool_limits(limits=job["threads"]), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        scores = cross_val_score(
+            clf,
+            X[idx],
+            y[idx],
+            cv=StratifiedKFold(n_splits=folds, shuffle=True, random_state=job["seed"]),
+            scoring="f1",
+            error_score=0.0,
+        )
+    return {
+        "key": job["key"],
+        "target": job["target"],
+        "model": job["model"],
+        "config_id": job["config_id"],
+        "params": job["params"],
+        "rung": job["rung"],
+        "fraction": job["fraction"],
+        "rows": int(len(idx)),
+        "f1": round(float(np.nan_to_num(scores).mean()), 4),
+        "wall_seconds": round(time.perf_counter() - started, 3),
+        "cpu_seconds": round(time.process_time() - cpu_started, 3),
+    }
+
+
+def load_log(path: Path) -> dict[str, dict]:
+    done: dict[str, dict] = {}
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    done[entry["key"]] = entry
+    return done
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Successive-halving hyperparameter search")
+    parser.add_argument("--candidates", type=int, default=27, help="Configs sampled per (target, model)")
+    parser.add_argument("--eta", type=int, default=3, help="Keep the best 1/eta configs at each rung")
+    parser.add_argument("--min-fraction", type=float, default=1 / 9, help="Training fraction at the first rung")
+    parser.add_argument("--folds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--targets", nargs="*", default=list(TARGETS), choices=list(TARGETS))
+    parser.add_argument("--models", nargs="*", default=list(SEARCH_SPACES), choices=list(SEARCH_SPACES))
+    parser.add_argument("--cores", type=int, default=os.cpu_count() or 1, help="Global core budget")
+    parser.add_argument("--time-budget", type=float, default=0, help="Wall-clock budget in seconds (0 = none)")
+    parser.add_argument("--cpu-budget", type=float, default=0, help="Summed worker CPU budget in seconds (0 = none)")
+    parser.add_argument("--log", type=Path, default=LOG_PATH, help="Resumable JSONL evaluation log")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    data_path = dataset_path()
+    if not data_path.exists():
+        raise SystemExit(f"Dataset not found: {data_path}")
+    if args.eta < 2:
+        raise SystemExit("--eta must be at least 2")
+
+    df = read_dataset(columns=FEATURES + [TARGETS[name] for name in args.targets], path=data_path)
+    X = df[FEATURES]
+    data_hash = file_hash(data_path)
+    splits = {}
+    for name in args.targets:
+        y = pd.to_numeric(df[TARGETS[name]], errors="coerce").fillna(0).astype(int)
+        splits[name] = encode_split(name, X, y, data_hash)
+
+    # Resume keys cover the encoded split (data, features, preprocessor) and the evaluation code,
+    # so editing either re-evaluates instead of reusing stale scores from the log.
+    code = hashlib.sha256((code_hash() + inspect.getsource(evaluate_config)).encode("utf-8")).hexdigest()[:16]
+    split_keys = {name: split_cache_key(data_hash, name) for name in args.targets}
+
+    fractions = rung_fractions(args.min_fraction, args.eta)
+    args.log.parent.mkdir(parents=True, exist_ok=True)
+    done = load_log(args.log)
+
+    survivors = {
+        (target, model): sample_configs(model, args.candidates, args.seed)
+        for target in args.targets
+        for model in args.models
+    }
+    best: dict[tuple[str, str], dict] = {}
+    started = time.perf_counter()
+    cpu_used = 0.0
+    stopped_early = False
+
+    n_first = sum(len(c) for c in survivors.values())
+    workers, threads = plan_workers(n_first, args.cores)
+    print(f"Rungs (training fraction): {fractions}; {n_first} configs on {workers} worker(s) x {threads} thread(s)")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(args.log, "a", encoding="utf-8") as log:
+        for rung, fraction in enumerate(fractions):
+            if args.time_budget and time.perf_counter() - started >= args.time_budget:
+                stopped_early = True
+                break
+            if args.cpu_budget and cpu_used >= args.cpu_budget:
+                stopped_early = True
+                break
+
+            results: dict[tuple[str, str], list[dict]] = {pair: [] for pair in survivors}
+            futures = {}
+            resumed = 0
+            for (target, model), configs in survivors.items():
+                for params in configs:
+                    cid = config_id(params)
+                    key = f"{split_keys[target]}:{code}:{target}:{model}:{cid}:{fraction}:{args.folds}:{args.seed}"
+                    if key in done:
+                        results[(target, model)].append(done[key])
+                        resumed += 1
+                        continue
+                    job = {
+                        "key": key,
+                        "target": target,
+                        "model": model,
+                        "config_id": cid,
+                        "params": params,
+                        "rung": rung,
+                        "fraction": fraction,
+                        "folds": args.folds,
+                        "seed": args.seed,
+                        "threads": threads,
+                        "X_train": splits[target]["X_train"],
+                        "y_train": splits[target]["y_train"],
+                    }
+                    futures[pool.submit(evaluate_config, job)] = (target, model)
+
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                entry = future.result()
+                entry["data"] = data_hash
+                log.write(json.dumps(entry) + "\n")
+                log.flush()
+                cpu_used += entry["cpu_seconds"]
+                results[futures[future]].append(entry)
+                over_time = args.time_budget and time.perf_counter() - started >= args.time_budget
+                over_cpu = args.cpu_budget and cpu_used >= args.cpu_budget
+                if (over_time or over_cpu) and not stopped_early:
+                    stopped_early = True
+                    for pending in futures:
+                        pending.cancel()
+
+            if stopped_early:
+                # A partially evaluated rung is not a fair comparison; its entries stay in the log for resume.
+                break
+
+            next_survivors = {}
+            for pair, entries in results.items():
+                # Stable ordering: F1 desc, then config id, so ties never depend on completion order.
+                entries.sort(key=lambda e: (-e["f1"], e["config_id"]))
+                if entries:
+                    best[pair] = entries[0]
+                keep = max(1, math.ceil(len(entries) / args.eta))
+                next_survivors[pair] = [e["params"] for e in entries[:keep]]
+            survivors = next_survivors
+
+            elapsed = time.perf_counter() - started
+            print(
+                f"rung {rung} fraction={fraction} evaluated={len(futures)} resumed={resumed} "
+                f"elapsed={elapsed:.1f}s cpu={cpu_used:.1f}s",
+                flush=True,
+            )
+
+    tuned: dict[str, dict] = {}
+    if TUNED_PARAMS_PATH.exists():
+        with open(TUNED_PARAMS_PATH, "r", encoding="utf-8") as f:
+            tuned = json.load(f)
+    for (target, model), entry in sorted(best.items()):
+        previous = tuned.get(target, {}).get(model)
+        if stopped_early and previous and not previous.get("partial"):
+            # A winner from a low-fraction rung never replaces one that finished the full split.
+            continue
+        tuned.setdefault(target, {})[model] = {
+            "params": entry["params"],
+            "cv_f1": entry["f1"],
+            "fraction": entry["fraction"],
+        }
+        if stopped_early:
+            tuned[target][model]["partial"] = True
+        print(f"[{target}] {model:20s} cv_f1={entry['f1']} fraction={entry['fraction']} params={entry['params']}")
+
+    with open(TUNED_PARAMS_PATH, "w", encoding="utf-8") as f:
+        json.dump(tuned, f, indent=2, sort_keys=True)
+    if stopped_early:
+        print(
+            "Budget exhausted before the final rung; new entries are marked partial. "
+            "Rerun with a larger budget to resume from the log."
+        )
+    print(f"Saved tuned params: {TUNED_PARAMS_PATH}")
+
+if __name__ == "__main__":
+    main()
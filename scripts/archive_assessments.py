@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.config import Config
+from backend.models.archive_model import archive_assessments, archive_dir
+from backend.models.migrations import check_schema
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move old assessments into per-month archive databases")
+    parser.add_argument(
+        "--older-than-days",
+        type=int,
+        default=Config.ARCHIVE_AFTER_DAYS,
+        help="Archive assessments created more than this many days ago",
+    )
+    parser.add_argument("--no-vacuum", action="store_true", help="Skip releasing freed pages afterwards")
+    args = parser.parse_args()
+
+    check_schema()
+    report = archive_assessments(args.older_than_days, vacuum=not args.no_vacuum)
+    print(f"Cutoff: {report['cutoff']}")
+    for month, count in report["moved"].items():
+        print(f"  {month}: {count} rows")
+    print(f"Rows archived: {report['rows_moved']} -> {archive_dir()}")
+    print(f"Vacuum: {report['vacuum']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Compare the one-hot-per-combination encoding of symptoms/family history with the multi-hot encoder.
+
+For each encoding it reports feature count, preprocessing cost, single-row serving latency, pickled
+pipeline size and per-target logistic-regression F1 on the standard split.
+"""
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+for path in (ROOT, ROOT / "ml" / "training"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from backend.services.feature_engineering import build_feature_row
+from dataset_io import dataset_path, read_dataset
+from train_classical_models import CATEGORICAL, FEATURES, MULTI_HOT, NUMERIC, TARGETS, evaluate, make_preprocessor, split_target
+
+
+def legacy_preprocessor() -> ColumnTransformer:
+    """The previous encoding: every distinct symptoms/family_history string is its own category."""
+    return ColumnTransformer(
+        [
+            ("num", Pipeline([("imputer", SimpleImputer(strategy="median")), ("scaler", StandardScaler())]), NUMERIC),
+            (
+                "cat",
+                Pipeline(
+                    [
+                        ("imputer", SimpleImputer(strategy="most_frequent")),
+                        ("onehot", OneHotEncoder(handle_unknown="ignore")),
+                    ]
+                ),
+                CATEGORICAL + list(MULTI_HOT),
+            ),
+        ]
+    )
+
+
+def request_rows(n: int) -> list[pd.DataFrame]:
+    """Single-row frames shaped exactly like what the API builds for one assessment."""
+    rng = np.random.default_rng(0)
+    pool = ["Fatigue", "Weight gain", "Sugar cravings", "Irregular cycles", "Acne", "Hair loss"]
+    rows = []
+    for _ in range(n):
+        profile = {
+            "Age": int(rng.integers(18, 66)),
+            "Gender": str(rng.choice(["Female", "Male"])),
+            "BMI": float(rng.uniform(18, 37)),
+            "Sleep quality": "Poor",
+            "Stress level": "High",
+            "Exercise frequency": "Low",
+            "Diet type": "Balanced",
+            "Family history": "Mother: Type 2 Diabetes",
+            "Symptoms": list(rng.choice(pool, size=int(rng.integers(0, 4)), replace=False)),
+        }
+        rows.append(pd.DataFrame([build_feature_row(profile, {"HbA1c": 6.1})]))
+    return rows
+
+
+def benchmark(name: str, make, df: pd.DataFrame, rows: list[pd.DataFrame]) -> dict:
+    X = df[FEATURES]
+    started = time.perf_counter()
+    pre = make().fit(X)
+    fit_s = time.perf_counter() - started
+    started = time.perf_counter()
+    n_features = pre.transform(X).shape[1]
+    transform_s = time.perf_counter() - started
+
+    f1 = {}
+    pipe = None
+    for target, col in TARGETS.items():
+        y = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(int)
+        X_train, X_test, y_train, y_test = split_target(X, y)
+        pipe = Pipeline([("pre", make()), ("clf", LogisticRegression(max_iter=1200))]).fit(X_train, y_train)
+        f1[target] = evaluate(y_test, pipe.predict(X_test))["f1"]
+
+    latencies = []
+    for row in rows:
+        started = time.perf_counter()
+        pipe.predict_proba(row)
+        latencies.append((time.perf_counter() - started) * 1000)
+    buf = io.BytesIO()
+    joblib.dump(pipe, buf)
+    return {
+        "encoding": name,
+        "features": n_features,
+        "fit_ms": round(fit_s * 1000, 1),
+        "transform_us_per_row": round(transform_s * 1e6 / len(X), 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "size_kb": round(buf.tell() / 1024, 1),
+        **{f"f1_{t}": v for t, v in f1.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark one-hot vs multi-hot text encoding")
+    parser.add_argument("--requests", type=int, default=300, help="Single-row predictions timed per encoding")
+    args = parser.parse_args()
+
+    df = read_dataset(columns=FEATURES + list(TARGETS.values()), path=dataset_path())
+    rows = request_rows(args.requests)
+    report = pd.DataFrame(
+        [
+            benchmark("one-hot combinations", legacy_preprocessor, df, rows),
+            benchmark("multi-hot tokens", make_preprocessor, df, rows),
+        ]
+    ).set_index("encoding")
+    print(f"Rows: {len(df)}")
+    print(report.T.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Check /api/admin/score-distribution figures against exact per-request computation.
+
+By default it fills a scratch database with synthetic assessments spread over --days days. For
+random date ranges it computes each domain's count, mean, p50 and p90 two ways: by sorting the
+matching rows, and from the merged score histograms. It reports the time of both and the
+largest difference.
+"""
+import argparse
+import math
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.models import db
+from backend.models.assessment_model import build_assessment_row, insert_assessment_rows
+from backend.models.migrations import ROLLUP_DOMAINS, check_schema, migrate
+from backend.models.score_distribution import score_distribution
+
+QUANTILES = [0.5, 0.9]
+
+
+def seed(rows: int, days: int, first: date) -> None:
+    rng = random.Random(7)
+    conn = db.get_connection()
+    batch = []
+    for i in range(rows):
+        created = first + timedelta(days=rng.randrange(days))
+        scores = {d: f"{min(100, int(rng.betavariate(2, 3 + j) * 101))}%" for j, d in enumerate(ROLLUP_DOMAINS)}
+        row = build_assessment_row({"Age": 40, "Gender": "Female", "BMI": 25.0}, {"risk_scores": scores}, "Bench")
+        row["created_at"] = f"{created.isoformat()}T12:00:00Z"
+        batch.append(row)
+        if len(batch) == 5000 or i == rows - 1:
+            insert_assessment_rows(conn, batch)
+            conn.commit()
+            batch = []
+    conn.close()
+
+
+def exact(start: date, end: date) -> dict:
+    conn = db.get_connection()
+    columns = ", ".join(f"{d}_risk" for d in ROLLUP_DOMAINS)
+    rows = conn.execute(
+        f"SELECT {columns} FROM assessments WHERE created_at >= ? AND created_at < ?",
+        (start.isoformat(), (end + timedelta(days=1)).isoformat()),
+    ).fetchall()
+    conn.close()
+    out = {}
+    for j, domain in enumerate(ROLLUP_DOMAINS):
+        scores = sorted(int(str(r[j]).rstrip("%")) for r in rows if r[j])
+        n = len(scores)
+        out[domain] = {
+            "count": n,
+            "mean": round(sum(scores) / n, 2) if n else None,
+            "quantiles": {f"p{round(q * 100):g}": scores[max(1, math.ceil(q * n)) - 1] if n else None for q in QUANTILES},
+        }
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark score-distribution histograms against exact results")
+    parser.add_argument("--rows", type=int, default=100000, help="Synthetic assessments to create")
+    parser.add_argument("--days", type=int, default=730, help="Days the synthetic assessments span")
+    parser.add_argument("--queries", type=int, default=50, help="Random date ranges to compare")
+    parser.add_argument("--use-configured-db", action="store_true", help="Benchmark the app database instead")
+    args = parser.parse_args()
+
+    first = date(2023, 1, 1)
+    if args.use_configured_db:
+        check_schema()
+        conn = db.get_connection()
+        lo, hi = conn.execute("SELECT MIN(created_at), MAX(created_at) FROM assessments").fetchone()
+        conn.close()
+        if not lo:
+            raise SystemExit("No assessments to benchmark")
+        first = date.fromisoformat(lo[:10])
+        args.days = (date.fromisoformat(hi[:10]) - first).days + 1
+    else:
+        db.DB_PATH = Path(tempfile.mkdtemp(prefix="score-dist-")) / "bench.db"
+        migrate()
+        started = time.perf_counter()
+        seed(args.rows, args.days, first)
+        print(f"Seeded {args.rows} assessments over {args.days} days in {time.perf_counter() - started:.1f}s ({db.DB_PATH})")
+
+    rng = random.Random(11)
+    exact_ms, sketch_ms, worst = [], [], 0.0
+    for _ in range(args.queries):
+        a, b = sorted(rng.randrange(args.days) for _ in range(2))
+        start, end = first + timedelta(days=a), first + timedelta(days=b)
+        t0 = time.perf_counter()
+        expected = exact(start, end)
+        t1 = time.perf_counter()
+        got = score_distribution(start.isoformat(), end.isoformat(), quantiles=QUANTILES)["domains"]
+        t2 = time.perf_counter()
+        exact_ms.append((t1 - t0) * 1000)
+        sketch_ms.append((t2 - t1) * 1000)
+        for domain, want in expected.items():
+            have = got[domain]
+            if have["count"] != want["count"]:
+                worst = math.inf
+            for name, value in [("mean", want["mean"])] + list(want["quantiles"].items()):
+                other = have["mean"] if name == "mean" else have["quantiles"][name]
+                if value is not None:
+                    worst = max(worst, abs(other - value))
+
+    print(f"{args.queries} ranges x {len(ROLLUP_DOMAINS)} domains (count, mean, p50, p90)")
+    print(f"  exact (sort rows):   median {statistics.median(exact_ms):8.2f} ms  max {max(exact_ms):8.2f} ms")
+    print(f"  merged histograms:   median {statistics.median(sketch_ms):8.2f} ms  max {max(sketch_ms):8.2f} ms")
+    print(f"  largest difference:  {worst:g} score points")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.models.migrations import check_schema
+from backend.services.similarity_index import build_index, index_dir
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or extend the similar-patients vector index")
+    parser.add_argument("--rebuild", action="store_true", help="Refit the encoder and re-encode every assessment")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Assessments encoded at a time")
+    args = parser.parse_args()
+
+    check_schema()
+    started = time.perf_counter()
+    report = build_index(rebuild=args.rebuild, batch_size=args.batch_size)
+    print(f"Added {report['added']} assessment(s); index holds {report['rows']} rows x {report['dims']} dims")
+    print(f"Segments: {len(report['segments'])}, watermark id {report['watermark']} -> {index_dir()}")
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Convert legacy JSON assessment rows to the compact template + zlib encoding and report savings."""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.models.db import get_connection
+from backend.models.migrations import check_schema
+from backend.models.result_codec import decode_profile, decode_result, encode_assessment
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compact stored assessment JSON")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Measure savings without rewriting rows")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to return freed pages to the OS")
+    args = parser.parse_args()
+
+    check_schema()
+    conn = get_connection()
+
+    json_bytes = 0
+    blob_bytes = 0
+    converted = 0
+    encode_s = 0.0
+    decode_s = 0.0
+    templates: dict[str, str] = {}
+    last_id = 0
+
+    while True:
+        rows = conn.execute(
+            """
+            SELECT id, age, gender, bmi, profile_json, result_json
+            FROM assessments
+            WHERE id > ? AND result_json IS NOT NULL AND result_blob IS NULL
+            ORDER BY id
+            LIMIT ?
+            """,
+            (last_id, args.batch_size),
+        ).fetchall()
+        if not rows:
+            break
+
+        updates = []
+        for row in rows:
+            last_id = row["id"]
+            profile = json.loads(row["profile_json"]) if row["profile_json"] else {}
+            result = json.loads(row["result_json"])
+
+            started = time.perf_counter()
+            encoded = encode_assessment(profile, result)
+            encode_s += time.perf_counter() - started
+
+            if encoded["template_id"]:
+                templates[encoded["template_id"]] = encoded["template_body"]
+            check = {**dict(row), **encoded}
+            started = time.perf_counter()
+            restored = decode_result(check, include_static=True)
+            restored_profile = decode_profile(check)
+            decode_s += time.perf_counter() - started
+            if restored != result or restored_profile != profile:
+                raise SystemExit(f"Round-trip mismatch for assessment {row['id']}; aborting")
+
+            json_bytes += len(row["profile_json"] or "") + len(row["result_json"] or "")
+            blob_bytes += len(encoded["profile_blob"]) + len(encoded["result_blob"])
+            updates.append((encoded["template_id"], encoded["profile_blob"], encoded["result_blob"], row["id"]))
+            converted += 1
+
+        if not args.dry_run:
+            conn.executemany(
+                "INSERT OR IGNORE INTO result_templates (id, body) VALUES (?, ?)", templates.items()
+            )
+            conn.executemany(
+                """
+                UPDATE assessments
+                SET template_id=?, profile_blob=?, result_blob=?, profile_json=NULL, result_json=NULL
+                WHERE id=?
+                """,
+                updates,
+            )
+            conn.commit()
+
+    template_bytes = sum(len(body) for body in templates.values())
+    if args.vacuum and not args.dry_run:
+        conn.execute("VACUUM")
+    conn.close()
+
+    total_after = blob_bytes + template_bytes
+    print("Assessment compaction report")
+    print("=" * 40)
+    print(f"rows converted      {converted}{' (dry run)' if args.dry_run else ''}")
+    print(f"templates           {len(templates)}")
+    print(f"json bytes          {json_bytes}")
+    print(f"compact bytes       {total_after} (blobs {blob_bytes} + templates {template_bytes})")
+    if json_bytes:
+        print(f"size ratio          {total_after / json_bytes:.3f} ({100 * (1 - total_after / json_bytes):.1f}% saved)")
+    if converted:
+        print(f"encode cost         {1e6 * encode_s / converted:.1f} us/row")
+        print(f"decode cost         {1e6 * decode_s / converted:.1f} us/row")
+
+
+if __name__ == "__main__":
+    main()
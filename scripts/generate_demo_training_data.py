@@ -1,94 +1,202 @@
 #!/usr/bin/env python3
-import random
+"""Generate a synthetic training dataset labelled by the rule engine.
+
+Rows are sampled with NumPy in blocks and labelled with the column-wise rule evaluation in
+backend/risk_engine_batch.py. Large runs are split into shards, and each shard gets its own
+SeedSequence child, so the output depends only on --seed, --rows, --shards and --block-size.
+The number of worker processes does not change it. Each shard streams its blocks to its own
+part file, so memory stays at about one block per worker.
+"""
+import argparse
+import itertools
+import os
+import shutil
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 ROOT = Path(__file__).resolve().parents[1]
-if str(ROOT) not in sys.path:
-    sys.path.insert(0, str(ROOT))
-
-from backend.risk_engine import calculate_risk
-
-OUT = ROOT / "ml" / "data" / "processed" / "unified_endocrine_dataset.csv"
-
-
-def random_profile(i: int) -> dict:
-    gender = random.choice(["Female", "Male"])
-    return {
-        "Age": random.randint(18, 65),
-        "Gender": gender,
-        "BMI": round(random.uniform(18, 37), 1),
-        "Sleep quality": random.choice(["Poor", "Average", "Good"]),
-        "Stress level": random.choice(["High", "Moderate", "Low"]),
-        "Exercise frequency": random.choice(["Low", "3 days/week", "Regular", "Daily"]),
-        "Diet type": random.choice(["Balanced", "High sugar", "Processed", "High protein"]),
-        "Family history": random.choice(["", "Diabetes", "Thyroid", "PCOS", "Diabetes Thyroid"]),
-        "Symptoms": random.sample(
-            ["Fatigue", "Weight gain", "Sugar cravings", "Irregular cycles", "Acne", "Hair loss"],
-            k=random.randint(0, 3),
-        ),
-    }
-
-
-def random_markers() -> dict:
-    return {
-        "TSH": round(random.uniform(0.2, 7.0), 2),
-        "T3": round(random.uniform(1.5, 4.5), 2),
-        "T4": round(random.uniform(0.5, 1.7), 2),
-        "HbA1c": round(random.uniform(4.8, 7.4), 2),
-        "Insulin": round(random.uniform(4, 28), 2),
-        "Cortisol": round(random.uniform(3, 26), 2),
-        "Cholesterol": round(random.uniform(130, 290), 2),
-        "Fasting glucose": round(random.uniform(70, 165), 2),
-    }
-
-
-def pct_to_level(v: str) -> int:
-    n = int(str(v).replace("%", ""))
-    return 1 if n >= 65 else 0
+for path in (ROOT, ROOT / "ml" / "training"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from backend.risk_engine_batch import calculate_risk_batch
+from dataset_io import CSV_PATH, PARQUET_PATH, PARTITIONED_PATH, DatasetAppender, load_schema, set_dataset_path
+
+SOURCE = "demo_generated"
+GENDERS = ["Female", "Male"]
+SLEEP = ["Poor", "Average", "Good"]
+STRESS = ["High", "Moderate", "Low"]
+EXERCISE = ["Low", "3 days/week", "Regular", "Daily"]
+DIET = ["Balanced", "High sugar", "Processed", "High protein"]
+FAMILY_HISTORY = ["", "Diabetes", "Thyroid", "PCOS", "Diabetes Thyroid"]
+SYMPTOMS = ["Fatigue", "Weight gain", "Sugar cravings", "Irregular cycles", "Acne", "Hair loss"]
+MARKER_RANGES = {
+    "tsh": (0.2, 7.0),
+    "t3": (1.5, 4.5),
+    "t4": (0.5, 1.7),
+    "hba1c": (4.8, 7.4),
+    "insulin": (4, 28),
+    "cortisol": (3, 26),
+    "cholesterol": (130, 290),
+    "fasting_glucose": (70, 165),
+}
+TARGETS = {
+    "thyroid": "target_thyroid_risk",
+    "diabetes": "target_diabetes_risk",
+    "pcos": "target_pcos_risk",
+    "adrenal": "target_adrenal_risk",
+    "metabolic": "target_metabolic_risk",
+}
+
+
+def _symptom_table() -> np.ndarray:
+    """Every ordered pick of 0-3 symptoms, indexed by k*216 + i0*36 + i1*6 + i2."""
+    n = len(SYMPTOMS)
+    table = np.empty(4 * n**3, dtype=object)
+    for k in range(4):
+        for picks in itertools.product(range(n), repeat=3):
+            key = k * n**3 + picks[0] * n**2 + picks[1] * n + picks[2]
+            table[key] = ", ".join(SYMPTOMS[i] for i in picks[:k])
+    return table
+
+
+SYMPTOM_TABLE = _symptom_table()
+
+
+def _categorical(rng: np.random.Generator, values: list[str], n: int) -> pd.Categorical:
+    return pd.Categorical.from_codes(rng.integers(0, len(values), n), categories=values)
+
+
+def generate_block(rng: np.random.Generator, n: int) -> pd.DataFrame:
+    """One block of n labelled rows, with the same distributions the per-row demo generator used."""
+    # random.sample(SYMPTOMS, k): the first k columns of a random permutation per row.
+    k = rng.integers(0, 4, n)
+    perm = np.argsort(rng.random((n, len(SYMPTOMS))), axis=1)[:, :3] * (np.arange(3) < k[:, None])
+    base = len(SYMPTOMS)
+    symptom_key = k * base**3 + perm[:, 0] * base**2 + perm[:, 1] * base + perm[:, 2]
+
+    df = pd.DataFrame(
+        {
+            "age": rng.integers(18, 66, n).astype(float),
+            "gender": _categorical(rng, GENDERS, n),
+            "bmi": np.round(rng.uniform(18, 37, n), 1),
+            "sleep_quality": _categorical(rng, SLEEP, n),
+            "stress_level": _categorical(rng, STRESS, n),
+            "exercise_frequency": _categorical(rng, EXERCISE, n),
+            "diet_type": _categorical(rng, DIET, n),
+            "family_history": _categorical(rng, FAMILY_HISTORY, n),
+            "symptoms": pd.Categorical(SYMPTOM_TABLE[symptom_key]),
+        }
+    )
+    for col, (lo, hi) in MARKER_RANGES.items():
+        df[col] = np.round(rng.uniform(lo, hi, n), 2)
+
+    scores = calculate_risk_batch(df)
+    for domain, col in TARGETS.items():
+        df[col] = (np.round(scores[domain].to_numpy()) >= 65).astype(np.int8)
+    df["source"] = pd.Categorical([SOURCE] * n)
+    return df
+
+
+def generate_shard(job: dict) -> dict:
+    """Worker: stream one shard's blocks into its own output files."""
+    started = time.perf_counter()
+    rng = np.random.default_rng(job["seed_seq"])
+    schema = load_schema()
+    writers = [(DatasetAppender(Path(p), schema), drop_source) for p, drop_source in job["outputs"]]
+    remaining = job["rows"]
+    while remaining > 0:
+        n = min(job["block_size"], remaining)
+        df = generate_block(rng, n)
+        for writer, drop_source in writers:
+            # Part files of the partitioned dataset take `source` from their folder name.
+            writer.append(df.drop(columns=["source"]) if drop_source else df)
+        remaining -= n
+    for writer, _ in writers:
+        writer.close()
+    return {"shard": job["shard"], "rows": job["rows"], "seconds": time.perf_counter() - started}
+
+
+def concat_csv(parts: list[Path], out: Path) -> None:
+    """Join per-shard CSV files into one, keeping only the first header."""
+    with open(out, "wb") as dst:
+        for i, part in enumerate(parts):
+            with open(part, "rb") as src:
+                if i:
+                    src.readline()
+                shutil.copyfileobj(src, dst, 1 << 20)
+            part.unlink()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate synthetic endocrine training data")
+    parser.add_argument("--rows", type=int, default=1200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--block-size", type=int, default=200_000, help="Rows generated and written at a time")
+    parser.add_argument("--shards", type=int, default=0, help="Independent shards (default: one per 1M rows)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--format", choices=["parquet", "csv", "both"], default="both")
+    return parser.parse_args()
 
 
 def main() -> None:
-    random.seed(42)
-    rows = []
-    for i in range(1200):
-        p = random_profile(i)
-        m = random_markers()
-        out = calculate_risk(p, m)
-
-        rows.append(
+    args = parse_args()
+    shards = args.shards or max(1, -(-args.rows // 1_000_000))
+    shards = max(1, min(shards, args.rows))
+    started = time.perf_counter()
+
+    seeds = np.random.SeedSequence(args.seed).spawn(shards)
+    counts = [args.rows // shards + (1 if i < args.rows % shards else 0) for i in range(shards)]
+    write_parquet = args.format in ("parquet", "both")
+    write_csv = args.format in ("csv", "both")
+
+    if shards > 1 and write_parquet and PARTITIONED_PATH.exists():
+        shutil.rmtree(PARTITIONED_PATH)
+    csv_parts = [CSV_PATH.with_name(f"{CSV_PATH.stem}.part-{i:05d}.csv") for i in range(shards)]
+
+    jobs = []
+    for i in range(shards):
+        outputs = []
+        if write_parquet:
+            if shards == 1:
+                outputs.append((str(PARQUET_PATH), False))
+            else:
+                outputs.append((str(PARTITIONED_PATH / f"source={SOURCE}" / f"part-{i:05d}.parquet"), True))
+        if write_csv:
+            outputs.append((str(CSV_PATH if shards == 1 else csv_parts[i]), False))
+        jobs.append(
             {
-                "age": p["Age"],
-                "gender": p["Gender"],
-                "bmi": p["BMI"],
-                "sleep_quality": p["Sleep quality"],
-                "stress_level": p["Stress level"],
-                "exercise_frequency": p["Exercise frequency"],
-                "diet_type": p["Diet type"],
-                "family_history": p["Family history"],
-                "symptoms": ", ".join(p["Symptoms"]),
-                "tsh": m["TSH"],
-                "t3": m["T3"],
-                "t4": m["T4"],
-                "hba1c": m["HbA1c"],
-                "insulin": m["Insulin"],
-                "cortisol": m["Cortisol"],
-                "cholesterol": m["Cholesterol"],
-                "fasting_glucose": m["Fasting glucose"],
-                "target_thyroid_risk": pct_to_level(out["risk_scores"]["thyroid"]),
-                "target_diabetes_risk": pct_to_level(out["risk_scores"]["diabetes"]),
-                "target_pcos_risk": pct_to_level(out["risk_scores"]["pcos"]),
-                "target_adrenal_risk": pct_to_level(out["risk_scores"]["adrenal"]),
-                "target_metabolic_risk": pct_to_level(out["risk_scores"]["metabolic"]),
-                "source": "demo_generated",
+                "shard": i,
+                "rows": counts[i],
+                "seed_seq": seeds[i],
+                "block_size": max(1, args.block_size),
+                "outputs": outputs,
             }
         )
 
-    OUT.parent.mkdir(parents=True, exist_ok=True)
-    pd.DataFrame(rows).to_csv(OUT, index=False)
-    print(f"Saved demo dataset: {OUT}")
+    workers = max(1, min(args.workers, len(jobs)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(generate_shard, jobs))
+
+    if write_csv and shards > 1:
+        concat_csv(csv_parts, CSV_PATH)
+
+    if write_parquet:
+        print(f"Saved demo dataset: {PARQUET_PATH if shards == 1 else PARTITIONED_PATH}")
+    if write_csv:
+        print(f"Saved demo dataset: {CSV_PATH}")
+    set_dataset_path((PARQUET_PATH if shards == 1 else PARTITIONED_PATH) if write_parquet else CSV_PATH)
+    elapsed = time.perf_counter() - started
+    shard_seconds = sum(r["seconds"] for r in results)
+    print(
+        f"Rows: {args.rows} in {shards} shard(s) on {workers} worker(s): {elapsed:.1f}s wall, "
+        f"{shard_seconds:.1f}s in workers, {args.rows / max(elapsed, 1e-9):,.0f} rows/s"
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Apply database schema migrations (see backend/models/migrations.py)."""
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.models import db
+from backend.models.migrations import LATEST_VERSION, MIGRATIONS, current_version, ensure_default_admin, migrate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument("--status", action="store_true", help="Only print the current schema version")
+    parser.add_argument("--target", type=int, help="Migrate up to this version")
+    args = parser.parse_args()
+
+    if args.status:
+        version = 0
+        if db.DB_PATH.exists():
+            conn = db.get_connection()
+            version = current_version(conn)
+            conn.close()
+        print(f"Database: {db.DB_PATH}")
+        print(f"Schema version: {version} (latest {LATEST_VERSION})")
+        return
+
+    applied = migrate(args.target)
+    for version, name, _ in MIGRATIONS:
+        if version in applied:
+            print(f"Applied {version:04d} {name}")
+    if not applied:
+        print("Schema already up to date")
+    if ensure_default_admin():
+        print("Created default admin user")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,24 @@
 #!/usr/bin/env python3
 import argparse
-import hashlib
-import json
+import os
+import re
+import resource
+import shutil
 import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterator
 
+import numpy as np
 import pandas as pd
 
 ROOT = Path(__file__).resolve().parents[1]
-SCHEMA_PATH = ROOT / "ml" / "config" / "dataset_schema.json"
-OUT_PATH = ROOT / "ml" / "data" / "processed" / "unified_endocrine_dataset.csv"
+if str(ROOT / "ml" / "training") not in sys.path:
+    sys.path.insert(0, str(ROOT / "ml" / "training"))
+
+from dataset_io import CSV_PATH, PARQUET_PATH, PARTITIONED_PATH, DatasetAppender, load_schema, set_dataset_path
 
 # Canonical mapping hints for common source column names.
 COLUMN_ALIASES = {
@@ -42,28 +51,174 @@ COLUMN_ALIASES = {
 }
 
 
-def load_schema() -> dict:
-    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+IMPUTED_COLUMNS = ["age", "bmi", "hba1c", "fasting_glucose"]
+
+# Without a source patient ID, a visit is identified by everything recorded about it. Sparse rows
+# (labs left empty, no timestamp) still differ by lifestyle, symptoms and labels.
+CONTENT_COLUMNS = [
+    "timestamp",
+    "age",
+    "gender",
+    "bmi",
+    "sleep_quality",
+    "stress_level",
+    "exercise_frequency",
+    "diet_type",
+    "family_history",
+    "symptoms",
+    "tsh",
+    "t3",
+    "t4",
+    "hba1c",
+    "insulin",
+    "cortisol",
+    "cholesterol",
+    "fasting_glucose",
+    "target_thyroid_risk",
+    "target_diabetes_risk",
+    "target_pcos_risk",
+    "target_adrenal_risk",
+    "target_metabolic_risk",
+]
+TEXT_CONTENT_COLUMNS = ["sleep_quality", "stress_level", "exercise_frequency", "diet_type", "family_history", "symptoms"]
 
 
-def read_input(csv_path: str | None, sqlite_path: str | None, table: str | None) -> pd.DataFrame:
+def source_columns(csv_path: str | None, sqlite_path: str | None, table: str | None) -> list[str]:
+    """Column names of the input without reading any rows."""
     if csv_path:
-        return pd.read_csv(csv_path)
+        return list(pd.read_csv(csv_path, nrows=0).columns)
 
     if sqlite_path and table:
         conn = sqlite3.connect(sqlite_path)
         try:
-            return pd.read_sql_query(f"SELECT * FROM {table}", conn)
+            return [r[1] for r in conn.execute(f'PRAGMA table_info("{table}")').fetchall()]
         finally:
             conn.close()
 
     raise ValueError("Provide either --csv or (--sqlite and --table)")
 
 
-def map_columns(df: pd.DataFrame) -> pd.DataFrame:
+def projected_columns(columns: list[str]) -> list[str]:
+    """The source columns map_columns actually picks; everything else is never read."""
+    normalized = {c.lower().strip(): c for c in columns}
+    picked = []
+    for aliases in COLUMN_ALIASES.values():
+        for candidate in aliases:
+            key = candidate.lower().strip()
+            if key in normalized:
+                if normalized[key] not in picked:
+                    picked.append(normalized[key])
+                break
+    return picked
+
+
+def read_input(
+    csv_path: str | None,
+    sqlite_path: str | None,
+    table: str | None,
+    columns: list[str] | None = None,
+    chunksize: int = 0,
+) -> Iterator[pd.DataFrame]:
+    """Yield the input as DataFrames of at most `chunksize` rows (one frame when chunksize is 0)."""
+    if csv_path:
+        if not chunksize:
+            yield pd.read_csv(csv_path, usecols=columns)
+            return
+        yield from pd.read_csv(csv_path, usecols=columns, chunksize=chunksize)
+        return
+
+    if sqlite_path and table:
+        select = ", ".join(f'"{c}"' for c in columns) if columns else "*"
+        conn = sqlite3.connect(sqlite_path)
+        try:
+            query = f'SELECT {select} FROM "{table}"'
+            if not chunksize:
+                yield pd.read_sql_query(query, conn)
+                return
+            yield from pd.read_sql_query(query, conn, chunksize=chunksize)
+        finally:
+            conn.close()
+        return
+
+    raise ValueError("Provide either --csv or (--sqlite and --table)")
+
+
+def sample_medians(chunks: Iterator[pd.DataFrame], sample_size: int, seed: int = 42) -> dict[str, float]:
+    """First pass: per-column medians from a bottom-k random sample of at most `sample_size` values.
+
+    Every value gets a uniform random key and the `sample_size` smallest keys are kept, which is a
+    uniform sample without replacement. When a column has no more values than that, the median is exact.
+    """
+    rng = np.random.default_rng(seed)
+    keys: dict[str, np.ndarray] = {c: np.empty(0) for c in IMPUTED_COLUMNS}
+    values: dict[str, np.ndarray] = {c: np.empty(0) for c in IMPUTED_COLUMNS}
+    for chunk in chunks:
+        mapped = map_columns(chunk)
+        for col in IMPUTED_COLUMNS:
+            new = pd.to_numeric(mapped[col], errors="coerce").dropna().to_numpy(dtype=float)
+            if not len(new):
+                continue
+            k = np.concatenate([keys[col], rng.random(len(new))])
+            v = np.concatenate([values[col], new])
+            if len(k) > sample_size:
+                keep = np.argpartition(k, sample_size)[:sample_size]
+                k, v = k[keep], v[keep]
+            keys[col], values[col] = k, v
+    return {col: float(np.median(v)) for col, v in values.items() if len(v)}
+
+
+def hex_ids(hashes: np.ndarray) -> np.ndarray:
+    """16-character hex strings for uint64 hashes, without a per-row Python loop."""
+    shifts = np.arange(60, -4, -4, dtype=np.uint64)
+    nibbles = ((hashes.astype(np.uint64)[:, None] >> shifts) & np.uint64(15)).astype(np.intp)
+    digits = np.frombuffer(b"0123456789abcdef", dtype="S1")[nibbles]
+    return digits.view("S16").ravel().astype(str)
+
+
+def pseudo_ids(n: int, row_offset: int = 0, salt: str = "") -> np.ndarray:
+    rows = pd.DataFrame({"salt": salt, "row": np.arange(row_offset, row_offset + n, dtype=np.int64)})
+    return hex_ids(pd.util.hash_pandas_object(rows, index=False).to_numpy())
+
+
+def identity_hashes(df: pd.DataFrame, source: str, source_ids: bool) -> np.ndarray:
+    """One uint64 per row; equal hashes mean the same patient visit.
+
+    - A row with the source's own patient ID and a timestamp is keyed on those. IDs only mean
+      something inside their source, so the source name is part of the key.
+    - Any other row is keyed on every feature, label and the timestamp, normalized so spelling
+      differences between sources ("F", "female") still match.
+    - A row with nothing recorded is never a duplicate.
+    """
+    content = pd.DataFrame(index=df.index)
+    for col in CONTENT_COLUMNS:
+        if col == "gender":
+            # "M"/"Male"/"male" from different sources all normalize to "m".
+            content[col] = df[col].fillna("").astype(str).str.strip().str.lower().str[:1]
+        elif col == "timestamp" or col in TEXT_CONTENT_COLUMNS:
+            content[col] = df[col].fillna("").astype(str).str.strip().str.lower()
+        else:
+            content[col] = pd.to_numeric(df[col], errors="coerce").round(2)
+    hashes = pd.util.hash_pandas_object(content, index=False).to_numpy()
+
+    text = content.select_dtypes(include="object")
+    empty = (text == "").all(axis=1) & content.drop(columns=text.columns).isna().all(axis=1)
+    if empty.any():
+        unique = pd.DataFrame({"source": source, "row": np.flatnonzero(empty.to_numpy()), "kind": "empty"})
+        hashes[empty.to_numpy()] = pd.util.hash_pandas_object(unique, index=False).to_numpy()
+
+    if source_ids:
+        patient = df["patient_id"].fillna("").astype(str).str.strip()
+        timestamp = content["timestamp"]
+        keyed = ((patient != "") & (timestamp != "")).to_numpy()
+        if keyed.any():
+            ids = pd.DataFrame({"source": source, "patient_id": patient[keyed], "timestamp": timestamp[keyed]})
+            hashes[keyed] = pd.util.hash_pandas_object(ids, index=False).to_numpy()
+    return hashes
+
+
+def map_columns(df: pd.DataFrame, row_offset: int = 0, id_salt: str = "") -> pd.DataFrame:
     normalized = {c.lower().strip(): c for c in df.columns}
-    out = pd.DataFrame()
+    out = pd.DataFrame(index=df.index)
 
     for target, aliases in COLUMN_ALIASES.items():
         picked = None
@@ -76,9 +231,7 @@ def map_columns(df: pd.DataFrame) -> pd.DataFrame:
 
     if out["patient_id"].isna().all():
         # Create pseudo IDs if missing.
-        out["patient_id"] = [
-            hashlib.sha1(f"row-{i}".encode("utf-8")).hexdigest()[:12] for i in range(len(out))
-        ]
+        out["patient_id"] = pseudo_ids(len(out), row_offset, id_salt)
 
     if out["source"].isna().all():
         out["source"] = "local"
@@ -86,7 +239,7 @@ def map_columns(df: pd.DataFrame) -> pd.DataFrame:
     return out
 
 
-def clean_types(df: pd.DataFrame) -> pd.DataFrame:
+def clean_types(df: pd.DataFrame, medians: dict[str, float] | None = None) -> pd.DataFrame:
     numeric_cols = [
         "age",
         "bmi",
@@ -116,14 +269,132 @@ def clean_types(df: pd.DataFrame) -> pd.DataFrame:
     for col in text_cols:
         df[col] = df[col].fillna("").astype(str).str.strip()
 
-    # Basic imputation.
-    for col in ["age", "bmi", "hba1c", "fasting_glucose"]:
-        if df[col].notna().any():
-            df[col] = df[col].fillna(df[col].median())
+    # Basic imputation. Chunked runs pass dataset-wide medians so every chunk is filled consistently.
+    if medians is None:
+        medians = {col: df[col].median() for col in IMPUTED_COLUMNS if df[col].notna().any()}
+    return impute(df, medians)
 
+
+def impute(df: pd.DataFrame, medians: dict[str, float]) -> pd.DataFrame:
+    for col, value in medians.items():
+        df[col] = df[col].fillna(value)
     return df
 
 
+def parse_input(spec: str) -> dict:
+    """`[name=]path.csv` or `[name=]path.db:table`; the name defaults to the file stem or table name."""
+    name = None
+    if "=" in spec and "/" not in spec.split("=", 1)[0]:
+        name, spec = spec.split("=", 1)
+    path, _, table = spec.rpartition(":")
+    if path and Path(path).suffix.lower() in (".db", ".sqlite", ".sqlite3"):
+        source = {"csv": None, "sqlite": path, "table": table}
+        name = name or table
+    else:
+        source = {"csv": spec, "sqlite": None, "table": None}
+        name = name or Path(spec).stem
+    source["name"] = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+    return source
+
+
+def load_source(source: dict) -> dict:
+    """Worker: read one source with projected columns, normalize it and hash its identifying columns."""
+    started = time.perf_counter()
+    columns = projected_columns(source_columns(source["csv"], source["sqlite"], source["table"]))
+    raw_df = pd.concat(read_input(source["csv"], source["sqlite"], source["table"], columns), ignore_index=True)
+    # map_columns invents pseudo IDs when a source has none; those must not key the dedupe.
+    source_ids = any(
+        c.lower().strip() in COLUMN_ALIASES["patient_id"] and raw_df[c].notna().any() for c in raw_df.columns
+    )
+    df = map_columns(raw_df, id_salt=source["name"])
+    df["source"] = source["name"]
+    # Imputation waits until all sources are merged and deduplicated.
+    df = clean_types(df, medians={})
+    return {
+        "name": source["name"],
+        "frame": df,
+        "hashes": identity_hashes(df, source["name"], source_ids),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def merge_sources(loaded: list[dict]) -> tuple[pd.DataFrame, list[dict]]:
+    """Drop repeated patient visits; the first source listed keeps a row that appears in several."""
+    seen = np.empty(0, dtype=np.uint64)
+    frames = []
+    report = []
+    for item in loaded:
+        hashes = item["hashes"]
+        across = np.isin(hashes, seen)
+        within = pd.Series(hashes).duplicated().to_numpy() & ~across
+        keep = ~(across | within)
+        seen = np.union1d(seen, hashes)
+        frames.append(item["frame"][keep])
+        report.append(
+            {
+                "source": item["name"],
+                "rows": len(hashes),
+                "duplicates_within": int(within.sum()),
+                "duplicates_across": int(across.sum()),
+                "kept": int(keep.sum()),
+                "seconds": item["seconds"],
+            }
+        )
+    merged = pd.concat(frames, ignore_index=True)
+    medians = {col: merged[col].median() for col in IMPUTED_COLUMNS if merged[col].notna().any()}
+    return impute(merged, medians), report
+
+
+def write_partitioned(df: pd.DataFrame, schema: dict, root: Path = PARTITIONED_PATH) -> Path:
+    """One `source=<name>/part-0.parquet` file per source; readers recover `source` from the folder name."""
+    if root.exists():
+        shutil.rmtree(root)
+    for name, part in df.groupby("source", sort=True, observed=True):
+        writer = DatasetAppender(root / f"source={name}" / "part-0.parquet", schema)
+        writer.append(part.drop(columns=["source"]))
+        writer.close()
+    return root
+
+
+def prepare_multi_source(args: argparse.Namespace, schema: dict) -> None:
+    started = time.perf_counter()
+    sources = [parse_input(spec) for spec in args.inputs]
+    names = [s["name"] for s in sources]
+    if len(set(names)) != len(names):
+        raise SystemExit(f"Source names must be unique: {', '.join(names)} (use name=path to rename)")
+
+    workers = max(1, min(args.workers, len(sources)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        loaded = list(pool.map(load_source, sources))
+    df, report = merge_sources(loaded)
+
+    missing = validate_columns(df, schema)
+    if missing:
+        print("Missing schema columns:", ", ".join(missing))
+        raise SystemExit(1)
+
+    outputs = []
+    if args.format in ("parquet", "both"):
+        outputs.append(write_partitioned(df, schema))
+    if args.format in ("csv", "both"):
+        writer = DatasetAppender(CSV_PATH, schema)
+        writer.append(df)
+        outputs.append(writer.close())
+    for path in outputs:
+        print(f"Saved: {path}")
+    # Training reads the first output: the partitioned Parquet dataset when one was written.
+    set_dataset_path(outputs[0])
+
+    print(f"{'source':24s} {'rows':>10s} {'dup_within':>10s} {'dup_across':>10s} {'kept':>10s} {'read_s':>7s}")
+    for entry in report:
+        print(
+            f"{entry['source']:24s} {entry['rows']:10d} {entry['duplicates_within']:10d} "
+            f"{entry['duplicates_across']:10d} {entry['kept']:10d} {entry['seconds']:7.2f}"
+        )
+    elapsed = time.perf_counter() - started
+    print(f"Rows: {len(df)} from {len(sources)} source(s) on {workers} worker(s) in {elapsed:.2f}s")
+
+
 def validate_columns(df: pd.DataFrame, schema: dict) -> list[str]:
     missing = [c for c in schema["required_columns"] if c not in df.columns]
     return missing
@@ -135,23 +406,83 @@ def main() -> None:
     parser.add_argument("--sqlite", help="Input SQLite DB path")
     parser.add_argument("--table", help="Table name if using SQLite")
     parser.add_argument("--source", default="local", help="Source name tag")
+    parser.add_argument(
+        "--inputs",
+        nargs="+",
+        metavar="SOURCE",
+        help="Merge several sources: [name=]file.csv or [name=]file.db:table; writes a partitioned dataset",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes for --inputs")
+    parser.add_argument(
+        "--format",
+        choices=["parquet", "csv", "both"],
+        default="parquet",
+        help="Output format; Parquet keeps dtypes, CSV is an optional export",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=0,
+        help="Stream the input in chunks of this many rows (0 = load it all at once)",
+    )
+    parser.add_argument(
+        "--median-sample",
+        type=int,
+        default=200_000,
+        help="Values per column kept for the imputation medians in chunked mode (exact below this size)",
+    )
     args = parser.parse_args()
 
-    raw_df = read_input(args.csv, args.sqlite, args.table)
-    df = map_columns(raw_df)
-    df["source"] = args.source
-    df = clean_types(df)
-
     schema = load_schema()
-    missing = validate_columns(df, schema)
-    if missing:
-        print("Missing schema columns:", ", ".join(missing))
-        raise SystemExit(1)
+    if args.inputs:
+        if args.csv or args.sqlite:
+            parser.error("--inputs cannot be combined with --csv/--sqlite")
+        prepare_multi_source(args, schema)
+        return
+
+    started = time.perf_counter()
+    columns = projected_columns(source_columns(args.csv, args.sqlite, args.table))
+
+    medians = None
+    if args.chunksize:
+        medians = sample_medians(
+            read_input(args.csv, args.sqlite, args.table, columns, args.chunksize), args.median_sample
+        )
+        print("Imputation medians:", ", ".join(f"{k}={v:g}" for k, v in medians.items()) or "none")
+
+    paths = []
+    if args.format in ("parquet", "both"):
+        paths.append(PARQUET_PATH)
+    if args.format in ("csv", "both"):
+        paths.append(CSV_PATH)
+    writers = [DatasetAppender(path, schema) for path in paths]
+
+    rows = 0
+    chunks = 0
+    for raw_df in read_input(args.csv, args.sqlite, args.table, columns, args.chunksize):
+        df = map_columns(raw_df, row_offset=rows)
+        df["source"] = args.source
+        df = clean_types(df, medians)
+
+        missing = validate_columns(df, schema)
+        if missing:
+            print("Missing schema columns:", ", ".join(missing))
+            raise SystemExit(1)
+
+        for writer in writers:
+            writer.append(df)
+        rows += len(df)
+        chunks += 1
+
+    for writer in writers:
+        print(f"Saved: {writer.close()}")
+    set_dataset_path(paths[0])
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(OUT_PATH, index=False)
-    print(f"Saved: {OUT_PATH}")
-    print(f"Rows: {len(df)}")
+    elapsed = time.perf_counter() - started
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Rows: {rows}")
+    print(f"Chunks: {chunks}  elapsed: {elapsed:.2f}s  throughput: {rows / max(elapsed, 1e-9):,.0f} rows/s")
+    print(f"Peak RSS: {peak_mb:.1f} MB")
 
 
 if __name__ == "__main__":
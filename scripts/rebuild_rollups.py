@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.models.migrations import check_schema
+from backend.models.rollup_model import rebuild_rollups
+from backend.models.score_distribution import rebuild_score_histograms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recompute the rollups and score histograms behind the admin analytics")
+    parser.add_argument("--skip-archive", action="store_true", help="Only count rows still in the main database")
+    args = parser.parse_args()
+
+    check_schema()
+    started = time.perf_counter()
+    report = rebuild_rollups(include_archive=not args.skip_archive)
+    print(f"Rollups: {report['day_rows']} day rows covering {report['assessments']} assessments")
+    report = rebuild_score_histograms(include_archive=not args.skip_archive)
+    print(f"Score histograms: {report['day_rows']} day rows covering {report['scores']} domain scores")
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
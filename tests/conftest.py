@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+from backend.models import db
+from backend.models.migrations import migrate
+
+# Training and data scripts import their siblings by module name, as when run from their folders.
+ROOT = Path(__file__).resolve().parents[1]
+for folder in (ROOT / "ml" / "training", ROOT / "scripts"):
+    if str(folder) not in sys.path:
+        sys.path.insert(0, str(folder))
+
+
+@pytest.fixture(autouse=True)
+def app_db(tmp_path, monkeypatch):
+    """Point every test at a fresh, migrated SQLite file."""
+    path = tmp_path / "app.db"
+    monkeypatch.setattr(db, "DB_PATH", path)
+    migrate()
+    return path
+
+
+@pytest.fixture(autouse=True)
+def dataset_pointer(tmp_path, monkeypatch):
+    """Keep scripts that record the current dataset from touching the repository's pointer file."""
+    import dataset_io
+
+    path = tmp_path / "current_dataset.txt"
+    monkeypatch.setattr(dataset_io, "CURRENT_PATH", path)
+    return path
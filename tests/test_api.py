@@ -14,3 +14,27 @@ def test_assess_validation_error():
     resp = client.post('/api/assess', json={'profile': {'Age': 21}})
     assert resp.status_code == 400
     assert resp.get_json()['status'] == 'error'
+
+
+def test_model_status_reports_versions(tmp_path, monkeypatch):
+    import joblib
+    from sklearn.dummy import DummyClassifier
+
+    from backend.services import model_inference
+
+    monkeypatch.setattr(model_inference, 'MODEL_DIR', tmp_path)
+    model = DummyClassifier().fit([[0], [1]], [0, 1])
+    model.model_fingerprint_ = 'abc123'
+    joblib.dump(model, tmp_path / 'thyroid_best_model.pkl')
+
+    app = create_app()
+    body = app.test_client().get('/api/model-status').get_json()
+    assert body['model_versions']['thyroid'] == 'abc123'
+    assert body['model_versions']['diabetes'] is None
+
+
+def test_ordinal_filter_suffixes():
+    ordinal = create_app().jinja_env.filters['ordinal']
+    assert [ordinal(n) for n in (1, 2, 3, 4, 11, 12, 13, 21, 22, 23, 100, 101, 111, 62.5)] == [
+        '1st', '2nd', '3rd', '4th', '11th', '12th', '13th', '21st', '22nd', '23rd', '100th', '101st', '111th', '62nd'
+    ]
@@ -0,0 +1,25 @@
+from backend.models import db
+from backend.models.archive_model import archive_assessments, archive_files
+from backend.models.assessment_model import get_all_assessment_rows, get_all_assessments_json, save_assessment
+
+
+def test_archive_moves_old_rows_and_union_reads():
+    result = {"risk_scores": {"thyroid": "20%", "diabetes": "30%", "pcos": "0%", "adrenal": "25%", "metabolic": "40%"}}
+    for i in range(4):
+        save_assessment({"Age": 50, "Gender": "Male", "BMI": 26.0}, result, f"Patient {i}")
+
+    conn = db.get_connection()
+    conn.execute("UPDATE assessments SET created_at='2020-03-04T10:00:00Z' WHERE id IN (1, 2)")
+    conn.execute("UPDATE assessments SET created_at='2020-05-01T10:00:00Z' WHERE id = 3")
+    conn.commit()
+    conn.close()
+
+    report = archive_assessments(older_than_days=365)
+    assert report["moved"] == {"2020-03": 2, "2020-05": 1}
+    assert len(archive_files()) == 2
+
+    assert [r["id"] for r in get_all_assessment_rows()] == [4]
+    assert [r["id"] for r in get_all_assessment_rows(include_archive=True)] == [4, 3, 2, 1]
+    archived = get_all_assessments_json(include_archive=True)[-1]
+    assert archived["result_json"]["risk_scores"]["diabetes"] == "30%"
+    assert archived["profile_json"]["Age"] == 50
@@ -0,0 +1,26 @@
+from backend.models.assessment_model import save_assessment, search_assessments
+
+
+def _result(diabetes: str, triggers: list[str]) -> dict:
+    return {
+        "risk_scores": {"thyroid": "20%", "diabetes": diabetes, "pcos": "0%", "adrenal": "25%", "metabolic": "40%"},
+        "key_triggers": triggers,
+    }
+
+
+def test_search_ranks_and_filters():
+    save_assessment({"Symptoms": ["Fatigue"]}, _result("70%", ["High BMI"]), "Anita Rao")
+    save_assessment({"Symptoms": ["Acne"]}, _result("30%", ["Elevated insulin"]), "Ravi Kumar")
+    save_assessment({"Symptoms": ["Fatigue", "Hair loss"]}, _result("50%", ["Poor sleep"]), "Meera")
+
+    names = [r["patient_name"] for r in search_assessments("fatig")["results"]]
+    assert sorted(names) == ["Anita Rao", "Meera"]
+
+    filtered = search_assessments("fatigue", domain="diabetes", min_risk=60)["results"]
+    assert [r["patient_name"] for r in filtered] == ["Anita Rao"]
+
+    assert [r["patient_name"] for r in search_assessments("insulin")["results"]] == ["Ravi Kumar"]
+    assert search_assessments('"unbalanced (quote')["results"] == []
+
+    page = search_assessments("", per_page=2)
+    assert len(page["results"]) == 2 and page["has_more"]
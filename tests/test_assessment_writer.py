@@ -0,0 +1,53 @@
+from backend.models import db
+from backend.models.assessment_model import (
+    configure_assessment_writes,
+    flush_assessment_writes,
+    get_assessment_write_stats,
+    save_assessment,
+)
+
+
+def test_async_writes_are_batched_and_flushed():
+    configure_assessment_writes("async", max_queue=100, batch_size=25)
+    try:
+        result = {"risk_scores": {"thyroid": "40%", "diabetes": "70%", "pcos": "0%", "adrenal": "50%", "metabolic": "60%"}}
+        for i in range(60):
+            save_assessment({"Age": 30 + i % 5, "Gender": "Female", "BMI": 24.0}, result, f"Patient {i}")
+        flush_assessment_writes()
+        stats = get_assessment_write_stats()
+    finally:
+        configure_assessment_writes("sync")
+
+    conn = db.get_connection()
+    count = conn.execute("SELECT COUNT(*) FROM assessments").fetchone()[0]
+    conn.close()
+    assert count == 60
+    assert stats["durability"] == "async"
+    assert stats["rows_committed"] + stats["rows_written_inline"] == 60
+    assert stats["queue_depth"] == 0
+    assert get_assessment_write_stats() == {"durability": "sync"}
+
+
+def test_failed_batches_are_spilled_and_replayed(monkeypatch):
+    from backend.models import assessment_writer
+    from backend.models.assessment_model import build_assessment_row
+
+    monkeypatch.setattr(assessment_writer.time, "sleep", lambda _: None)
+
+    def failing_insert(conn, rows):
+        raise RuntimeError("disk I/O error")
+
+    writer = assessment_writer.AssessmentWriter(failing_insert)
+    rows = [build_assessment_row({"Age": 40}, {"risk_scores": {"thyroid": "55%"}}, f"Patient {i}") for i in range(3)]
+    writer._commit(rows)
+    assert writer.stats()["rows_spilled"] == 3
+    assert len(list(assessment_writer.dead_letter_dir().glob("*.jsonl"))) == 1
+
+    # Switching to sync mode (or restarting the writer) commits the spilled rows, blobs included.
+    configure_assessment_writes("sync")
+    conn = db.get_connection()
+    stored = conn.execute("SELECT patient_name, thyroid_risk, result_blob FROM assessments ORDER BY id").fetchall()
+    conn.close()
+    assert [(r["patient_name"], r["thyroid_risk"]) for r in stored] == [(f"Patient {i}", "55%") for i in range(3)]
+    assert stored[0]["result_blob"] == rows[0]["result_blob"]
+    assert not list(assessment_writer.dead_letter_dir().glob("*.jsonl"))
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+from compress_models import compact_tree, compress, distill, node_count
+
+
+def _data(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({'a': rng.normal(size=n), 'b': rng.normal(size=n), 'c': rng.integers(0, 4, n).astype(float)})
+    y = ((X['a'] + 0.5 * X['b'] * X['c'] + rng.normal(0, 0.5, n)) > 0).astype(int)
+    return X, y
+
+
+def test_lossless_compaction_keeps_predict_proba_exactly():
+    X, y = _data()
+    # Fully grown forest: pure leaves, so merging only ever joins identical siblings.
+    forest = Pipeline([('pre', StandardScaler()), ('clf', RandomForestClassifier(n_estimators=20, random_state=0))]).fit(X, y)
+    compacted = compress(forest, tol=0.0)
+    np.testing.assert_array_equal(compacted.predict_proba(X), forest.predict_proba(X))
+    assert node_count(compacted.steps[-1][1]) <= node_count(forest.steps[-1][1])
+    # The original is left untouched.
+    assert compacted.steps[-1][1] is not forest.steps[-1][1]
+
+
+def test_zero_tolerance_keeps_boosted_leaf_values_exactly():
+    X, y = _data()
+    boosted = Pipeline(
+        [('pre', StandardScaler()), ('clf', GradientBoostingClassifier(n_estimators=20, max_depth=3, random_state=0))]
+    ).fit(X, y)
+    # Boosting leaves hold arbitrary float64 log-odds steps; none may be rounded.
+    compacted = compress(boosted, tol=0.0)
+    np.testing.assert_array_equal(compacted.decision_function(X), boosted.decision_function(X))
+
+
+def test_merge_tolerance_bounds_the_probability_change():
+    X, y = _data()
+    boosted = Pipeline(
+        [('pre', StandardScaler()), ('clf', GradientBoostingClassifier(n_estimators=50, max_depth=4, random_state=0))]
+    ).fit(X, y)
+    compacted = compress(boosted, tol=1e-3)
+    assert node_count(compacted.steps[-1][1]) < node_count(boosted.steps[-1][1])
+    # Each merged split moves the log-odds by at most tol; 50 trees bound the sum.
+    diff = np.abs(compacted.decision_function(X) - boosted.decision_function(X)).max()
+    assert diff <= 50 * 1e-3 + 1e-6
+
+
+def test_compact_tree_handles_trees_deeper_than_the_recursion_limit():
+    # Alternating labels on one feature grow a chain of single-sample splits.
+    X = np.arange(3000, dtype=float)[:, None]
+    y = np.arange(3000) % 2
+    tree = DecisionTreeClassifier().fit(X, y)
+    assert tree.get_depth() > 2000
+    compacted = compact_tree(tree.tree_, tol=0.0, scale=1.0)
+    assert compacted.node_count == tree.tree_.node_count
+    np.testing.assert_array_equal(compacted.predict(X.astype(np.float32)), tree.tree_.predict(X.astype(np.float32)))
+
+
+def test_distill_trains_a_small_student_that_follows_the_teacher():
+    X, y = _data()
+    teacher = Pipeline([('pre', StandardScaler()), ('clf', RandomForestClassifier(n_estimators=50, random_state=0))]).fit(X, y)
+    student = distill(teacher, X, n_augment=1000, n_trees=10, seed=1)
+
+    assert student.steps[0][1] is teacher.steps[0][1]
+    assert node_count(student.steps[-1][1]) < node_count(teacher.steps[-1][1]) / 10
+    X_new, _ = _data(seed=2)
+    assert (student.predict(X_new) == teacher.predict(X_new)).mean() >= 0.85
+    again = distill(teacher, X, n_augment=1000, n_trees=10, seed=1)
+    np.testing.assert_array_equal(again.predict_proba(X_new), student.predict_proba(X_new))
+
+
+def test_unsupported_tree_layout_is_refused(monkeypatch):
+    import compress_models
+
+    X, y = _data()
+    tree = DecisionTreeClassifier(max_depth=3).fit(X, y)
+    monkeypatch.setattr(compress_models, 'TREE_NODE_FIELDS', compress_models.TREE_NODE_FIELDS | {'renamed_field'})
+    with pytest.raises(ValueError, match='unsupported Tree state layout'):
+        compact_tree(tree.tree_, tol=0.0, scale=1.0)
+    forest = Pipeline([('pre', StandardScaler()), ('clf', RandomForestClassifier(n_estimators=5, random_state=0))]).fit(X, y)
+    compacted = compress(forest, tol=1.0)
+    assert node_count(compacted.steps[-1][1]) == node_count(forest.steps[-1][1])
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+from backend.app import create_app
+from backend.services import drift_monitor
+from backend.services.drift_monitor import (
+    DriftMonitor,
+    FeatureSketches,
+    drift_report,
+    record_features,
+    save_feature_drift,
+    write_reference,
+)
+from backend.services.sketches import KLLSketch
+
+
+def test_kll_sketch_quantiles_stay_within_rank_error_after_merge():
+    data = np.random.default_rng(0).lognormal(size=40000)
+    left, right = KLLSketch(seed=1), KLLSketch(seed=2)
+    for value in data[:20000]:
+        left.update(value)
+    for value in data[20000:]:
+        right.update(value)
+    left.merge(right)
+    assert left.n == 40000 and left.retained() < 600
+    fractions = [0.01, 0.1, 0.5, 0.9, 0.99]
+    for q, estimate in zip(fractions, left.quantiles(fractions)):
+        assert abs((data <= estimate).mean() - q) < 0.02
+    restored = KLLSketch.from_dict(left.to_dict())
+    assert restored.quantiles([0.5]) == left.quantiles([0.5])
+
+
+def test_kll_sketch_memory_stays_bounded():
+    data = np.random.default_rng(3).normal(size=100000)
+    sketch = KLLSketch(k=200, seed=0)
+    sizes = []
+    for i, value in enumerate(data, start=1):
+        sketch.update(value)
+        if i % 25000 == 0:
+            sizes.append(sketch.retained())
+    # O(k): 3k for the geometric capacities plus at most two items per extra level.
+    assert max(sizes) <= 3 * 200 + 2 * len(sketch.levels)
+    assert all(len(items) < sketch._capacity(h) for h, items in enumerate(sketch.levels))
+    for q, estimate in zip([0.1, 0.5, 0.9], sketch.quantiles([0.1, 0.5, 0.9])):
+        assert abs((data <= estimate).mean() - q) < 0.02
+    assert KLLSketch.from_dict(sketch.to_dict()).retained() == sketch.retained()
+
+
+def _rows(n, seed, tsh_shift=0.0, gender='Female'):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            'age': rng.integers(18, 70, n),
+            'gender': gender,
+            'bmi': rng.normal(27, 4, n),
+            'tsh': rng.normal(2.5 + tsh_shift, 0.8, n),
+            'symptoms': rng.choice(['Fatigue', 'Fatigue, Acne', ''], n),
+        }
+    )
+
+
+def _sketch(df):
+    sketches = FeatureSketches()
+    for row in df.to_dict(orient='records'):
+        sketches.update(row)
+    return sketches
+
+
+def test_drift_report_flags_shifted_features_only():
+    reference = _sketch(_rows(2000, 0))
+    same = drift_report(reference, _sketch(_rows(500, 1)))
+    assert same['status'] == 'stable'
+    assert same['features']['tsh']['live_missing_rate'] == 0.0
+    assert same['features']['hba1c']['live_missing_rate'] == 1.0
+
+    # A lab reporting TSH in different units, from a clinic seeing only male patients.
+    shifted = drift_report(reference, _sketch(_rows(500, 1, tsh_shift=2.0, gender='Male')))
+    assert shifted['status'] == 'drift'
+    assert shifted['features']['tsh']['status'] == 'drift' and shifted['features']['tsh']['ks'] > 0.5
+    assert shifted['features']['gender']['largest_shifts'][0]['value'] in ('Male', 'Female')
+    assert shifted['features']['bmi']['status'] == 'stable'
+    assert shifted['features']['symptoms']['status'] == 'stable'
+
+
+def test_drift_endpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(drift_monitor, 'REFERENCE_PATH', tmp_path / 'drift_reference.json')
+    client = create_app().test_client()
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+    assert client.get('/api/admin/drift').status_code == 503
+
+    write_reference(_rows(1000, 0), drift_monitor.REFERENCE_PATH)
+    for row in _rows(120, 1, tsh_shift=2.0).to_dict(orient='records'):
+        record_features(row)
+    body = client.get('/api/admin/drift').get_json()
+    assert body['live_rows'] == 120 and body['reference_rows'] == 1000
+    assert body['features']['tsh']['status'] == 'drift'
+    # Snapshotted next to the database every SNAPSHOT_EVERY rows.
+    assert (tmp_path / 'drift_sketches.json').exists()
+
+    assert client.post('/api/admin/drift/reset').status_code == 200
+    assert client.get('/api/admin/drift').get_json()['live_rows'] == 0
+
+
+def test_rows_below_the_snapshot_interval_are_saved_at_shutdown(app_db):
+    for row in _rows(7, 2).to_dict(orient='records'):
+        record_features(row)
+    snapshot = app_db.parent / 'drift_sketches.json'
+    assert not snapshot.exists()
+
+    save_feature_drift()  # registered with atexit
+    restarted = DriftMonitor()
+    restarted._ensure_loaded()
+    assert restarted._live.rows == 7
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from backend.services.feature_engineering import WORD_SEPARATOR, MultiHotEncoder, build_feature_row
+
+
+def test_multi_hot_ignores_order_and_unknown_tokens():
+    train = pd.DataFrame({'symptoms': ['Fatigue, Acne', 'Hair loss', '', np.nan]})
+    enc = MultiHotEncoder().fit(train)
+    assert enc.vocabulary_ == [['acne', 'fatigue', 'hair loss']]
+
+    test = pd.DataFrame({'symptoms': ['Acne, Fatigue', 'Hair loss, Acne, Dry skin', np.nan]})
+    assert enc.transform(test).toarray().tolist() == [[1, 1, 0], [1, 0, 1], [0, 0, 0]]
+
+
+def test_multi_hot_matches_build_feature_row_text():
+    enc = MultiHotEncoder(separator=WORD_SEPARATOR).fit(pd.DataFrame({'family_history': ['Diabetes Thyroid', 'PCOS']}))
+    row = build_feature_row({'Family history': 'Mother: Type 2 Diabetes', 'Symptoms': ['Acne']}, {})
+    out = enc.transform(pd.DataFrame([row])[['family_history']]).toarray()
+    assert out.tolist() == [[1, 0, 0]]
+    assert row['symptoms'] == 'Acne'
+
+
+def test_missing_text_answers_are_sent_as_the_training_fill_value():
+    from dataset_io import MISSING_CATEGORY, apply_schema
+
+    row = build_feature_row({'Gender': None, 'Diet type': ' Balanced '}, {})
+    assert row['gender'] == row['sleep_quality'] == row['family_history'] == row['symptoms'] == MISSING_CATEGORY
+    assert row['diet_type'] == 'Balanced'
+    trained = apply_schema(pd.DataFrame({'gender': [None], 'diet_type': [' Balanced ']}))
+    assert trained.iloc[0].tolist() == [row['gender'], row['diet_type']]
@@ -0,0 +1,44 @@
+import sqlite3
+
+import pytest
+
+from backend.app import create_app
+from backend.models import db
+from backend.models.migrations import LATEST_VERSION, SchemaOutOfDateError, check_schema, migrate
+
+
+def test_legacy_database_is_upgraded(tmp_path, monkeypatch):
+    path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE assessments (id INTEGER PRIMARY KEY AUTOINCREMENT, created_at TEXT NOT NULL, patient_name TEXT)")
+    conn.execute("INSERT INTO assessments (created_at, patient_name) VALUES ('2024-01-01T00:00:00Z', 'Old Row')")
+    conn.execute("ALTER TABLE assessments ADD COLUMN result_json TEXT")
+    conn.execute(
+        "INSERT INTO assessments (created_at, patient_name, result_json) VALUES (?, ?, ?)",
+        ("2024-01-02T00:00:00Z", "Legacy Result", '{"key_triggers": ["Elevated HbA1c", "Fatigue"]}'),
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(db, "DB_PATH", path)
+
+    with pytest.raises(SchemaOutOfDateError):
+        create_app()
+
+    assert migrate() == list(range(1, LATEST_VERSION + 1))
+    assert migrate() == []
+    assert check_schema() == LATEST_VERSION
+
+    conn = db.get_connection()
+    hits = conn.execute("SELECT rowid FROM assessments_fts WHERE assessments_fts MATCH 'old'").fetchall()
+    by_trigger = conn.execute("SELECT rowid FROM assessments_fts WHERE assessments_fts MATCH 'hba1c'").fetchall()
+    rollups = conn.execute("SELECT granularity, period, gender, assessments FROM assessment_rollups ORDER BY 1, 2").fetchall()
+    conn.close()
+    assert len(hits) == 1
+    assert [r[0] for r in by_trigger] == [2]
+    assert [tuple(r) for r in rollups] == [
+        ("day", "2024-01-01", "Unknown", 1),
+        ("day", "2024-01-02", "Unknown", 1),
+        ("month", "2024-01", "Unknown", 2),
+        ("week", "2024-01-01", "Unknown", 2),
+        ("year", "2024", "Unknown", 2),
+    ]
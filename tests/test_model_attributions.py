@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from backend.services.feature_engineering import MultiHotEncoder
+from backend.services.model_inference import _Explainer
+
+
+def _data(n=400):
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame(
+        {
+            'bmi': rng.uniform(18, 38, n),
+            'stress_level': rng.choice(['Low', 'Moderate', 'High'], n),
+            'symptoms': rng.choice(['', 'Fatigue', 'Fatigue, Acne', 'Acne'], n),
+        }
+    )
+    y = ((df['bmi'] > 28) | df['symptoms'].str.contains('Fatigue')).astype(int)
+    return df, y
+
+
+def _pipeline(clf):
+    pre = ColumnTransformer(
+        [
+            ('num', StandardScaler(), ['bmi']),
+            ('cat', OneHotEncoder(handle_unknown='ignore'), ['stress_level']),
+            ('symptoms', MultiHotEncoder(), ['symptoms']),
+        ]
+    )
+    return Pipeline([('pre', pre), ('clf', clf)])
+
+
+def _encoded(explainer, rows):
+    encoded = explainer.pre.transform(rows)
+    return np.asarray(encoded.toarray() if hasattr(encoded, 'toarray') else encoded, dtype=np.float64)
+
+
+def test_attributions_explain_the_difference_between_two_predictions():
+    df, y = _data()
+    rows = df.iloc[[0, 1]]
+    for clf in (LogisticRegression(), GradientBoostingClassifier(n_estimators=30, random_state=0)):
+        model = _pipeline(clf).fit(df, y)
+        explainer = _Explainer(model)
+        X = _encoded(explainer, rows)
+        raw = model.decision_function(rows)
+        contributions = [explainer.contributions(x).sum() for x in X]
+        assert np.isclose(contributions[0] - contributions[1], raw[0] - raw[1])
+
+    forest = _pipeline(RandomForestClassifier(n_estimators=20, max_depth=4, random_state=0)).fit(df, y)
+    explainer = _Explainer(forest)
+    X = _encoded(explainer, rows)
+    proba = forest.predict_proba(rows)[:, 1]
+    contributions = [explainer.contributions(x).sum() for x in X]
+    assert np.isclose(contributions[0] - contributions[1], proba[0] - proba[1])
+
+
+def test_top_drivers_name_input_features_and_tokens():
+    df, y = _data()
+    model = _pipeline(LogisticRegression()).fit(df, y)
+    explainer = _Explainer(model)
+    row = pd.DataFrame([{'bmi': 36.0, 'stress_level': 'High', 'symptoms': 'Fatigue'}])
+    drivers = explainer.top_drivers(_encoded(explainer, row)[0], row.iloc[0].to_dict(), k=2)
+    assert [d['feature'] for d in drivers] == ['Symptom: fatigue', 'BMI 36.0']
+    assert all(d['contribution'] > 0 for d in drivers)
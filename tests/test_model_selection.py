@@ -0,0 +1,51 @@
+import joblib
+from sklearn.dummy import DummyClassifier
+
+from train_classical_models import pareto_front, select_best, served_fingerprint
+
+CANDIDATES = {
+    'logistic_regression': {'f1': 0.80, 'p99_ms': 1.0, 'size_kb': 10.0},
+    'random_forest': {'f1': 0.86, 'p99_ms': 9.0, 'size_kb': 900.0},
+    'gradient_boosting': {'f1': 0.855, 'p99_ms': 3.0, 'size_kb': 200.0},
+    # Slower and bigger than gradient boosting for a lower F1: dominated.
+    'svm': {'f1': 0.84, 'p99_ms': 5.0, 'size_kb': 300.0},
+}
+
+
+def test_pareto_front_drops_dominated_candidates_only():
+    assert pareto_front(CANDIDATES) == ['logistic_regression', 'random_forest', 'gradient_boosting']
+    # An exact tie dominates neither copy.
+    tied = {'a': {'f1': 0.8, 'p99_ms': 1.0, 'size_kb': 1.0}, 'b': {'f1': 0.8, 'p99_ms': 1.0, 'size_kb': 1.0}}
+    assert pareto_front(tied) == ['a', 'b']
+
+
+def test_select_best_f1_policy_keeps_model_bank_order_on_ties():
+    assert select_best(CANDIDATES, 'f1', None, None, 0.01)[0] == 'random_forest'
+    tied = {'a': {'f1': 0.8, 'p99_ms': 2.0, 'size_kb': 1.0}, 'b': {'f1': 0.8, 'p99_ms': 1.0, 'size_kb': 1.0}}
+    assert select_best(tied, 'f1', None, None, 0.01)[0] == 'a'
+
+
+def test_select_best_slo_policy_applies_latency_and_size_limits():
+    assert select_best(CANDIDATES, 'slo', 4.0, None, 0.01)[0] == 'gradient_boosting'
+    assert select_best(CANDIDATES, 'slo', None, 250.0, 0.01)[0] == 'gradient_boosting'
+    assert select_best(CANDIDATES, 'slo', 4.0, 50.0, 0.01)[0] == 'logistic_regression'
+    name, reason = select_best(CANDIDATES, 'slo', 0.5, None, 0.01)
+    assert name == 'random_forest' and 'fell back' in reason
+
+
+def test_select_best_pareto_policy_trades_f1_within_tolerance_for_latency():
+    # gradient_boosting is 0.005 below the best F1 and three times faster.
+    assert select_best(CANDIDATES, 'pareto', None, None, 0.01)[0] == 'gradient_boosting'
+    assert select_best(CANDIDATES, 'pareto', None, None, 0.001)[0] == 'random_forest'
+    assert select_best(CANDIDATES, 'pareto', None, None, 0.1)[0] == 'logistic_regression'
+
+
+def test_served_fingerprint_reads_the_artifact_not_metrics(tmp_path):
+    path = tmp_path / 'thyroid_best_model.pkl'
+    assert served_fingerprint(path) is None
+    model = DummyClassifier().fit([[0], [1]], [0, 1])
+    model.model_fingerprint_ = 'abc+compressed'
+    joblib.dump(model, path)
+    assert served_fingerprint(path) == 'abc+compressed'
+    path.write_bytes(b'not a pickle')
+    assert served_fingerprint(path) is None
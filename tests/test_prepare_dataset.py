@@ -0,0 +1,151 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import prepare_dataset
+from prepare_dataset import sample_medians
+
+
+def _source_csv(path, n=53, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            'patient_age': rng.integers(18, 80, n).astype(float),
+            'sex': rng.choice(['F', 'M', 'Female'], n),
+            'body_mass_index': rng.normal(27, 4, n).round(1),
+            'tsh': rng.normal(2.5, 0.8, n).round(2),
+            'a1c': rng.normal(5.6, 0.5, n).round(1),
+            'glucose': rng.normal(95, 12, n).round(0),
+            'symptoms': rng.choice(['Fatigue', 'Fatigue, Acne', ''], n),
+            'thyroid_label': rng.integers(0, 2, n),
+        }
+    )
+    for col in ['patient_age', 'body_mass_index', 'a1c', 'glucose']:
+        df.loc[rng.random(n) < 0.2, col] = np.nan
+    df.to_csv(path, index=False)
+    return df
+
+
+def _prepare(monkeypatch, tmp_path, csv, out, *extra):
+    monkeypatch.setattr(prepare_dataset, 'PARQUET_PATH', out / 'dataset.parquet')
+    monkeypatch.setattr(prepare_dataset, 'CSV_PATH', out / 'dataset.csv')
+    monkeypatch.setattr(sys, 'argv', ['prepare_dataset.py', '--csv', str(csv), '--format', 'both', *extra])
+    prepare_dataset.main()
+    return pd.read_parquet(out / 'dataset.parquet'), pd.read_csv(out / 'dataset.csv', keep_default_na=False)
+
+
+def test_chunked_output_matches_unchunked(tmp_path, monkeypatch):
+    csv = tmp_path / 'source.csv'
+    _source_csv(csv)
+    whole_parquet, whole_csv = _prepare(monkeypatch, tmp_path, csv, tmp_path / 'whole')
+    # 53 rows in chunks of 10: the last chunk is partial and pseudo IDs must continue across chunks.
+    chunked_parquet, chunked_csv = _prepare(monkeypatch, tmp_path, csv, tmp_path / 'chunked', '--chunksize', '10')
+
+    assert len(whole_parquet) == 53 and whole_parquet['patient_id'].is_unique
+    assert whole_parquet['age'].notna().all() and whole_parquet['bmi'].notna().all()
+    pd.testing.assert_frame_equal(chunked_parquet, whole_parquet, check_categorical=False)
+    pd.testing.assert_frame_equal(chunked_csv, whole_csv)
+
+
+def test_sample_medians_exact_below_sample_size_and_close_above():
+    rng = np.random.default_rng(1)
+    frame = pd.DataFrame({'age': rng.integers(18, 90, 5000).astype(float), 'bmi': rng.normal(27, 4, 5000)})
+    chunks = [frame.iloc[i : i + 700] for i in range(0, len(frame), 700)]
+
+    exact = sample_medians(iter(chunks), sample_size=10_000)
+    assert exact['age'] == frame['age'].median()
+    assert exact['bmi'] == pytest.approx(frame['bmi'].median())
+    # Columns with no values get no median, so imputation leaves them alone.
+    assert 'hba1c' not in exact
+
+    sampled = sample_medians(iter(chunks), sample_size=1000)
+    assert abs(sampled['bmi'] - frame['bmi'].median()) < 0.5
+
+
+def test_merge_sources_drops_repeated_visits_and_reads_back_partitioned(tmp_path, monkeypatch):
+    import dataset_io
+    from prepare_dataset import load_source, merge_sources, parse_input, write_partitioned
+
+    clinic = _source_csv(tmp_path / 'clinic.csv', n=10, seed=2)
+    clinic = pd.concat([clinic, clinic.iloc[[4]]], ignore_index=True)  # one visit entered twice
+    clinic.to_csv(tmp_path / 'clinic.csv', index=False)
+    lab = clinic.iloc[[0, 1, 2]].copy()
+    lab['sex'] = lab['sex'].map({'F': 'female', 'M': 'MALE', 'Female': 'f'})  # same visits, other spelling
+    new = _source_csv(tmp_path / 'new.csv', n=2, seed=3)
+    lab = pd.concat([lab, new, new.iloc[[1]]], ignore_index=True)
+    lab.to_csv(tmp_path / 'lab.csv', index=False)
+
+    loaded = [load_source(parse_input(str(tmp_path / name))) for name in ('clinic.csv', 'lab.csv')]
+    merged, report = merge_sources(loaded)
+
+    assert [(r['source'], r['rows'], r['duplicates_within'], r['duplicates_across'], r['kept']) for r in report] == [
+        ('clinic', 11, 1, 0, 10),
+        ('lab', 6, 1, 3, 2),
+    ]
+    assert len(merged) == 12 and merged['age'].notna().all()
+    visits = merged[['age', 'bmi', 'tsh', 'hba1c', 'fasting_glucose']].round(2)
+    assert not visits.duplicated().any()
+    assert merged['source'].value_counts().to_dict() == {'clinic': 10, 'lab': 2}
+
+    root = tmp_path / 'processed' / 'dataset'
+    monkeypatch.setattr(dataset_io, 'PARTITIONED_PATH', root)
+    monkeypatch.setattr(dataset_io, 'PARQUET_PATH', tmp_path / 'processed' / 'dataset.parquet')
+    monkeypatch.setattr(dataset_io, 'CSV_PATH', tmp_path / 'processed' / 'dataset.csv')
+    write_partitioned(merged, dataset_io.load_schema(), root)
+    assert [p.parent.name for p in dataset_io.dataset_files(root)] == ['source=clinic', 'source=lab']
+    dataset_io.set_dataset_path(root)
+    assert dataset_io.dataset_path() == root
+
+    read_back = dataset_io.read_dataset(columns=['patient_id', 'source', 'tsh'])
+    assert sorted(read_back['source'].astype(str)) == sorted(merged['source'])
+    assert set(read_back['patient_id']) == set(merged['patient_id'])
+
+
+def test_sparse_rows_differing_only_in_symptoms_or_labels_are_kept(tmp_path):
+    from prepare_dataset import load_source, merge_sources, parse_input
+
+    sparse = pd.DataFrame(
+        {
+            'patient_age': [40.0, 40.0, 40.0, 40.0, np.nan, np.nan],
+            'sex': ['F', 'F', 'F', 'female', '', ''],
+            'symptoms': ['Fatigue', 'Acne', 'Fatigue', 'fatigue', '', ''],
+            'thyroid_label': [0, 0, 1, 0, np.nan, np.nan],
+        }
+    )
+    sparse.to_csv(tmp_path / 'sparse.csv', index=False)
+    # The same patient seen twice on different days, once twice on the same day.
+    visits = pd.DataFrame(
+        {
+            'id': ['p1', 'p1', 'p1', np.nan],
+            'date': ['2024-01-01', '2024-02-01', '2024-01-01', '2024-01-01'],
+            'patient_age': [40.0, 40.0, 41.0, 40.0],
+        }
+    )
+    visits.to_csv(tmp_path / 'visits.csv', index=False)
+
+    loaded = [load_source(parse_input(str(tmp_path / name))) for name in ('sparse.csv', 'visits.csv')]
+    merged, report = merge_sources(loaded)
+
+    # Row 3 repeats row 0 up to spelling; rows with nothing recorded are never duplicates.
+    assert [(r['rows'], r['duplicates_within'], r['kept']) for r in report] == [(6, 1, 5), (4, 1, 3)]
+    assert len(merged) == 8
+
+
+def test_training_reads_the_dataset_the_last_writer_recorded(tmp_path, monkeypatch):
+    import dataset_io
+
+    csv = tmp_path / 'source.csv'
+    _source_csv(csv, n=12)
+    monkeypatch.setattr(dataset_io, 'PROCESSED_DIR', tmp_path / 'out')
+    monkeypatch.delenv('TRAINING_DATASET', raising=False)
+    assert dataset_io.dataset_path() == dataset_io.CSV_PATH
+
+    _prepare(monkeypatch, tmp_path, csv, tmp_path / 'out')
+    assert dataset_io.dataset_path() == tmp_path / 'out' / 'dataset.parquet'
+    # A newer file next to it changes nothing; only another write (or the override) does.
+    (tmp_path / 'out' / 'dataset.csv').touch()
+    assert dataset_io.dataset_path() == tmp_path / 'out' / 'dataset.parquet'
+    monkeypatch.setenv('TRAINING_DATASET', str(csv))
+    assert dataset_io.dataset_path() == csv
@@ -0,0 +1,33 @@
+from backend.models import db
+from backend.models.assessment_model import get_all_assessments_json, save_assessment
+from backend.services.risk_engine import calculate_risk
+
+
+def test_compact_storage_round_trip():
+    profile = {
+        "Age": 41,
+        "Gender": "Female",
+        "BMI": 31.5,
+        "Sleep quality": "Poor",
+        "Stress level": "High",
+        "Exercise frequency": "Low",
+        "Diet type": "High sugar",
+        "Family history": "Diabetes",
+        "Symptoms": ["Fatigue", "Irregular cycles"],
+    }
+    result = calculate_risk(profile, {"HbA1c": 6.1})
+    result["prediction_source"] = "rule_engine"
+    save_assessment(profile, result, "Round Trip")
+    save_assessment(profile, result, "Round Trip 2")
+
+    conn = db.get_connection()
+    stored = conn.execute("SELECT result_json, result_blob FROM assessments").fetchall()
+    templates = conn.execute("SELECT COUNT(*) FROM result_templates").fetchone()[0]
+    conn.close()
+    assert all(row["result_json"] is None and row["result_blob"] for row in stored)
+    assert templates == 1
+
+    item = get_all_assessments_json()[0]
+    assert item["profile_json"] == profile
+    assert item["result_json"] == result
+    assert "result_blob" not in item
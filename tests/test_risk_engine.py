@@ -16,3 +16,64 @@ def test_calculate_risk_shape():
     out = calculate_risk(profile, {})
     assert 'risk_scores' in out
     assert 'risk_level' in out
+
+
+def test_calculate_risk_batch_matches_row_engine():
+    import random
+
+    import numpy as np
+    import pandas as pd
+
+    from backend.risk_engine_batch import DOMAINS, calculate_risk_batch
+
+    rng = random.Random(7)
+    choices = {
+        'gender': ['Female', 'Male', 'female', ''],
+        'sleep_quality': ['Poor', 'Average', 'Good', 'low'],
+        'stress_level': ['High', 'Moderate', 'Low'],
+        'exercise_frequency': ['Low', '3 days/week', 'Regular', 'Daily', 'none'],
+        'diet_type': ['Balanced', 'High sugar', 'Processed', 'High protein', 'mixed'],
+        'family_history': ['', 'Diabetes', 'Thyroid', 'PCOS', 'Diabetes Thyroid'],
+    }
+    symptom_pool = ['Fatigue', 'Weight gain', 'Sugar cravings', 'Irregular cycles', 'Acne', 'Hair loss']
+    markers = {
+        'tsh': ('TSH', 0.2, 7.0),
+        't3': ('T3', 1.5, 4.5),
+        't4': ('T4', 0.5, 1.7),
+        'hba1c': ('HbA1c', 4.8, 7.4),
+        'insulin': ('Insulin', 4, 28),
+        'cortisol': ('Cortisol', 3, 26),
+        'cholesterol': ('Cholesterol', 130, 290),
+        'fasting_glucose': ('Fasting glucose', 70, 165),
+    }
+
+    rows, expected = [], []
+    for _ in range(500):
+        row = {col: rng.choice(values) for col, values in choices.items()}
+        row['age'] = rng.randint(18, 65)
+        row['bmi'] = round(rng.uniform(18, 37), 1)
+        symptoms = rng.sample(symptom_pool, k=rng.randint(0, 3))
+        row['symptoms'] = ', '.join(symptoms)
+        marker_values = {}
+        for col, (name, lo, hi) in markers.items():
+            value = None if rng.random() < 0.2 else round(rng.uniform(lo, hi), 2)
+            row[col] = np.nan if value is None else value
+            marker_values[name] = value
+        profile = {
+            'Age': row['age'],
+            'Gender': row['gender'],
+            'BMI': row['bmi'],
+            'Sleep quality': row['sleep_quality'],
+            'Stress level': row['stress_level'],
+            'Exercise frequency': row['exercise_frequency'],
+            'Diet type': row['diet_type'],
+            'Family history': row['family_history'],
+            'Symptoms': symptoms,
+        }
+        rows.append(row)
+        expected.append(calculate_risk(profile, marker_values)['risk_scores'])
+
+    batch = calculate_risk_batch(pd.DataFrame(rows))
+    for i, scores in enumerate(expected):
+        for domain in DOMAINS:
+            assert f"{int(round(batch[domain].iat[i]))}%" == scores[domain]
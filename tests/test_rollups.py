@@ -0,0 +1,169 @@
+import hashlib
+import random
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+from backend.app import create_app
+from backend.models import migrations
+from backend.models.archive_model import archive_assessments, archive_files
+from backend.models.assessment_model import build_assessment_row, insert_assessment_rows
+from backend.models.db import get_connection
+from backend.models.migrations import migrate
+from backend.models import rollup_model
+from backend.models.rollup_model import cohort_series, rebuild_rollups
+
+
+def _add(rows):
+    conn = get_connection()
+    built = []
+    for created_at, age, gender, bmi, thyroid in rows:
+        row = build_assessment_row(
+            {'Age': age, 'Gender': gender, 'BMI': bmi},
+            {'risk_scores': {'thyroid': f'{thyroid}%', 'diabetes': '20%'}},
+            'P',
+        )
+        row['created_at'] = created_at
+        built.append(row)
+    insert_assessment_rows(conn, built)
+    conn.commit()
+    conn.close()
+
+
+ROWS = [
+    ('2024-03-04T09:00:00Z', 25, 'Female', 22.0, 70),  # Monday
+    ('2024-03-05T09:00:00Z', 52, 'Male', 31.0, 40),
+    ('2024-03-10T09:00:00Z', 27, 'Female', 23.0, 80),  # Sunday, same week
+    ('2024-03-11T09:00:00Z', None, '', None, 10),
+    ('2024-04-01T09:00:00Z', 61, 'Female', 17.0, 66),
+]
+
+
+def test_rollups_are_maintained_on_insert_and_grouped_at_any_granularity():
+    _add(ROWS)
+
+    weekly = cohort_series('week')
+    assert [(p['period'], p['assessments']) for p in weekly['series']] == [
+        ('2024-03-04', 3),
+        ('2024-03-11', 1),
+        ('2024-04-01', 1),
+    ]
+    assert weekly['series'][0]['avg_scores']['thyroid'] == round((70 + 40 + 80) / 3, 1)
+    assert weekly['series'][0]['high_risk_counts'] == {'thyroid': 2, 'diabetes': 0, 'pcos': 0, 'adrenal': 0, 'metabolic': 0}
+    assert weekly['totals']['assessments'] == 5
+
+    by_cohort = cohort_series('month', group_by=['age_band', 'bmi_band'], filters={'gender': 'Female'})
+    assert [(p['period'], p['age_band'], p['bmi_band'], p['assessments']) for p in by_cohort['series']] == [
+        ('2024-03', '18-29', 'Normal', 2),
+        ('2024-04', '60+', 'Underweight', 1),
+    ]
+    unknown = cohort_series('year', start='2024-03-11', end='2024-03-31', group_by=['gender', 'age_band', 'bmi_band'])
+    assert [(p['gender'], p['age_band'], p['bmi_band']) for p in unknown['series']] == [('Unknown', 'Unknown', 'Unknown')]
+
+
+def test_partial_periods_are_filled_from_finer_rollups():
+    rng = random.Random(4)
+    first = date(2022, 11, 20)
+    _add(
+        [
+            (f'{first + timedelta(days=rng.randrange(500))}T08:00:00Z', rng.randrange(15, 80), rng.choice(['Female', 'Male']), 24.0, rng.randrange(101))
+            for _ in range(600)
+        ]
+    )
+    for granularity in ('week', 'month', 'year'):
+        for start, end in (('2023-01-15', '2023-11-03'), ('2022-12-01', '2023-12-31'), ('2023-02-07', '2023-02-09'), (None, '2023-06-30')):
+            fast = cohort_series(granularity, start, end, group_by=['gender'])
+            days = cohort_series('day', start, end, group_by=['gender'])
+            expected = {}
+            for point in days['series']:
+                key = (rollup_model.period_of(granularity, date.fromisoformat(point['period'])), point['gender'])
+                expected[key] = expected.get(key, 0) + point['assessments']
+            assert {(p['period'], p['gender']): p['assessments'] for p in fast['series']} == expected
+            assert fast['totals'] == days['totals']
+    # A year of weeks reads weekly rows, not daily ones.
+    assert cohort_series('week', '2023-01-02', '2023-12-31')['rollup_rows_read'] <= 53
+
+
+def test_rollups_keep_archived_history_and_rebuild_from_archives():
+    _add(ROWS)
+    before = cohort_series('month')
+    assert archive_assessments(older_than_days=30)['rows_moved'] == 5
+    assert cohort_series('month') == before
+
+    assert rebuild_rollups() == {'day_rows': 5, 'assessments': 5}
+    assert cohort_series('month') == before
+    assert rebuild_rollups(include_archive=False)['assessments'] == 0
+
+
+def test_upgrade_backfills_rollups_from_archive_files():
+    _add(ROWS)
+    expected = cohort_series('week', group_by=['gender'])
+    archive_assessments(older_than_days=30)
+    _add([('2099-01-01T09:00:00Z', 40, 'Male', 26.0, 20)])
+    # A database archived before migration 6 existed: no rollup table or trigger yet.
+    conn = get_connection()
+    conn.executescript(
+        """
+        DROP TRIGGER assessment_rollups_ai;
+        DROP TABLE assessment_rollups;
+        DELETE FROM schema_version WHERE version >= 6;
+        """
+    )
+    conn.close()
+
+    assert migrate()[0] == 6
+    upgraded = cohort_series('week', group_by=['gender'], end='2024-12-31')
+    assert upgraded['series'] == expected['series']
+    assert cohort_series('year')['totals']['assessments'] == 6
+
+
+def test_upgrade_reads_old_archive_files_without_altering_them(monkeypatch):
+    _add(ROWS)
+    archive_assessments(older_than_days=30)
+    # Archived before the rollup columns were all there.
+    for path in archive_files():
+        conn = sqlite3.connect(path)
+        conn.execute('ALTER TABLE assessments DROP COLUMN risk_score')
+        conn.close()
+    digests = {path: hashlib.sha256(path.read_bytes()).hexdigest() for path in archive_files()}
+
+    conn = get_connection()
+    conn.executescript(
+        """
+        DROP TRIGGER assessment_rollups_ai;
+        DROP TABLE assessment_rollups;
+        DELETE FROM schema_version WHERE version >= 6;
+        """
+    )
+    conn.close()
+
+    # A failure after the archives were read rolls the step back and leaves the files untouched.
+    real = migrations.ROLLUP_UPSERT_SQL
+    monkeypatch.setattr(migrations, 'ROLLUP_UPSERT_SQL', 'INSERT INTO missing_table VALUES (?)')
+    with pytest.raises(sqlite3.OperationalError):
+        migrate()
+    assert {path: hashlib.sha256(path.read_bytes()).hexdigest() for path in archive_files()} == digests
+
+    monkeypatch.setattr(migrations, 'ROLLUP_UPSERT_SQL', real)
+    assert migrate()[0] == 6
+    assert {path: hashlib.sha256(path.read_bytes()).hexdigest() for path in archive_files()} == digests
+    assert cohort_series('year')['totals']['assessments'] == 5
+
+
+def test_analytics_endpoint():
+    _add(ROWS)
+    client = create_app().test_client()
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+    body = client.get('/api/admin/analytics?granularity=month&group_by=gender').get_json()
+    assert body['status'] == 'success'
+    assert [(p['period'], p['gender'], p['assessments']) for p in body['series']] == [
+        ('2024-03', 'Female', 2),
+        ('2024-03', 'Male', 1),
+        ('2024-03', 'Unknown', 1),
+        ('2024-04', 'Female', 1),
+    ]
+    assert client.get('/api/admin/analytics?granularity=hour').status_code == 400
+    assert client.get('/api/admin/analytics?group_by=symptoms').status_code == 400
+    assert client.get('/api/admin/analytics?start=03/04/2024').status_code == 400
@@ -0,0 +1,97 @@
+import math
+import random
+from datetime import date, timedelta
+
+from backend.app import create_app
+from backend.models.archive_model import archive_assessments
+from backend.models.assessment_model import build_assessment_row, insert_assessment_rows
+from backend.models.db import get_connection
+from backend.models.migrations import migrate
+from backend.models.score_distribution import rebuild_score_histograms, score_distribution
+
+
+def _add(rows):
+    conn = get_connection()
+    built = []
+    for created, thyroid, diabetes in rows:
+        scores = {'thyroid': f'{thyroid}%'}
+        if diabetes is not None:
+            scores['diabetes'] = f'{diabetes}%'
+        row = build_assessment_row({'Age': 40}, {'risk_scores': scores}, 'P')
+        row['created_at'] = f'{created}T10:00:00Z'
+        built.append(row)
+    insert_assessment_rows(conn, built)
+    conn.commit()
+    conn.close()
+
+
+def _random_rows(n=800):
+    rng = random.Random(5)
+    first = date(2023, 1, 1)
+    return [
+        ((first + timedelta(days=rng.randrange(400))).isoformat(), rng.randrange(101), rng.choice([None, rng.randrange(101)]))
+        for _ in range(n)
+    ]
+
+
+def test_merged_histograms_match_exact_quantiles_over_any_range():
+    rows = _random_rows()
+    _add(rows)
+    for start, end in (('2023-01-01', '2024-02-04'), ('2023-02-10', '2023-09-03'), ('2023-05-05', '2023-05-20'), (None, None)):
+        data = score_distribution(start, end, quantiles=[0.1, 0.5, 0.9, 1.0])
+        inside = [r for r in rows if (start is None or r[0] >= start) and (end is None or r[0] <= end)]
+        for domain, column in (('thyroid', 1), ('diabetes', 2)):
+            scores = sorted(r[column] for r in inside if r[column] is not None)
+            got = data['domains'][domain]
+            assert got['count'] == len(scores)
+            assert got['mean'] == round(sum(scores) / len(scores), 2)
+            for q in (0.1, 0.5, 0.9, 1.0):
+                assert got['quantiles'][f'p{round(q * 100, 1):g}'] == scores[max(1, math.ceil(q * len(scores))) - 1]
+            assert sum(b['count'] for b in got['histogram']) == len(scores)
+        assert data['domains']['pcos']['count'] == 0 and data['domains']['pcos']['quantiles']['p50'] is None
+
+    histogram = score_distribution(domains=['thyroid'], bin_width=25)['domains']['thyroid']['histogram']
+    assert [(b['from'], b['to']) for b in histogram] == [(0, 24), (25, 49), (50, 74), (75, 99), (100, 100)]
+
+
+def test_histograms_keep_archived_history_and_rebuild():
+    rows = _random_rows(200)
+    _add(rows)
+    before = score_distribution()
+    archive_assessments(older_than_days=30)
+    assert score_distribution() == before
+    assert rebuild_score_histograms()['scores'] == sum(1 for r in rows for v in r[1:] if v is not None)
+    assert score_distribution() == before
+
+
+def test_upgrade_backfills_histograms_from_archive_files():
+    _add(_random_rows(200))
+    before = score_distribution()
+    archive_assessments(older_than_days=30)
+    # A database archived before migration 7 existed: no histogram table or trigger yet.
+    conn = get_connection()
+    conn.executescript(
+        """
+        DROP TRIGGER score_histograms_ai;
+        DROP TABLE score_histograms;
+        DELETE FROM schema_version WHERE version >= 7;
+        """
+    )
+    conn.close()
+
+    assert migrate()[0] == 7
+    assert score_distribution() == before
+
+
+def test_score_distribution_endpoint():
+    _add([('2024-03-01', 20, 90), ('2024-03-02', 60, 95), ('2024-04-01', 80, None)])
+    client = create_app().test_client()
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+    body = client.get('/api/admin/score-distribution?start=2024-03-01&end=2024-03-31&domain=thyroid').get_json()
+    assert list(body['domains']) == ['thyroid']
+    assert body['domains']['thyroid']['count'] == 2
+    assert body['domains']['thyroid']['quantiles'] == {'p50': 20, 'p90': 60}
+    assert client.get('/api/admin/score-distribution?domain=liver').status_code == 400
+    assert client.get('/api/admin/score-distribution?quantiles=1.5').status_code == 400
+    assert client.get('/api/admin/score-distribution?bin_width=x').status_code == 400
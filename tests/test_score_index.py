@@ -0,0 +1,49 @@
+from backend.models.assessment_model import build_assessment_row, insert_assessment_rows, save_assessment
+from backend.models.db import get_connection
+from backend.models.score_index import score_percentiles
+
+
+def _result(diabetes):
+    return {'risk_scores': {'thyroid': '20%', 'diabetes': f'{diabetes}%', 'pcos': '0%', 'adrenal': '30%', 'metabolic': '40%'}}
+
+
+def test_percentiles_track_new_assessments():
+    assert score_percentiles(_result(50)['risk_scores'])['percentiles']['diabetes'] is None
+
+    for score in (10, 20, 30, 40):
+        save_assessment({'Age': 30}, _result(score), 'Test')
+    ranks = score_percentiles({'diabetes': '30%', 'thyroid': '20%'})
+    assert ranks['population'] == 4
+    assert ranks['percentiles']['diabetes'] == 62.5  # two below, one tie counted half
+    assert ranks['percentiles']['thyroid'] == 50.0
+    assert ranks['percentiles']['pcos'] is None
+
+    # Rows committed by another writer are picked up through the id watermark.
+    conn = get_connection()
+    insert_assessment_rows(conn, [build_assessment_row({'Age': 30}, _result(90), 'Other')])
+    conn.commit()
+    conn.close()
+    ranks = score_percentiles({'diabetes': '95%'})
+    assert ranks['population'] == 5
+    assert ranks['percentiles']['diabetes'] == 100.0
+
+
+def test_stored_assessment_ranks_as_it_did_before_saving():
+    for score in (10, 20, 30, 40):
+        save_assessment({'Age': 30}, _result(score), 'Test')
+    before = score_percentiles(_result(30)['risk_scores'])
+    save_assessment({'Age': 30}, _result(30), 'Test')
+    after = score_percentiles(_result(30)['risk_scores'], stored=True)
+    assert after == before
+    assert after['population'] == 4 and after['percentiles']['diabetes'] == 62.5
+
+    # The only stored assessment has nothing to be ranked against.
+    conn = get_connection()
+    conn.execute('DELETE FROM assessments WHERE id < 5')
+    conn.commit()
+    conn.close()
+    from backend.models.score_index import invalidate_score_index
+
+    invalidate_score_index()
+    alone = score_percentiles(_result(30)['risk_scores'], stored=True)
+    assert alone['population'] == 0 and alone['percentiles']['diabetes'] is None
@@ -0,0 +1,85 @@
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+
+from backend.models.assessment_model import build_assessment_row, insert_assessment_rows
+from backend.models.db import get_connection
+from backend.services import sequence_inference
+
+
+def _add_visit(user_id, bmi, diabetes):
+    profile = {'Age': 40, 'Gender': 'Female', 'BMI': bmi, 'Symptoms': ['Fatigue']}
+    result = {'risk_scores': {'thyroid': '20%', 'diabetes': f'{diabetes}%', 'pcos': '10%', 'adrenal': '5%', 'metabolic': '30%'}}
+    conn = get_connection()
+    insert_assessment_rows(conn, [build_assessment_row(profile, result, 'Test', user_id=user_id)])
+    conn.commit()
+    conn.close()
+
+
+def _model(tmp_path, monkeypatch, max_len):
+    pre = ColumnTransformer([('num', SimpleImputer(strategy='constant', fill_value=0), ['age', 'bmi'])])
+    pre.fit(pd.DataFrame({'age': [30.0, 50.0], 'bmi': [20.0, 30.0]}))
+    rng = np.random.default_rng(0)
+    n_features, hidden = 2 + len(sequence_inference.DOMAINS), 4
+    params = {}
+    for gate in ('z', 'r', 'n'):
+        params[f'W{gate}'] = rng.normal(0, 0.1, (n_features, hidden)).astype(np.float32)
+        params[f'U{gate}'] = rng.normal(0, 0.1, (hidden, hidden)).astype(np.float32)
+        params[f'b{gate}'] = np.zeros(hidden, dtype=np.float32)
+    params['Wo'] = rng.normal(0, 1, (hidden, len(sequence_inference.DOMAINS))).astype(np.float32)
+    params['bo'] = np.zeros(len(sequence_inference.DOMAINS), dtype=np.float32)
+    path = tmp_path / 'sequence_gru.pkl'
+    model = {'pre': pre, 'params': params, 'hidden_size': hidden, 'max_len': max_len, 'fingerprint': 'test'}
+    joblib.dump(model, path)
+    monkeypatch.setattr(sequence_inference, 'SEQUENCE_MODEL_PATH', path)
+    sequence_inference.clear_hidden_cache()
+    return model
+
+
+def test_cached_hidden_state_matches_full_replay(tmp_path, monkeypatch):
+    _model(tmp_path, monkeypatch, max_len=12)
+
+    assert sequence_inference.predict_next_visit(1) is None
+    for bmi, diabetes in [(24, 30), (27, 50), (31, 70)]:
+        _add_visit(1, bmi, diabetes)
+    _add_visit(2, 22, 10)
+
+    first = sequence_inference.predict_next_visit(1)
+    assert first['visits'] == 3
+    _add_visit(1, 33, 80)
+    incremental = sequence_inference.predict_next_visit(1)
+    assert incremental['visits'] == 4
+
+    sequence_inference.clear_hidden_cache()
+    replayed = sequence_inference.predict_next_visit(1)
+    assert replayed['risk_scores'] == incremental['risk_scores']
+    assert replayed['last_assessment_id'] == incremental['last_assessment_id']
+
+
+def test_long_history_is_scored_from_its_last_training_window(tmp_path, monkeypatch):
+    model = _model(tmp_path, monkeypatch, max_len=2)
+    visits = [(24, 30), (27, 50), (31, 70), (33, 80), (29, 60)]
+    for bmi, diabetes in visits[:3]:
+        _add_visit(1, bmi, diabetes)
+    sequence_inference.predict_next_visit(1)
+    # Crosses the window boundary after the cached state was taken.
+    for bmi, diabetes in visits[3:]:
+        _add_visit(1, bmi, diabetes)
+    incremental = sequence_inference.predict_next_visit(1)
+    assert incremental['visits'] == 5
+
+    # Training windows are visits [0, 1], [2, 3], [4]: the last visit starts from a zero state.
+    conn = get_connection()
+    rows = [dict(r) for r in conn.execute(f'SELECT {sequence_inference.VISIT_COLUMNS} FROM assessments ORDER BY id')]
+    conn.close()
+    x = sequence_inference.encode_visits(rows, model['pre'])[-1:]
+    h = sequence_inference.gru_step(model['params'], x, np.zeros((1, model['hidden_size']), dtype=np.float32))
+    expected = sequence_inference.gru_output(model['params'], h)[0]
+    assert incremental['risk_scores'] == {
+        d: f'{int(round(float(p) * 100))}%' for d, p in zip(sequence_inference.DOMAINS, expected)
+    }
+
+    sequence_inference.clear_hidden_cache()
+    assert sequence_inference.predict_next_visit(1)['risk_scores'] == incremental['risk_scores']
@@ -0,0 +1,60 @@
+import joblib
+from sklearn.dummy import DummyClassifier
+
+from backend.services import model_inference
+from backend.services.model_inference import (
+    TARGETS,
+    configure_shadow,
+    flush_shadow,
+    predict_with_models,
+    shadow_stats,
+    stop_shadow,
+)
+
+
+def _save(folder, target, labels, fingerprint):
+    model = DummyClassifier(strategy='prior').fit([[0]] * len(labels), labels)
+    model.model_fingerprint_ = fingerprint
+    joblib.dump(model, folder / f'{target}_best_model.pkl')
+
+
+def test_shadow_scores_candidates_off_the_request_path(tmp_path, monkeypatch):
+    production, candidate = tmp_path / 'prod', tmp_path / 'candidate'
+    production.mkdir()
+    candidate.mkdir()
+    for target in TARGETS:
+        _save(production, target, [0, 1, 1, 1], 'prod')
+    _save(candidate, 'thyroid', [0, 0, 0, 1], 'cand-a')  # 25% vs 75%: every call disagrees
+    _save(candidate, 'diabetes', [0, 1, 1, 1], 'cand-b')  # same scores
+    monkeypatch.setattr(model_inference, 'MODEL_DIR', production)
+
+    assert shadow_stats() == {'enabled': False}
+    configure_shadow(candidate, sample_rate=1.0)
+    try:
+        for _ in range(5):
+            result = predict_with_models({'Age': 30, 'Gender': 'Female'}, {})
+            assert result['risk_scores']['thyroid'] == '75%'
+        flush_shadow()
+        stats = shadow_stats()
+    finally:
+        stop_shadow()
+
+    assert stats['enabled'] and stats['sampled'] == 5 and stats['compared'] == 5 and stats['errors'] == 0
+    assert set(stats['targets']) == {'thyroid', 'diabetes'}
+    thyroid, diabetes = stats['targets']['thyroid'], stats['targets']['diabetes']
+    assert thyroid['candidate_version'] == 'cand-a'
+    assert thyroid['level_disagreement_rate'] == 1.0 and thyroid['mean_abs_score_diff'] == 50
+    assert diabetes['label_disagreement_rate'] == 0.0 and diabetes['max_abs_score_diff'] == 0
+    assert thyroid['production_p50_ms'] is not None and thyroid['candidate_p99_ms'] is not None
+
+
+def test_shadow_sampling_and_backpressure(tmp_path):
+    evaluator = model_inference.ShadowEvaluator(tmp_path, sample_rate=0.0)
+    evaluator.submit(None, {'thyroid': '40%'}, {})
+    assert evaluator.stats()['sampled'] == 0
+
+    # Not started: nothing drains the queue, so the second sample is dropped rather than waited on.
+    evaluator = model_inference.ShadowEvaluator(tmp_path, sample_rate=1.0, max_queue=1)
+    evaluator.submit(None, {'thyroid': '40%'}, {})
+    evaluator.submit(None, {'thyroid': '40%'}, {})
+    assert evaluator.stats()['sampled'] == 1 and evaluator.stats()['dropped'] == 1
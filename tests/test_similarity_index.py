@@ -0,0 +1,64 @@
+from backend.models.archive_model import archive_assessments
+from backend.models.assessment_model import build_assessment_row, insert_assessment_rows
+from backend.models.db import get_connection
+from backend.services.similarity_index import build_index, similar_assessments
+
+
+def _add(rows):
+    conn = get_connection()
+    insert_assessment_rows(
+        conn,
+        [
+            build_assessment_row(
+                {'Age': age, 'Gender': gender, 'BMI': bmi, 'Stress level': 'High', 'Symptoms': ['Fatigue']},
+                {'risk_scores': {'diabetes': '40%'}},
+                f'P{age}',
+            )
+            for age, gender, bmi in rows
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_similar_assessments_from_segments_and_unindexed_rows():
+    assert similar_assessments(1) is None
+
+    _add([(30, 'Female', 22.0), (31, 'Female', 22.5), (60, 'Male', 35.0), (62, 'Male', 36.0), (45, 'Female', 28.0)])
+    report = build_index()
+    assert report['rows'] == 5 and report['added'] == 5
+
+    data = similar_assessments(1, k=2)
+    assert [n['id'] for n in data['neighbours']] == [2, 5]
+    assert data['neighbours'][0]['risk_scores']['diabetes'] == '40%'
+    assert data['neighbours'][0]['distance'] <= data['neighbours'][1]['distance']
+
+    # Saved after the build: encoded on the next query, then persisted by an update.
+    _add([(30, 'Female', 22.1)])
+    assert [n['id'] for n in similar_assessments(1, k=1)['neighbours']] == [6]
+    report = build_index()
+    assert report['added'] == 1 and len(report['segments']) == 2
+    assert [n['id'] for n in similar_assessments(6, k=2)['neighbours']] == [1, 2]
+    assert similar_assessments(99)['found'] is False
+
+
+def test_archived_neighbours_keep_their_details_and_deleted_ones_are_refilled():
+    _add([(30, 'Female', 22.0), (31, 'Female', 22.5), (32, 'Female', 23.0), (60, 'Male', 35.0), (62, 'Male', 36.0)])
+    build_index()
+
+    conn = get_connection()
+    conn.execute("UPDATE assessments SET created_at = '2020-01-05T10:00:00Z' WHERE id IN (1, 2)")
+    conn.commit()
+    conn.close()
+    archive_assessments(older_than_days=365, vacuum=False)
+
+    data = similar_assessments(1, k=2)
+    assert [(n['id'], n['archived']) for n in data['neighbours']] == [(2, True), (3, False)]
+    assert data['neighbours'][0]['patient_name'] == 'P31'
+    assert data['neighbours'][0]['risk_scores']['diabetes'] == '40%'
+
+    conn = get_connection()
+    conn.execute('DELETE FROM assessments WHERE id = 3')
+    conn.commit()
+    conn.close()
+    assert [n['id'] for n in similar_assessments(1, k=2)['neighbours']] == [2, 4]
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import train_classical_models
+from dataset_io import CSV_PATH
+from train_classical_models import FEATURES, TARGETS, encode_split, load_matrix, plan_workers
+
+
+@pytest.mark.parametrize('cores', [1, 2, 3, 4, 7, 8, 16, 64])
+@pytest.mark.parametrize('jobs', [0, 1, 2, 3, 5, 8, 20, 100])
+def test_plan_workers_never_oversubscribes(jobs, cores):
+    workers, threads = plan_workers(jobs, cores)
+    assert workers >= 1 and threads >= 1
+    assert workers * threads <= cores
+    assert workers <= max(1, jobs)
+
+
+def test_plan_workers_edge_cases():
+    assert plan_workers(20, 1) == (1, 1)
+    assert plan_workers(20, 0) == (1, 1)
+    # Fewer jobs than cores: one worker per job, the spare cores become threads.
+    assert plan_workers(2, 8) == (2, 4)
+    assert plan_workers(3, 8) == (3, 2)
+    assert plan_workers(1, 8) == (1, 8)
+    assert plan_workers(20, 8) == (8, 1)
+
+
+def _split_inputs():
+    df = pd.read_csv(CSV_PATH, nrows=150)
+    y = pd.to_numeric(df[TARGETS['diabetes']], errors='coerce').fillna(0).astype(int)
+    return df[FEATURES], y
+
+
+def _arrays(split):
+    return [np.asarray(load_matrix(split[k])) for k in ('X_train', 'X_test', 'y_train', 'y_test')]
+
+
+def test_encode_split_reuses_the_cache_until_data_or_code_changes(tmp_path, monkeypatch):
+    X, y = _split_inputs()
+    cache = tmp_path / 'cache'
+    first = encode_split('diabetes', X, y, 'data-a', cache_dir=cache)
+    second = encode_split('diabetes', X, y, 'data-a', cache_dir=cache)
+    assert (first['cached'], second['cached']) == (False, True)
+    assert second['X_train'] == first['X_train']
+    assert isinstance(load_matrix(second['X_train']), np.memmap)
+    assert len(list(cache.iterdir())) == 1
+
+    other_data = encode_split('diabetes', X, y, 'data-b', cache_dir=cache)
+    assert other_data['cached'] is False and other_data['X_train'] != first['X_train']
+
+    monkeypatch.setattr(train_classical_models, 'encoding_hash', lambda: 'edited')
+    other_code = encode_split('diabetes', X, y, 'data-a', cache_dir=cache)
+    assert other_code['cached'] is False and other_code['X_train'] != first['X_train']
+    assert len(list(cache.iterdir())) == 3
+
+    # Same inputs, so re-encoding reproduces the cached matrices exactly.
+    for fresh in (other_data, other_code):
+        for a, b in zip(_arrays(first), _arrays(fresh)):
+            np.testing.assert_array_equal(a, b)
@@ -0,0 +1,111 @@
+import json
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import train_classical_models
+import train_incremental
+from backend.models.assessment_model import save_assessment
+from dataset_io import CSV_PATH
+
+PROFILE = {
+    'Age': 41,
+    'Gender': 'Female',
+    'BMI': 31.5,
+    'Sleep quality': 'Poor',
+    'Stress level': 'High',
+    'Exercise frequency': 'Low',
+    'Diet type': 'High sugar',
+    'Family history': 'Diabetes',
+    'Symptoms': ['Fatigue', 'Weight gain'],
+}
+RESULT = {'risk_scores': {'thyroid': '40%', 'diabetes': '70%', 'pcos': '30%', 'adrenal': '20%', 'metabolic': '66%'}}
+
+
+def _assess(n, start=0):
+    for i in range(n):
+        save_assessment({**PROFILE, 'Age': 30 + (start + i) % 40, 'BMI': 20.0 + (start + i) % 15}, RESULT, 'P')
+
+
+def _run(monkeypatch, *args):
+    monkeypatch.setattr(sys, 'argv', ['train_incremental.py', *args])
+    train_incremental.main()
+    return train_incremental.load_state()
+
+
+def _artifacts(tmp_path, monkeypatch):
+    artifacts = tmp_path / 'artifacts'
+    monkeypatch.setattr(train_incremental, 'ARTIFACTS', artifacts)
+    monkeypatch.setattr(train_incremental, 'INCREMENTAL_DIR', artifacts / 'incremental')
+    monkeypatch.setattr(train_incremental, 'STATE_PATH', artifacts / 'incremental' / 'state.json')
+    monkeypatch.setattr(train_classical_models, 'METRICS_PATH', artifacts / 'metrics.json')
+    # Bootstrap from a small slice of the unified dataset.
+    subset = tmp_path / 'dataset.csv'
+    pd.read_csv(CSV_PATH, nrows=200).to_csv(subset, index=False)
+    monkeypatch.setattr(train_incremental, 'dataset_path', lambda: subset)
+    return artifacts
+
+
+def test_runs_train_only_on_rows_above_the_watermark(tmp_path, monkeypatch):
+    _artifacts(tmp_path, monkeypatch)
+    _assess(12)
+    state = _run(monkeypatch)
+    assert (state['version'], state['watermark'], state['history'][-1]['rows']) == (1, 12, 12)
+
+    batches = []
+    real = train_incremental.iter_new_assessments
+
+    def spy(after_id, batch_size):
+        for last_id, X, y in real(after_id, batch_size):
+            batches.append(len(X))
+            yield last_id, X, y
+
+    monkeypatch.setattr(train_incremental, 'iter_new_assessments', spy)
+    _assess(5, start=12)
+    state = _run(monkeypatch, '--batch-size', '2')
+    assert batches == [2, 2, 1]
+    assert (state['version'], state['watermark'], state['history'][-1]['rows']) == (2, 17, 5)
+
+    # Nothing new: no version is written and the watermark stays put.
+    state = _run(monkeypatch)
+    assert (state['version'], state['watermark']) == (2, 17)
+
+
+def test_partial_fit_continues_the_stored_model(tmp_path, monkeypatch):
+    _artifacts(tmp_path, monkeypatch)
+    _assess(10)
+    _run(monkeypatch)
+    v1 = joblib.load(train_incremental.version_path('diabetes', 1))
+
+    _assess(6, start=10)
+    _run(monkeypatch)
+    v2 = joblib.load(train_incremental.version_path('diabetes', 2))
+
+    # Version 2 is version 1 updated with the six new rows, not a fresh fit.
+    pre, clf = v1.named_steps['pre'], v1.named_steps['clf']
+    X, y = next(train_incremental.iter_new_assessments(10, 100))[1:]
+    clf.partial_fit(pre.transform(X), y['diabetes'].to_numpy())
+    np.testing.assert_allclose(v2.named_steps['clf'].coef_, clf.coef_)
+    assert v2.named_steps['clf'].t_ == clf.t_
+    assert v2.model_fingerprint_ == 'incremental-v0002-16'
+
+
+def test_promote_writes_a_loadable_served_model_and_updates_metrics(tmp_path, monkeypatch):
+    artifacts = _artifacts(tmp_path, monkeypatch)
+    _assess(8)
+    state = _run(monkeypatch, '--promote')
+    assert state['promoted_version'] == 1 and state['history'][-1]['promoted']
+
+    served = joblib.load(artifacts / 'thyroid_best_model.pkl')
+    assert served.model_fingerprint_ == 'incremental-v0001-8'
+    assert served.predict_proba(pd.DataFrame([{c: None for c in train_incremental.FEATURES}])).shape == (1, 2)
+    assert not list(artifacts.glob('*.tmp'))
+
+    with open(artifacts / 'metrics.json', 'r', encoding='utf-8') as f:
+        best = json.load(f)['thyroid']['best']
+    assert best['model'] == 'sgd_incremental'
+    assert best['fingerprint'] == 'incremental-v0001-8'
+    assert best['artifact'] == str(artifacts / 'thyroid_best_model.pkl')
+    assert 'f1' in best and 'log_loss' in best
@@ -0,0 +1,102 @@
+import json
+import sys
+
+import pandas as pd
+import pytest
+
+import train_classical_models
+import tune_models
+from dataset_io import CSV_PATH
+from tune_models import SEARCH_SPACES, config_id, rung_fractions, sample_configs
+
+
+def test_rung_fractions_end_on_the_full_split():
+    assert rung_fractions(1 / 9, 3) == [0.111111, 0.333333, 1.0]
+    # 0.1 * 3**2 = 0.9 is within a factor of eta of 1.0, so that rung is replaced by the full one.
+    assert rung_fractions(0.1, 3) == [0.1, 0.3, 1.0]
+    assert rung_fractions(0.5, 3) == [0.5, 1.0]
+    assert rung_fractions(1.0, 3) == [1.0]
+
+
+def test_sample_configs_are_deterministic_and_capped_at_the_grid():
+    first = sample_configs('random_forest', 10, seed=7)
+    assert first == sample_configs('random_forest', 10, seed=7)
+    assert first != sample_configs('random_forest', 10, seed=8)
+    assert len({config_id(p) for p in first}) == 10
+
+    # logistic_regression has 7 x 2 = 14 configs in its grid.
+    grid = sample_configs('logistic_regression', 100, seed=7)
+    assert len(grid) == 14 and len({config_id(p) for p in grid}) == 14
+    assert all(p['C'] in SEARCH_SPACES['logistic_regression']['C'] for p in grid)
+
+
+@pytest.fixture
+def tuning(tmp_path, monkeypatch):
+    subset = tmp_path / 'dataset.csv'
+    pd.read_csv(CSV_PATH, nrows=240).to_csv(subset, index=False)
+    monkeypatch.setattr(tune_models, 'dataset_path', lambda: subset)
+    monkeypatch.setattr(tune_models, 'TUNED_PARAMS_PATH', tmp_path / 'tuned_params.json')
+    encode = train_classical_models.encode_split
+    monkeypatch.setattr(
+        tune_models, 'encode_split', lambda *args: encode(*args, cache_dir=tmp_path / 'cache')
+    )
+    log = tmp_path / 'tuning_log.jsonl'
+
+    def run(*extra):
+        monkeypatch.setattr(
+            sys,
+            'argv',
+            [
+                'tune_models.py', '--targets', 'diabetes', '--models', 'logistic_regression',
+                '--candidates', '4', '--eta', '2', '--min-fraction', '0.5', '--cores', '1',
+                '--log', str(log), *extra,
+            ],
+        )
+        tune_models.main()
+        lines = log.read_text(encoding='utf-8').splitlines()
+        return [json.loads(line) for line in lines], json.loads((tmp_path / 'tuned_params.json').read_text())
+
+    return run
+
+
+def test_rerun_resumes_every_evaluation_from_the_log(tuning, capsys):
+    entries, tuned = tuning()
+    # Rungs 0.5 and 1.0: four configs, then the best two.
+    assert [e['fraction'] for e in entries].count(0.5) == 4 and [e['fraction'] for e in entries].count(1.0) == 2
+    entry = tuned['diabetes']['logistic_regression']
+    assert entry['fraction'] == 1.0 and 'partial' not in entry
+
+    capsys.readouterr()
+    again, tuned_again = tuning()
+    assert len(again) == len(entries)
+    assert 'evaluated=0 resumed=4' in capsys.readouterr().out
+    assert tuned_again == tuned
+
+
+def test_budget_stop_marks_partial_and_keeps_complete_entries(tuning, tmp_path, capsys):
+    # Any evaluation uses more than a nanosecond of CPU, so the first rung is cut short.
+    entries, tuned = tuning('--cpu-budget', '1e-9')
+    assert all(e['fraction'] == 0.5 for e in entries)
+    # A partially evaluated rung picks no winner, so nothing is written.
+    assert tuned == {}
+
+    # The complete run resumes whatever the stopped run evaluated.
+    complete, full = tuning()
+    assert len([e for e in complete if e['fraction'] == 0.5]) == 4
+    assert full['diabetes']['logistic_regression']['fraction'] == 1.0
+
+    # Drop the full-split rung from the log: the first rung resumes for free, the last one is cut short.
+    first_rung = ''.join(json.dumps(e) + '\n' for e in complete if e['fraction'] == 0.5)
+    (tmp_path / 'tuning_log.jsonl').write_text(first_rung, encoding='utf-8')
+    _, after = tuning('--cpu-budget', '1e-9')
+    assert after == full
+
+    (tmp_path / 'tuning_log.jsonl').write_text(first_rung, encoding='utf-8')
+    (tmp_path / 'tuned_params.json').unlink()
+    _, partial = tuning('--cpu-budget', '1e-9')
+    entry = partial['diabetes']['logistic_regression']
+    assert entry['partial'] is True and entry['fraction'] == 0.5
+
+    capsys.readouterr()
+    assert train_classical_models.load_tuned_params(tmp_path / 'tuned_params.json') == {'diabetes': {}}
+    assert 'ignoring partial tuned params' in capsys.readouterr().out